@@ -1,24 +1,19 @@
-import pickle
-from flask import Flask, render_template, request, url_for, jsonify, session
+from flask import Flask, Response, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
-from PIL import Image, ImageEnhance, ImageFilter
-from bson import ObjectId
-import datetime
-from ultralytics import YOLO
-from flask_cors import CORS
-from chatbot_service import get_chatbot_response,ask_gemini 
-from pymongo import MongoClient
-from datetime import datetime, timezone
 import sys
 import os
+import json
+import time
+import importlib
+import threading
 import traceback
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from src.components import ComponentRegistry
 from src.config import Config
-from src.document_processor import DocumentProcessor
-from src.embedding_store import EmbeddingStore
-from src.rag_model import RAGModel
+from src.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, collect_timings, collect_usage, timed, timings_ms
+from src.partitions import search_options_from
 
 from dotenv import load_dotenv
 load_dotenv()  # This loads environment variables from .env file
@@ -28,9 +23,36 @@ kmp_duplicate_lib_ok = os.getenv('KMP_DUPLICATE_LIB_OK')
 app = Flask(__name__)
 
 config = Config()
-document_processor = DocumentProcessor()
-embedding_store = EmbeddingStore(config)
-rag_model = RAGModel(config, embedding_store)
+# werkzeug answers 413 from the Content-Length header instead of buffering the upload
+app.config['MAX_CONTENT_LENGTH'] = config.REQUEST_MAX_BYTES
+
+def build_document_processor():
+    from src.document_processor import DocumentProcessor
+    return DocumentProcessor(config.EXTRACTION_MAX_WORKERS)
+
+def build_embedding_store():
+    from src.embedding_store import EmbeddingStore
+    return EmbeddingStore(config)
+
+def build_rag_model(embedding_store):
+    from src.rag_model import RAGModel
+    return RAGModel(config, embedding_store)
+
+def build_detector():
+    from src.detection import YoloDetector
+    return YoloDetector.from_config(config)
+
+# Subsystems are imported and built on first use, or ahead of it by the prewarm thread,
+# so the process starts serving (and answering /ready) without paying for all of them
+components = ComponentRegistry()
+components.register('document_processor', build_document_processor)
+components.register('embedding_store', build_embedding_store)
+components.register('rag_model', build_rag_model, depends=('embedding_store',))
+components.register('chatbot_service', lambda: importlib.import_module('chatbot_service'))
+components.register('detector', build_detector)
+
+if config.PREWARM_COMPONENTS:
+    components.prewarm(config.PREWARM_COMPONENTS)
 
 @app.route('/initialize', methods=['POST'])
 def initialize_chatbot():
@@ -38,20 +60,115 @@ def initialize_chatbot():
     Initialize the chatbot by processing documents and creating embeddings.
     """
     try:
-        # Extract texts from PDFs
-        medical_texts = document_processor.extract_text_from_pdfs(config.MEDICAL_DOCS_FOLDER)
+        start = time.perf_counter()
+        
+        # Stream texts from PDFs, extracted in parallel, into chunking and embedding
+        extraction_report = []
+        failed_documents = []
+        medical_texts = components.get('document_processor').iter_documents(
+            config.MEDICAL_DOCS_FOLDER, extraction_report, failed_documents
+        )
         
-        # Create embeddings
-        embedding_store.create_embeddings(medical_texts)
+        # Create embeddings; documents that failed to extract keep their previous chunks
+        stats = components.get('embedding_store').create_embeddings(medical_texts, keep=failed_documents)
         
         return jsonify({
             'status': 'success', 
             'message': 'Chatbot initialized successfully',
-            'processed_documents': list(medical_texts.keys())
+            'processed_documents': stats['updated_documents'] + stats['unchanged_documents'],
+            'extraction': extraction_report,
+            'updated_documents': stats['updated_documents'],
+            'removed_documents': stats['removed_documents'],
+            'chunks': stats['chunks'],
+            'chunks_per_sec': stats['chunks_per_sec'],
+            'cache_hits': stats['cache_hits'],
+            'cache_misses': stats['cache_misses'],
+            'embedding_seconds': stats['embedding_seconds'],
+            'ingest_seconds': round(time.perf_counter() - start, 3)
+        }), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/documents', methods=['GET'])
+def list_documents():
+    """
+    List indexed documents with their chunk ID ranges.
+    """
+    try:
+        return jsonify({'documents': components.get('embedding_store').list_documents()}), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/documents/<name>', methods=['PUT'])
+def upsert_document(name):
+    """
+    Add or replace a single guideline PDF without rebuilding the whole index.
+    """
+    try:
+        name = secure_filename(name)
+        pdf_file = request.files.get('file')
+        if not name or pdf_file is None:
+            return jsonify({'status': 'error', 'message': 'A document name and PDF file are required'}), 400
+        
+        filepath = os.path.join(config.MEDICAL_DOCS_FOLDER, f'{name}.pdf')
+        # The live guideline is replaced only once the upload is indexed; the
+        # temporary name does not end in .pdf, so folder scans never list it
+        upload_path = os.path.join(
+            config.MEDICAL_DOCS_FOLDER, f'.{name}.{os.getpid()}.{threading.get_ident()}.upload'
+        )
+        try:
+            pdf_file.save(upload_path)
+            text = components.get('document_processor').extract_text_from_pdf(upload_path)
+            stats = components.get('embedding_store').upsert_document(name, text)
+            os.replace(upload_path, filepath)
+        except BaseException:
+            if os.path.exists(upload_path):
+                os.remove(upload_path)
+            raise
+        
+        return jsonify({
+            'status': 'success',
+            'document': name,
+            'updated': name in stats['updated_documents'],
+            'chunks': stats['chunks'],
+            'embedding_seconds': stats['embedding_seconds']
         }), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/documents/<name>', methods=['DELETE'])
+def delete_document(name):
+    """
+    Remove a single guideline PDF from the index and the documents folder.
+    """
+    try:
+        name = secure_filename(name)
+        removed = components.get('embedding_store').delete_document(name)
+        
+        filepath = os.path.join(config.MEDICAL_DOCS_FOLDER, f'{name}.pdf')
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            removed = True
+        
+        if not removed:
+            return jsonify({'status': 'error', 'message': f'Document {name} not found'}), 404
+        return jsonify({'status': 'success', 'document': name}), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def sse_events(events):
+    """
+    Format RAG events as Server-Sent Events, reporting failures in-stream.
+    """
+    try:
+        for event in events:
+            name = event.pop('event')
+            yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+    except Exception as e:
+        app.logger.error(f"Error in chatRAG stream: {str(e)}")
+        app.logger.error(traceback.format_exc())
+        yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+
 @app.route('/chatRAG', methods=['POST'])
 def chatRAG():
     try:
@@ -82,16 +199,48 @@ def chatRAG():
         # Log incoming query
         app.logger.info(f"Processing query: {query}")
         
-        # Generate response
-        response = rag_model.generate_response(query)
+        # Generate response; clients may opt in or out of the semantic cache
+        use_semantic_cache = data.get('semantic_cache')
+        if use_semantic_cache is not None and not isinstance(use_semantic_cache, bool):
+            return jsonify({'error': 'semantic_cache must be a boolean'}), 400
+        
+        # Retrieval may be narrowed to disease partitions and weighted towards exact terms
+        try:
+            search_options = search_options_from(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # With ?stream=1 the answer is sent as Server-Sent Events while it is generated
+        if request.args.get('stream', '').lower() in ('1', 'true'):
+            events = components.get('rag_model').stream_response(
+                query, use_semantic_cache=use_semantic_cache, search_options=search_options
+            )
+            return Response(
+                stream_with_context(sse_events(events)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
+        with collect_timings() as breakdown, collect_usage() as usage, timed('chat_request'):
+            response = components.get('rag_model').generate_response(
+                query, use_semantic_cache=use_semantic_cache, search_options=search_options
+            )
         
         # Log response generation
         app.logger.info("Response generated successfully")
         
-        return jsonify({
+        result = {
             'query': query,
             'response': response
-        }), 200
+        }
+        # Context token counts; absent when the answer came from a cache
+        if usage:
+            result['context'] = usage
+        # With ?timings=1 the response carries a per-stage breakdown in milliseconds
+        if request.args.get('timings', '').lower() in ('1', 'true'):
+            result['timings_ms'] = timings_ms(breakdown)
+        
+        return jsonify(result), 200
     
     except Exception as e:
         # Comprehensive error logging
@@ -104,6 +253,104 @@ def chatRAG():
             'traceback': traceback.format_exc()
         }), 500
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({
+        'status': 'error',
+        'message': f'Request bodies are limited to {config.REQUEST_MAX_BYTES} bytes'
+    }), 413
+
+@app.route('/reports', methods=['POST'])
+def upload_reports():
+    """
+    Screen, extract and read several patient reports uploaded together.
+    
+    Expects multipart form data with the PDFs under ``files`` and an
+    optional ``patient_id`` whose consultation the readings join. Each
+    report is listed as accepted (with the model's reading), irrelevant,
+    or rejected with the reason, e.g. too large or too many pages.
+    """
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'status': 'error', 'message': 'No reports uploaded under "files"'}), 400
+    if len(files) > config.REPORT_MAX_FILES:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {config.REPORT_MAX_FILES} reports can be uploaded at once'
+        }), 413
+    
+    try:
+        with timed('report_upload'):
+            reports = components.get('chatbot_service').read_reports(files, request.form.get('patient_id'))
+        return jsonify({'status': 'success', 'reports': reports}), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/detect', methods=['POST'])
+def detect_objects():
+    """
+    Detect objects in several images uploaded together.
+    
+    Expects multipart form data with the images under ``images``. They are
+    decoded and run through the detector in batches; each is listed with
+    its size and detections, or with the reason it could not be decoded.
+    """
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({'status': 'error', 'message': 'No images uploaded under "images"'}), 400
+    if len(files) > config.DETECTION_MAX_IMAGES:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {config.DETECTION_MAX_IMAGES} images can be uploaded at once'
+        }), 413
+    
+    try:
+        import cv2
+        import numpy as np
+        
+        results = []
+        images = []
+        with timed('detection_decode'):
+            for file in files:
+                image = cv2.imdecode(np.frombuffer(file.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    results.append({'filename': file.filename, 'status': 'rejected', 'reason': 'Not a readable image'})
+                    continue
+                results.append({'filename': file.filename, 'status': 'accepted',
+                                'width': image.shape[1], 'height': image.shape[0]})
+                images.append(image)
+        
+        with timed('detection_request'):
+            detections = components.get('detector').detect(images)
+        accepted = (result for result in results if result['status'] == 'accepted')
+        for result, found in zip(accepted, detections):
+            result['detections'] = [detection._asdict() for detection in found]
+        return jsonify({'status': 'success', 'images': results}), 200
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Report hit ratios of the query embedding, response and chunk embedding caches.
+    """
+    return jsonify(components.get('rag_model').cache_stats()), 200
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Report whether the components needed to serve are loaded; 503 until they are.
+    """
+    is_ready = components.is_ready(config.READY_COMPONENTS)
+    return jsonify({'ready': is_ready, 'components': components.status()}), 200 if is_ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Export per-stage latency histograms in the Prometheus text format.
+    """
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     # More robust server configuration
     app.run(
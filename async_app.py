@@ -0,0 +1,220 @@
+"""
+Asyncio serving path for the RAG chatbot.
+
+Exposes the same ``/initialize`` and ``/chatRAG`` contracts as ``app.py``
+on aiohttp. Embedding and generation round trips are awaited rather than
+holding a thread each, and an admission controller bounds concurrent work
+and answers 503 once its queue is full.
+
+    python async_app.py
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import traceback
+
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.admission import AdmissionController, Overloaded
+from src.config import Config
+from src.document_processor import DocumentProcessor
+from src.embedding_store import EmbeddingStore
+from src.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, collect_timings, collect_usage, timed, timings_ms
+from src.partitions import search_options_from
+from src.rag_model import RAGModel
+
+logger = logging.getLogger(__name__)
+
+CONFIG_KEY = web.AppKey('config', Config)
+DOCUMENT_PROCESSOR_KEY = web.AppKey('document_processor', DocumentProcessor)
+EMBEDDING_STORE_KEY = web.AppKey('embedding_store', EmbeddingStore)
+RAG_MODEL_KEY = web.AppKey('rag_model', RAGModel)
+ADMISSION_KEY = web.AppKey('admission', AdmissionController)
+
+
+async def initialize_chatbot(request: web.Request) -> web.Response:
+    """
+    Initialize the chatbot by processing documents and creating embeddings.
+    """
+    config = request.app[CONFIG_KEY]
+    try:
+        start = time.perf_counter()
+
+        def ingest():
+            extraction_report = []
+            failed_documents = []
+            medical_texts = request.app[DOCUMENT_PROCESSOR_KEY].iter_documents(
+                config.MEDICAL_DOCS_FOLDER, extraction_report, failed_documents
+            )
+            # Documents that failed to extract keep their previous chunks
+            return extraction_report, request.app[EMBEDDING_STORE_KEY].create_embeddings(medical_texts,
+                                                                                          keep=failed_documents)
+
+        # Ingestion is CPU and process-pool bound; keep it off the event loop
+        extraction_report, stats = await asyncio.to_thread(ingest)
+
+        return web.json_response({
+            'status': 'success',
+            'message': 'Chatbot initialized successfully',
+            'processed_documents': stats['updated_documents'] + stats['unchanged_documents'],
+            'extraction': extraction_report,
+            'updated_documents': stats['updated_documents'],
+            'removed_documents': stats['removed_documents'],
+            'chunks': stats['chunks'],
+            'chunks_per_sec': stats['chunks_per_sec'],
+            'cache_hits': stats['cache_hits'],
+            'cache_misses': stats['cache_misses'],
+            'embedding_seconds': stats['embedding_seconds'],
+            'ingest_seconds': round(time.perf_counter() - start, 3)
+        }, status=200)
+    except Exception as e:
+        return web.json_response({'status': 'error', 'message': str(e)}, status=500)
+
+
+async def chat_rag(request: web.Request) -> web.StreamResponse:
+    """
+    Answer a query; ``?stream=1`` sends the answer as Server-Sent Events.
+    """
+    rag_model = request.app[RAG_MODEL_KEY]
+    try:
+        if request.content_type != 'application/json':
+            return web.json_response({
+                'error': 'Invalid content type. Must be application/json',
+                'details': str(request.content_type)
+            }, status=400)
+
+        try:
+            data = await request.json()
+        except json.JSONDecodeError:
+            data = None
+
+        if not data:
+            return web.json_response({'error': 'Empty JSON payload'}, status=400)
+
+        query = data.get('query', '').strip()
+        if not query:
+            return web.json_response({'error': 'Query cannot be empty'}, status=400)
+
+        use_semantic_cache = data.get('semantic_cache')
+        if use_semantic_cache is not None and not isinstance(use_semantic_cache, bool):
+            return web.json_response({'error': 'semantic_cache must be a boolean'}, status=400)
+
+        try:
+            search_options = search_options_from(data)
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+        async with request.app[ADMISSION_KEY].admit():
+            if request.query.get('stream', '').lower() in ('1', 'true'):
+                return await stream_events(request, rag_model.stream_response_async(query, use_semantic_cache, search_options))
+
+            with collect_timings() as breakdown, collect_usage() as usage, timed('chat_request'):
+                response = await rag_model.generate_response_async(query, use_semantic_cache, search_options)
+
+        result = {'query': query, 'response': response}
+        # Context token counts; absent when the answer came from a cache
+        if usage:
+            result['context'] = usage
+        if request.query.get('timings', '').lower() in ('1', 'true'):
+            result['timings_ms'] = timings_ms(breakdown)
+        return web.json_response(result, status=200)
+
+    except Overloaded as e:
+        return web.json_response(
+            {'status': 'error', 'message': str(e)},
+            status=503,
+            headers={'Retry-After': '1'}
+        )
+    except Exception as e:
+        logger.error(f"Error in chatRAG: {str(e)}")
+        logger.error(traceback.format_exc())
+
+        return web.json_response({
+            'status': 'error',
+            'message': str(e),
+            'traceback': traceback.format_exc()
+        }, status=500)
+
+
+async def stream_events(request: web.Request, events) -> web.StreamResponse:
+    """
+    Write RAG events as Server-Sent Events, reporting failures in-stream.
+    """
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    await response.prepare(request)
+    try:
+        async for event in events:
+            name = event.pop('event')
+            await response.write(f"event: {name}\ndata: {json.dumps(event)}\n\n".encode())
+    except (ConnectionResetError, asyncio.CancelledError):
+        raise
+    except Exception as e:
+        logger.error(f"Error in chatRAG stream: {str(e)}")
+        logger.error(traceback.format_exc())
+        await response.write(f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n".encode())
+    await response.write_eof()
+    return response
+
+
+async def cache_stats(request: web.Request) -> web.Response:
+    """
+    Report cache hit ratios and admission counters.
+    """
+    stats = request.app[RAG_MODEL_KEY].cache_stats()
+    stats['admission'] = request.app[ADMISSION_KEY].stats()
+    return web.json_response(stats, status=200)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """
+    Export per-stage latency histograms in the Prometheus text format.
+    """
+    return web.Response(body=REGISTRY.render().encode(), headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
+
+def create_app(config=None, embedding_store=None, rag_model=None, document_processor=None) -> web.Application:
+    """
+    Build the aiohttp application.
+
+    Args:
+        config (Config): Configuration object
+        embedding_store (EmbeddingStore): Optional store, e.g. with a stub backend
+        rag_model (RAGModel): Optional model, e.g. with a fake generator
+        document_processor (DocumentProcessor): Optional document processor
+
+    Returns:
+        web.Application: Application ready to run
+    """
+    config = config or Config()
+    embedding_store = embedding_store or EmbeddingStore(config)
+
+    app = web.Application()
+    app[CONFIG_KEY] = config
+    app[DOCUMENT_PROCESSOR_KEY] = document_processor or DocumentProcessor(config.EXTRACTION_MAX_WORKERS)
+    app[EMBEDDING_STORE_KEY] = embedding_store
+    app[RAG_MODEL_KEY] = rag_model or RAGModel(config, embedding_store)
+    app[ADMISSION_KEY] = AdmissionController(
+        max_concurrency=config.ASYNC_MAX_CONCURRENCY,
+        max_queue=config.ASYNC_MAX_QUEUE,
+        queue_timeout=config.ASYNC_QUEUE_TIMEOUT
+    )
+
+    app.router.add_post('/initialize', initialize_chatbot)
+    app.router.add_post('/chatRAG', chat_rag)
+    app.router.add_get('/cache/stats', cache_stats)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(create_app(), host='0.0.0.0', port=int(os.getenv('ASYNC_PORT', '5001')))
@@ -0,0 +1,6 @@
+"""
+Offline benchmarks for the RAG pipeline.
+
+Run a benchmark as a module from the repository root, e.g.
+``python -m benchmarks.chunking``.
+"""
@@ -0,0 +1,107 @@
+"""
+Recall-versus-latency benchmark for the vector index kinds.
+
+Synthetic clustered vectors stand in for chunk embeddings. Each index kind
+from ``src.index_factory`` is built at every corpus size, then searched at
+several ``nprobe``/``efSearch`` settings. Recall@k is measured against an
+exact flat search.
+
+    python -m benchmarks.ann [--sizes 10000 100000 1000000] [--dim 128] [--json out.json]
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from src.index_factory import INDEX_KINDS, build_index, resolve_kind, search_parameters
+
+SWEEPS = {
+    'flat': [None],
+    'ivf': [1, 4, 16, 64],
+    'pq': [1, 4, 16, 64],
+    'hnsw': [16, 32, 64, 128],
+}
+
+
+def synthetic_vectors(count: int, dimension: int, seed: int = 0, clusters: int = 256) -> np.ndarray:
+    """
+    Gaussian blobs around random centres, roughly like topical embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimension)).astype('float32')
+    labels = rng.integers(0, clusters, count)
+    return centres[labels] + 0.35 * rng.standard_normal((count, dimension)).astype('float32')
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size
+
+
+def run(sizes, dimension: int, queries: int, top_k: int, kinds):
+    results = []
+    for size in sizes:
+        corpus = synthetic_vectors(size, dimension)
+        query_vectors = synthetic_vectors(queries, dimension, seed=1)
+        ids = np.arange(size, dtype='int64')
+
+        exact = faiss.IndexFlatL2(dimension)
+        exact.add(corpus)
+        _, truth = exact.search(query_vectors, top_k)
+
+        for kind in kinds:
+            effective = resolve_kind(kind, size)
+            if effective != kind:
+                print(f"size={size}: {kind} needs more vectors to train, skipped")
+                continue
+
+            start = time.perf_counter()
+            index = build_index(kind, corpus)
+            index.add_with_ids(corpus, ids)
+            build_seconds = time.perf_counter() - start
+
+            for setting in SWEEPS[kind]:
+                params = search_parameters(index, nprobe=setting, ef_search=setting)
+                latencies = []
+                found = []
+                for query in query_vectors:
+                    start = time.perf_counter()
+                    _, row = index.search(query.reshape(1, -1), top_k, params=params)
+                    latencies.append(time.perf_counter() - start)
+                    found.append(row[0])
+
+                latencies_ms = np.array(latencies) * 1000
+                results.append({
+                    'size': size,
+                    'kind': kind,
+                    'setting': setting,
+                    'build_seconds': round(build_seconds, 3),
+                    f'recall_at_{top_k}': round(recall_at_k(np.array(found), truth), 4),
+                    'p50_ms': round(float(np.percentile(latencies_ms, 50)), 4),
+                    'p99_ms': round(float(np.percentile(latencies_ms, 99)), 4),
+                })
+                print(json.dumps(results[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--dim', type=int, default=128, help='Vector dimension (Gemini embeddings are 768)')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--kinds', nargs='+', default=list(INDEX_KINDS), choices=INDEX_KINDS)
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.dim, args.queries, args.top_k, args.kinds)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Load test for the asyncio serving path at increasing client concurrency.
+
+``async_app`` is started in-process over a small synthetic index, with the
+stub embedder and fake generator standing in for Gemini and simulating
+their latency. Each client posts distinct questions to ``/chatRAG`` back to
+back, so the response and semantic caches never answer for the model.
+Throughput, latency percentiles and 503 rejections are reported per level.
+
+    python -m benchmarks.async_load [--clients 1 10 100] [--requests-per-client 20] [--json out.json]
+
+Pass ``--url`` to load an already running server, e.g. ``app.py``, instead.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from async_app import create_app
+from src.config import Config
+from src.embedding_engine import StubEmbeddingBackend
+from src.embedding_store import EmbeddingStore
+from src.generation import FakeGenerationBackend
+from src.rag_model import RAGModel
+
+TOPICS = ['blood pressure', 'insulin', 'kidney function', 'statins', 'HbA1c', 'sodium intake', 'ACE inhibitors']
+
+
+def synthetic_documents(count: int = 20):
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        sentences = [f"Guideline {i} section {j} discusses {topic} targets and monitoring." for j in range(40)]
+        yield f'guideline_{i}', ' '.join(sentences)
+
+
+async def start_server(args):
+    """
+    Serve ``async_app`` on a free local port; returns the runner and base URL.
+    """
+    config = Config()
+    config.EMBEDDING_CACHE_PATH = ''
+    config.FAISS_INDEX_PATH = tempfile.mkdtemp(prefix='async_load_')
+    config.ASYNC_MAX_CONCURRENCY = args.max_concurrency
+    config.ASYNC_MAX_QUEUE = args.max_queue
+
+    embedding_store = EmbeddingStore(config, StubEmbeddingBackend(dimension=256, latency=args.embed_latency))
+    embedding_store.create_embeddings(synthetic_documents())
+    generator = FakeGenerationBackend(
+        answer_words=args.answer_words,
+        first_token_delay=args.first_token_delay,
+        token_delay=args.token_delay
+    )
+    rag_model = RAGModel(config, embedding_store, generator)
+
+    runner = web.AppRunner(create_app(config, embedding_store, rag_model), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+async def run_level(url: str, clients: int, total_requests: int, first_case: int = 0):
+    latencies = []
+    statuses = {}
+    counter = iter(range(first_case, first_case + total_requests))
+
+    async def client(session):
+        for i in counter:
+            payload = {'query': f'What is the {TOPICS[i % len(TOPICS)]} target for case {i}?', 'semantic_cache': False}
+            start = time.perf_counter()
+            async with session.post(f'{url}/chatRAG', json=payload) as response:
+                await response.read()
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+            if response.status == 200:
+                latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        batching_before = await query_batching_stats(session, url)
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        batching_after = await query_batching_stats(session, url)
+
+    latencies_ms = np.array(latencies or [0.0]) * 1000
+    result = {
+        'clients': clients,
+        'requests': total_requests,
+        'ok': statuses.get(200, 0),
+        'rejected_503': statuses.get(503, 0),
+        'errors': sum(count for status, count in statuses.items() if status not in (200, 503)),
+        'seconds': round(elapsed, 3),
+        'requests_per_sec': round(statuses.get(200, 0) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 2),
+    }
+    if batching_before and batching_after:
+        batches = batching_after['batches'] - batching_before['batches']
+        queries = batching_after['queries'] - batching_before['queries']
+        result['query_batches'] = batches
+        result['mean_query_batch_size'] = round(queries / batches, 2) if batches else None
+    return result
+
+
+async def query_batching_stats(session, url: str):
+    """
+    Read the server's query coalescer counters, if it reports them.
+    """
+    async with session.get(f'{url}/cache/stats') as response:
+        if response.status != 200:
+            return None
+        return (await response.json()).get('query_batching')
+
+
+async def run(args):
+    runner = None
+    url = args.url
+    if url is None:
+        runner, url = await start_server(args)
+
+    results = []
+    first_case = 0
+    try:
+        for clients in args.clients:
+            # Questions never repeat across levels, so no level is served from the caches
+            total = clients * args.requests_per_client
+            results.append(await run_level(url, clients, total, first_case))
+            first_case += total
+            print(json.dumps(results[-1]))
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--requests-per-client', type=int, default=20)
+    parser.add_argument('--url', help='Load this server instead of starting one in-process')
+    parser.add_argument('--embed-latency', type=float, default=0.05, help='Simulated embedding seconds')
+    parser.add_argument('--first-token-delay', type=float, default=0.2, help='Simulated seconds to first token')
+    parser.add_argument('--token-delay', type=float, default=0.002, help='Simulated seconds per token')
+    parser.add_argument('--answer-words', type=int, default=50)
+    parser.add_argument('--max-concurrency', type=int, default=Config.ASYNC_MAX_CONCURRENCY)
+    parser.add_argument('--max-queue', type=int, default=Config.ASYNC_MAX_QUEUE)
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
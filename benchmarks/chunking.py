@@ -0,0 +1,103 @@
+"""
+Compare chunking strategies on the bundled guideline PDFs.
+
+For each strategy the documents are chunked, embedded with the local stub
+embedder and searched with a fixed set of questions whose answers contain
+a known phrase. A query is a hit when any of its top-k chunks contains the
+phrase; prompt tokens are what those top-k chunks would add to the prompt.
+
+    python -m benchmarks.chunking [--docs medical_docs] [--top-k 3] [--json out.json]
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from src.chunker import SentenceChunker, WordChunker, count_tokens
+from src.config import Config
+from src.document_processor import DocumentProcessor
+from src.embedding_engine import StubEmbeddingBackend
+
+QUERIES = [
+    ("At what blood pressure should treatment start in adults 60 years and older?", "150 mm hg or higher"),
+    ("What is the target blood pressure for patients younger than 60?", "target systolic pressure in this population"),
+    ("Blood pressure goals for chronic kidney disease or diabetes", "for persons 18 years or older with chronic"),
+    ("Initial antihypertensive medication for black patients", "in the general black population"),
+    ("Can an ACE inhibitor be combined with an ARB?", "do not combine an ace"),
+    ("What if the target blood pressure is not reached within a month?", "second medication should be added"),
+    ("Third drug options such as beta blockers or aldosterone antagonists", "aldosterone antagonists"),
+    ("Which therapy improves kidney outcomes in CKD with hypertension?", "kidney-related"),
+    ("Who developed the hypertension guideline?", "eighth joint national committee"),
+    ("Treatment threshold for patients with hypertension and diabetes", "regardless of age"),
+]
+
+STRATEGIES = {
+    'words-500': WordChunker(500),
+    'words-200': WordChunker(200),
+    'sentence-128/16': SentenceChunker(128, 16, min_tokens=32),
+    'sentence-256/32': SentenceChunker(256, 32),
+    'sentence-512/64': SentenceChunker(512, 64),
+}
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def run(docs_folder: str, top_k: int):
+    documents = DocumentProcessor(1).extract_text_from_pdfs(docs_folder)
+    backend = StubEmbeddingBackend()
+    query_vectors = np.array(backend.embed_batch([query for query, _ in QUERIES]), dtype='float32')
+
+    results = {}
+    for name, chunker in STRATEGIES.items():
+        start = time.perf_counter()
+        chunks = [chunk for text in documents.values() for chunk, _, _ in chunker.split(text)]
+        chunk_seconds = time.perf_counter() - start
+        if not chunks:
+            continue
+
+        index = faiss.IndexFlatL2(backend.dimension)
+        index.add(np.array(backend.embed_batch(chunks), dtype='float32'))
+        _, indices = index.search(query_vectors, min(top_k, len(chunks)))
+
+        hits = 0
+        prompt_tokens = 0
+        for (_, answer), row in zip(QUERIES, indices):
+            retrieved = [chunks[i] for i in row if i != -1]
+            hits += any(answer in normalize(chunk) for chunk in retrieved)
+            prompt_tokens += sum(count_tokens(chunk) for chunk in retrieved)
+
+        results[name] = {
+            'chunks': len(chunks),
+            'mean_chunk_tokens': round(sum(map(count_tokens, chunks)) / len(chunks), 1),
+            'chunk_ms': round(chunk_seconds * 1000, 2),
+            'hit_rate': round(hits / len(QUERIES), 3),
+            'prompt_tokens': prompt_tokens,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', default=Config.MEDICAL_DOCS_FOLDER, help='Folder of guideline PDFs')
+    parser.add_argument('--top-k', type=int, default=3, help='Chunks retrieved per query')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.docs, args.top_k)
+
+    print(f"{'strategy':<18}{'chunks':>8}{'tok/chunk':>11}{'chunk ms':>10}{'hit@' + str(args.top_k):>8}{'prompt tok':>12}")
+    for name, row in results.items():
+        print(f"{name:<18}{row['chunks']:>8}{row['mean_chunk_tokens']:>11}{row['chunk_ms']:>10}"
+              f"{row['hit_rate']:>8}{row['prompt_tokens']:>12}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Stress test of concurrent consultations at increasing worker counts.
+
+Simulated patients chat through ``ConsultationEngine`` with a stub model
+that sleeps for ``--llm-latency`` seconds, like a remote model call, and
+checks the history it is given. Every patient sends several messages at
+once, so turns of one patient contend for its session lock while other
+patients proceed. A history holding another patient's message, or one a
+concurrent turn of the same patient has not finished writing, is counted
+as a violation; a correct engine reports none at every worker count.
+
+    python -m benchmarks.consultation_stress [--workers 1 2 4 8 16] [--patients 32] [--turns 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from src.consultation_engine import ConsultationEngine
+from src.conversation_store import AI, HUMAN, ConversationStore
+
+
+class StubConsultant:
+    """
+    Model stand-in that checks the history of every turn it answers.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.violations = []
+        # patient -> history lengths seen; serialized turns each see a different one
+        self.seen_lengths = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, history, message: str) -> str:
+        patient = message.split(':', 1)[0]
+        problems = [content for _, content in history if not content.startswith(f'{patient}:')]
+        roles = [role for role, _ in history]
+        if roles != [HUMAN, AI] * (len(history) // 2) or len(history) % 2:
+            problems.append(f'interleaved roles {roles}')
+
+        time.sleep(self.latency)
+        with self._lock:
+            self.seen_lengths.setdefault(patient, []).append(len(history))
+            self.violations.extend(problems)
+        return f'{patient}: noted "{message.split(":", 1)[1].strip()}", what else?'
+
+
+def run_level(workers: int, patients: int, turns: int, latency: float):
+    work_dir = tempfile.mkdtemp(prefix='consultation_stress_')
+    conversations = ConversationStore(os.path.join(work_dir, 'conversations.sqlite3'), token_budget=10 ** 6)
+    consultant = StubConsultant(latency)
+    engine = ConsultationEngine(conversations, consultant, max_workers=workers)
+
+    start = time.perf_counter()
+    futures = [
+        engine.submit(f'patient{p}', f'patient{p}: symptom {t}')
+        for p in range(patients)
+        for t in range(turns)
+    ]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+
+    violations = list(consultant.violations)
+    for patient, lengths in consultant.seen_lengths.items():
+        if sorted(lengths) != list(range(0, 2 * turns, 2)):
+            violations.append(f'{patient} turns overlapped: saw history lengths {sorted(lengths)}')
+    for p in range(patients):
+        history = conversations.history(f'patient{p}')
+        if len(history) != 2 * turns or any(not content.startswith(f'patient{p}:') for _, content in history):
+            violations.append(f'patient{p} stored history is wrong')
+    conversations.close()
+
+    return {
+        'workers': workers,
+        'turns': len(futures),
+        'seconds': round(elapsed, 3),
+        'turns_per_sec': round(len(futures) / elapsed, 2),
+        'violations': len(violations),
+        'examples': violations[:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--patients', type=int, default=32)
+    parser.add_argument('--turns', type=int, default=5, help='Messages per patient, all sent at once')
+    parser.add_argument('--llm-latency', type=float, default=0.02, help='Seconds per stub model call')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        results.append(run_level(workers, args.patients, args.turns, args.llm_latency))
+        print(json.dumps(results[-1]))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if any(result['violations'] for result in results):
+        raise SystemExit('Consultation histories were mixed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Prompt context size and answer coverage with and without context assembly.
+
+The bundled guideline PDFs are indexed with the stub embedder, each one
+also under ``--copies`` extra names, as happens when a revised guideline
+is uploaded next to the old one. For every question of
+``benchmarks.chunking`` the context is built two ways:
+
+* ``top-k``: the best ``--top-k`` chunks joined whole, as before context assembly;
+* ``assembled``: ``Config.CONTEXT_CANDIDATES`` chunks passed through
+  ``ContextAssembler`` with the configured budget.
+
+Reported are context tokens per question, the share saved, how many
+contexts still contain the known answer phrase, and the assembly time.
+
+    python -m benchmarks.context_assembly [--docs medical_docs] [--copies 1] [--budget 1500] [--json out.json]
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.chunking import QUERIES, normalize
+from src.chunker import count_tokens
+from src.config import Config
+from src.context_assembler import ContextAssembler
+from src.document_processor import DocumentProcessor
+from src.embedding_engine import StubEmbeddingBackend
+from src.embedding_store import EmbeddingStore
+from src.partitions import ROUTE_ALL, SearchOptions
+
+
+def run(docs_folder: str, copies: int, top_k: int, candidates: int, budget: int, diversity: float):
+    texts = DocumentProcessor(1).extract_text_from_pdfs(docs_folder)
+    documents = {f'{name}#{copy}' if copy else name: text
+                 for name, text in texts.items() for copy in range(copies + 1)}
+
+    work_dir = tempfile.mkdtemp(prefix='bench_context_')
+    try:
+        config = Config()
+        config.EMBEDDING_CACHE_PATH = ''
+        config.FAISS_INDEX_PATH = work_dir
+        config.QUERY_BATCHING_ENABLED = False
+        store = EmbeddingStore(config, StubEmbeddingBackend())
+        stats = store.create_embeddings(documents)
+        assembler = ContextAssembler(token_budget=budget, diversity=diversity,
+                                     duplicate_threshold=config.CONTEXT_DUPLICATE_THRESHOLD)
+
+        # Vector search over every chunk, so duplicates are retrieved as they would be
+        options = SearchOptions(ROUTE_ALL, 0.0)
+        baseline_tokens, baseline_hits = [], 0
+        assembled_tokens, assembled_hits, assembled_chunks, latencies = [], 0, [], []
+        for question, answer in QUERIES:
+            retrieved = store.search_chunks(question, max(top_k, candidates), options=options)
+
+            baseline = [chunk.text for chunk in retrieved[:top_k]]
+            baseline_tokens.append(sum(count_tokens(text) for text in baseline))
+            baseline_hits += answer in normalize(' '.join(baseline))
+
+            start = time.perf_counter()
+            context = assembler.assemble(retrieved[:candidates])
+            latencies.append(time.perf_counter() - start)
+            assembled_tokens.append(context.tokens)
+            assembled_hits += answer in normalize(' '.join(context.texts))
+            assembled_chunks.append(len(context.chunks))
+
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            'documents': len(documents),
+            'chunks': stats['chunks'],
+            'top-k': {
+                'mean_tokens': round(float(np.mean(baseline_tokens)), 1),
+                'max_tokens': int(np.max(baseline_tokens)),
+                'answer_rate': round(baseline_hits / len(QUERIES), 3),
+            },
+            'assembled': {
+                'mean_tokens': round(float(np.mean(assembled_tokens)), 1),
+                'max_tokens': int(np.max(assembled_tokens)),
+                'mean_chunks': round(float(np.mean(assembled_chunks)), 2),
+                'answer_rate': round(assembled_hits / len(QUERIES), 3),
+                'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+                'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+            },
+            'tokens_saved_share': round(1 - sum(assembled_tokens) / sum(baseline_tokens), 3),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', default=Config.MEDICAL_DOCS_FOLDER, help='Folder of guideline PDFs')
+    parser.add_argument('--copies', type=int, default=1, help='Extra copies of each document to index')
+    parser.add_argument('--top-k', type=int, default=5, help='Chunks joined whole without assembly')
+    parser.add_argument('--candidates', type=int, default=Config.CONTEXT_CANDIDATES,
+                        help='Chunks retrieved for assembly')
+    parser.add_argument('--budget', type=int, default=Config.CONTEXT_TOKEN_BUDGET, help='Context token budget')
+    parser.add_argument('--diversity', type=float, default=Config.CONTEXT_DIVERSITY)
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    result = run(args.docs, args.copies, args.top_k, args.candidates, args.budget, args.diversity)
+    print(json.dumps(result))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+CPU detection throughput at several batch sizes, against one image per forward pass.
+
+A tiny two-head YOLOv3-style network with random weights is written in
+Darknet format, so no model download is needed; throughput depends on the
+layer shapes, not on what the weights learned. Synthetic document scans,
+handwriting-like text on paper of several sizes, are run through:
+
+* ``per-image``: one ``blobFromImage`` and forward pass per image, with the
+  detections post-processed row by row in Python, as ``zainsFile.py`` did;
+* ``batch-N``: ``YoloDetector`` with ``max_batch_size=N``, one forward pass
+  per batch and decoding plus NMS as whole-array operations.
+
+Post-processing is also timed alone on the same network outputs.
+
+    python -m benchmarks.detection [--images 64] [--batch-sizes 1 4 8 16] [--input-size 416] [--json out.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from src.detection import YoloDetector, decode_detections
+
+SEED = 1234
+ANCHORS = '10,14, 23,27, 37,58, 81,82, 135,169, 344,319'
+PAGE_SIZES = [(640, 480), (800, 1100), (1240, 1754), (1024, 768)]
+WORDS = 'patient glucose creatinine dose daily insulin pressure kidney heart review follow-up mg/dl'.split()
+
+
+def write_tiny_model(directory: str, input_size: int, classes: int, seed: int = SEED):
+    """
+    Write a small Darknet YOLO model with detection heads at strides 16 and 32.
+
+    Returns:
+        Tuple[str, str, List[str]]: Config path, weights path and class names
+    """
+    head = (classes + 5) * 3
+    # (kind, options, input channels, output channels) in layer order
+    layers = [
+        ('convolutional', 'batch_normalize=1\nfilters=16\nsize=3\nstride=1\npad=1\nactivation=leaky', 3, 16),
+        ('maxpool', 'size=2\nstride=2', None, None),
+        ('convolutional', 'batch_normalize=1\nfilters=32\nsize=3\nstride=1\npad=1\nactivation=leaky', 16, 32),
+        ('maxpool', 'size=2\nstride=2', None, None),
+        ('convolutional', 'batch_normalize=1\nfilters=64\nsize=3\nstride=1\npad=1\nactivation=leaky', 32, 64),
+        ('maxpool', 'size=2\nstride=2', None, None),
+        ('convolutional', 'batch_normalize=1\nfilters=128\nsize=3\nstride=1\npad=1\nactivation=leaky', 64, 128),
+        ('maxpool', 'size=2\nstride=2', None, None),
+        ('convolutional', 'batch_normalize=1\nfilters=128\nsize=3\nstride=1\npad=1\nactivation=leaky', 128, 128),
+        ('maxpool', 'size=2\nstride=2', None, None),
+        ('convolutional', 'batch_normalize=1\nfilters=256\nsize=3\nstride=1\npad=1\nactivation=leaky', 128, 256),
+        ('convolutional', f'size=1\nstride=1\npad=1\nfilters={head}\nactivation=linear', 256, head),
+        ('yolo', f'mask=3,4,5\nanchors={ANCHORS}\nclasses={classes}\nnum=6', None, None),
+        ('route', 'layers=8', None, None),
+        ('convolutional', f'size=1\nstride=1\npad=1\nfilters={head}\nactivation=linear', 128, head),
+        ('yolo', f'mask=0,1,2\nanchors={ANCHORS}\nclasses={classes}\nnum=6', None, None),
+    ]
+
+    config_path = os.path.join(directory, 'tiny.cfg')
+    with open(config_path, 'w') as f:
+        f.write(f'[net]\nbatch=1\nwidth={input_size}\nheight={input_size}\nchannels=3\n')
+        for kind, options, _, _ in layers:
+            f.write(f'\n[{kind}]\n{options}\n')
+
+    rng = np.random.default_rng(seed)
+    # Header: major, minor and revision version, then images seen
+    parts = [np.array([0, 2, 0], dtype='int32'), np.array([0], dtype='int64')]
+    for kind, options, inputs, outputs in layers:
+        if kind != 'convolutional':
+            continue
+        size = 3 if 'size=3' in options else 1
+        if 'batch_normalize' in options:
+            # Biases, scales, rolling means and variances
+            parts += [np.zeros(outputs), np.ones(outputs), np.zeros(outputs), np.ones(outputs)]
+            parts.append(rng.normal(0, np.sqrt(2 / (inputs * size * size)), outputs * inputs * size * size))
+        else:
+            # Objectness starts low, so that only some boxes clear the threshold
+            biases = np.zeros((3, classes + 5))
+            biases[:, 4] = -2.0
+            parts.append(biases.ravel())
+            parts.append(rng.normal(0, 0.1, outputs * inputs * size * size))
+    weights_path = os.path.join(directory, 'tiny.weights')
+    with open(weights_path, 'wb') as f:
+        for part in parts:
+            f.write(part.astype('float32' if part.dtype.kind == 'f' else part.dtype).tobytes())
+
+    return config_path, weights_path, [f'class_{i}' for i in range(classes)]
+
+
+def synthetic_scans(count: int, seed: int = SEED):
+    """
+    Paper-coloured pages of several sizes with lines of slanted, uneven text.
+    """
+    rng = np.random.default_rng(seed)
+    scans = []
+    for i in range(count):
+        width, height = PAGE_SIZES[i % len(PAGE_SIZES)]
+        page = np.full((height, width, 3), 235, dtype=np.uint8)
+        page += rng.integers(0, 20, (height, width, 1), dtype=np.uint8)
+        for y in range(60, height - 40, int(rng.integers(40, 70))):
+            text = ' '.join(rng.choice(WORDS, int(rng.integers(2, 6))))
+            cv2.putText(page, text, (int(rng.integers(20, 80)), y), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+                        float(rng.uniform(0.8, 1.6)), (40, 40, 90), int(rng.integers(1, 3)), cv2.LINE_AA)
+        scans.append(page)
+    return scans
+
+
+def python_postprocess(outputs, width: int, height: int, confidence_threshold: float):
+    """
+    Row-by-row decoding, as before: an argmax per detection and no NMS.
+    """
+    found = []
+    for output in outputs:
+        for detection in output:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > confidence_threshold:
+                centre_x, centre_y = int(detection[0] * width), int(detection[1] * height)
+                w, h = int(detection[2] * width), int(detection[3] * height)
+                found.append((class_id, confidence, (centre_x - w // 2, centre_y - h // 2, w, h)))
+    return found
+
+
+def run_per_image(detector: YoloDetector, scans, confidence_threshold: float):
+    start = time.perf_counter()
+    postprocess = 0.0
+    detections = 0
+    for scan in scans:
+        blob = cv2.dnn.blobFromImage(scan, 1 / 255.0, (detector.input_size, detector.input_size),
+                                     swapRB=True, crop=False)
+        detector.net.setInput(blob)
+        outputs = detector.net.forward(detector.output_names)
+        post_start = time.perf_counter()
+        detections += len(python_postprocess(outputs, scan.shape[1], scan.shape[0], confidence_threshold))
+        postprocess += time.perf_counter() - post_start
+    seconds = time.perf_counter() - start
+    return {
+        'images_per_sec': round(len(scans) / seconds, 2),
+        'postprocess_ms_per_image': round(postprocess / len(scans) * 1000, 3),
+        'detections_per_image': round(detections / len(scans), 2),
+    }
+
+
+def run_batched(detector: YoloDetector, scans, batch_size: int):
+    detector.max_batch_size = batch_size
+    start = time.perf_counter()
+    results = detector.detect(scans)
+    seconds = time.perf_counter() - start
+    return {
+        'images_per_sec': round(len(scans) / seconds, 2),
+        'detections_per_image': round(sum(map(len, results)) / len(scans), 2),
+    }
+
+
+def time_vectorized_postprocess(detector: YoloDetector, scans, batch_size: int) -> float:
+    """
+    Milliseconds per image of decoding and NMS alone, over whole batches.
+    """
+    total = 0.0
+    for start in range(0, len(scans), batch_size):
+        batch = scans[start:start + batch_size]
+        blob = cv2.dnn.blobFromImages(batch, 1 / 255.0, (detector.input_size, detector.input_size),
+                                      swapRB=True, crop=False)
+        detector.net.setInput(blob)
+        outputs = detector.net.forward(detector.output_names)
+        sizes = np.array([(scan.shape[1], scan.shape[0]) for scan in batch], dtype='float64')
+        post_start = time.perf_counter()
+        decode_detections(outputs, sizes, detector.confidence_threshold, detector.nms_threshold)
+        total += time.perf_counter() - post_start
+    return round(total / len(scans) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=64)
+    parser.add_argument('--batch-sizes', type=int, nargs='*', default=[1, 4, 8, 16])
+    parser.add_argument('--input-size', type=int, default=416, help='Network input side, a multiple of 32')
+    parser.add_argument('--classes', type=int, default=3)
+    parser.add_argument('--confidence', type=float, default=0.5)
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='bench_detection_')
+    try:
+        config_path, weights_path, class_names = write_tiny_model(model_dir, args.input_size, args.classes)
+        detector = YoloDetector(config_path, weights_path, class_names, input_size=args.input_size,
+                                confidence_threshold=args.confidence)
+        scans = synthetic_scans(args.images)
+        # Warm up the network's buffers before timing
+        detector.detect(scans[:max(args.batch_sizes)])
+
+        result = {'images': len(scans), 'input_size': args.input_size, 'cpu_threads': cv2.getNumThreads(),
+                  'per-image': run_per_image(detector, scans, args.confidence)}
+        for batch_size in args.batch_sizes:
+            result[f'batch-{batch_size}'] = run_batched(detector, scans, batch_size)
+            result[f'batch-{batch_size}']['postprocess_ms_per_image'] = \
+                time_vectorized_postprocess(detector, scans, batch_size)
+        print(json.dumps(result))
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Latency and recall of partitioned and hybrid retrieval against a full flat search.
+
+A synthetic corpus has one partition per disease in ``Config.DISEASE_KEYWORDS``.
+Each document draws most of its words from its disease's vocabulary and the
+rest from a shared one. Some documents also carry a sentence naming a made-up
+drug that appears nowhere else. The corpus is indexed with the stub embedder
+and searched four ways:
+
+* ``full-vector``: the whole flat index by vector alone, as before partitions existed;
+* ``routed-vector``: the same index filtered to the partitions of the diseases each query names;
+* ``full-hybrid``: the whole index with BM25 fused in at ``--lexical-weight``;
+* ``routed-hybrid``: routed and fused.
+
+Topical questions measure recall@k against ``full-vector``. Questions
+about the made-up drugs measure hit@k, meaning whether the one chunk naming
+the drug is returned. Query embeddings are computed once, so latency covers
+the search alone.
+
+    python -m benchmarks.hybrid_retrieval [--docs-per-disease 30 300] [--queries 200] [--json out.json]
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.config import Config
+from src.embedding_engine import StubEmbeddingBackend
+from src.embedding_store import EmbeddingStore
+from src.partitions import ROUTE_ALL, ROUTE_AUTO, SearchOptions
+
+SEED = 1234
+WORDS_PER_SENTENCE = 12
+SENTENCES_PER_PAGE = 40
+
+VOCABULARY = {
+    'kidney': 'kidney renal nephron filtration creatinine albuminuria dialysis proteinuria glomerular urea '
+              'nephropathy electrolyte potassium phosphate transplant biopsy ultrasound clearance cyst stone',
+    'diabetes': 'diabetes diabetic glycemic insulin glucose hba1c metformin pancreas ketoacidosis neuropathy '
+                'retinopathy hypoglycemia carbohydrate sulfonylurea incretin basal bolus fasting meal pump',
+    'heart': 'heart cardiac hypertension arrhythmia ventricle atrial statin angina infarction stent '
+             'cholesterol murmur valve echocardiogram rhythm pressure systolic diastolic vessel artery',
+}
+SHARED = ('patient treatment dose therapy monitoring risk follow-up guideline recommendation evidence '
+          'clinical adult older younger target reduce increase assess review outcome trial week month '
+          'year daily initial second combination lifestyle diet exercise weight smoking').split()
+MODES = {
+    'full-vector': (ROUTE_ALL, 0.0),
+    'routed-vector': (ROUTE_AUTO, 0.0),
+    'full-hybrid': (ROUTE_ALL, None),
+    'routed-hybrid': (ROUTE_AUTO, None),
+}
+
+
+def drug_name(number: int) -> str:
+    return 'zol' + np.base_repr(number * 7919 + 1013, 36).lower() + 'ine'
+
+
+def corpus(rng, docs_per_disease: int, words_per_doc: int, drug_share: float):
+    """
+    Return ``(documents, drugs)``; ``drugs`` maps each made-up drug to its document and disease.
+    """
+    documents = {}
+    drugs = {}
+    vocabulary = {disease: words.split() for disease, words in VOCABULARY.items()}
+    for disease, words in vocabulary.items():
+        for i in range(docs_per_disease):
+            name = f'{disease}_guideline_{i}'
+            picks = [words[j % len(words)] if shared > 0.3 else SHARED[j % len(SHARED)]
+                     for j, shared in zip(rng.integers(0, 1000, words_per_doc), rng.random(words_per_doc))]
+            sentences = [' '.join(picks[k:k + WORDS_PER_SENTENCE]).capitalize() + '.'
+                         for k in range(0, len(picks), WORDS_PER_SENTENCE)]
+            if rng.random() < drug_share:
+                drug = drug_name(len(drugs))
+                sentences.insert(int(rng.integers(0, len(sentences))),
+                                 f'Start {drug} at {int(rng.integers(5, 500))} mg when {disease} markers rise.')
+                drugs[drug] = (name, disease)
+            pages = [' '.join(sentences[k:k + SENTENCES_PER_PAGE]) for k in range(0, len(sentences), SENTENCES_PER_PAGE)]
+            documents[name] = '\f'.join(pages) + '\f'
+    return documents, drugs
+
+
+def questions(rng, drugs, count: int):
+    vocabulary = {disease: words.split() for disease, words in VOCABULARY.items()}
+    topical = []
+    for i in range(count):
+        disease = list(vocabulary)[i % len(vocabulary)]
+        words = [vocabulary[disease][j] for j in rng.integers(0, len(vocabulary[disease]), 4)]
+        topical.append(f'{disease} ' + ' '.join(words) + f' {SHARED[i % len(SHARED)]}?')
+    exact = [(f'What dose of {drug} is recommended for {disease} patients?', drug)
+             for drug, (_, disease) in list(drugs.items())[:count]]
+    return topical, exact
+
+
+def run(docs_per_disease: int, words_per_doc: int, queries: int, top_k: int, lexical_weight: float):
+    rng = np.random.default_rng(SEED)
+    documents, drugs = corpus(rng, docs_per_disease, words_per_doc, drug_share=0.3)
+    topical, exact = questions(rng, drugs, queries)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_hybrid_')
+    try:
+        config = Config()
+        config.EMBEDDING_CACHE_PATH = ''
+        config.FAISS_INDEX_PATH = work_dir
+        config.QUERY_BATCHING_ENABLED = False
+        config.HYBRID_LEXICAL_WEIGHT = lexical_weight
+        store = EmbeddingStore(config, StubEmbeddingBackend())
+        start = time.perf_counter()
+        stats = store.create_embeddings(documents)
+        result = {
+            'docs_per_disease': docs_per_disease,
+            'chunks': stats['chunks'],
+            'ingest_seconds': round(time.perf_counter() - start, 2),
+            'exact_queries': len(exact),
+        }
+
+        topical_embeddings = store.embed_queries(topical)
+        exact_embeddings = store.embed_queries([question for question, _ in exact])
+        baseline = None
+        for mode, (route, weight) in MODES.items():
+            options = SearchOptions(route, weight)
+            latencies = []
+            found = []
+            for question, embedding in zip(topical, topical_embeddings):
+                start = time.perf_counter()
+                chunks = store.search_by_embedding(embedding, top_k, query=question, options=options)
+                latencies.append(time.perf_counter() - start)
+                found.append({chunk.id for chunk in chunks})
+            if baseline is None:
+                baseline = found
+            hits = sum(
+                any(drug in chunk.text for chunk in
+                    store.search_by_embedding(embedding, top_k, query=question, options=options))
+                for (question, drug), embedding in zip(exact, exact_embeddings)
+            )
+            latencies_ms = np.array(latencies) * 1000
+            result[mode] = {
+                'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+                'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+                f'recall_at_{top_k}_vs_full': round(
+                    sum(len(a & b) for a, b in zip(found, baseline)) / sum(len(b) for b in baseline), 4),
+                f'exact_term_hit_at_{top_k}': round(hits / len(exact), 4) if exact else None,
+            }
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs-per-disease', type=int, nargs='*', default=[30, 300])
+    parser.add_argument('--words-per-doc', type=int, default=1500)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--lexical-weight', type=float, default=0.5, help='BM25 share in the hybrid modes')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    for docs in args.docs_per_disease:
+        result = run(docs, args.words_per_doc, args.queries, args.top_k, args.lexical_weight)
+        results.append(result)
+        print(json.dumps(result))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Cost of the per-stage latency instrumentation.
+
+Measures one ``timed`` block on its own, with and without a per-request
+breakdown being collected. It then runs the in-process ``/chatRAG`` path
+(stub embedder, fake generator, no model latency, every query distinct) with
+instrumentation on and with ``timed`` swapped for a no-op. The difference
+is what ``src.metrics`` adds to a request.
+
+    python -m benchmarks.metrics_overhead [--iterations 200000] [--requests 1000] [--rounds 5] [--json out.json]
+"""
+import argparse
+import contextlib
+import json
+import tempfile
+import time
+
+from src import embedding_store as embedding_store_module
+from src import index_manager as index_manager_module
+from src import rag_model as rag_model_module
+from src.config import Config
+from src.embedding_engine import StubEmbeddingBackend
+from src.embedding_store import EmbeddingStore
+from src.generation import FakeGenerationBackend
+from src.metrics import collect_timings, timed
+from src.rag_model import RAGModel
+
+INSTRUMENTED_MODULES = (embedding_store_module, index_manager_module, rag_model_module)
+
+
+def per_call_ns(iterations: int, collecting: bool) -> float:
+    with collect_timings() if collecting else contextlib.nullcontext():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with timed('benchmark'):
+                pass
+        elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with contextlib.nullcontext():
+            pass
+    baseline = time.perf_counter() - start
+    return (elapsed - baseline) / iterations * 1e9
+
+
+def build_model() -> RAGModel:
+    config = Config()
+    config.EMBEDDING_CACHE_PATH = ''
+    config.FAISS_INDEX_PATH = tempfile.mkdtemp(prefix='metrics_overhead_')
+    config.QUERY_BATCHING_ENABLED = False
+    config.SEMANTIC_CACHE_ENABLED = False
+
+    store = EmbeddingStore(config, StubEmbeddingBackend(dimension=256))
+    store.create_embeddings(
+        (f'guideline_{i}', ' '.join(f"Section {j} of guideline {i} covers targets." for j in range(50)))
+        for i in range(20)
+    )
+    return RAGModel(config, store, FakeGenerationBackend(answer_words=20))
+
+
+def request_seconds(model: RAGModel, requests: int, offset: int) -> float:
+    start = time.perf_counter()
+    for i in range(offset, offset + requests):
+        with collect_timings():
+            model.generate_response(f'What is the target for case {i}?')
+    return (time.perf_counter() - start) / requests
+
+
+def bare_request_seconds(model: RAGModel, requests: int, offset: int) -> float:
+    originals = [module.timed for module in INSTRUMENTED_MODULES]
+    try:
+        for module in INSTRUMENTED_MODULES:
+            module.timed = lambda stage: contextlib.nullcontext()
+        return request_seconds(model, requests, offset)
+    finally:
+        for module, original in zip(INSTRUMENTED_MODULES, originals):
+            module.timed = original
+
+
+def run(iterations: int, requests: int, rounds: int):
+    model = build_model()
+    request_seconds(model, 200, offset=-1000)  # warm up
+
+    # Alternate the configurations and keep the fastest round of each to damp noise
+    instrumented_rounds = []
+    bare_rounds = []
+    for i in range(rounds):
+        instrumented_rounds.append(request_seconds(model, requests, offset=2 * i * requests))
+        bare_rounds.append(bare_request_seconds(model, requests, offset=(2 * i + 1) * requests))
+    instrumented = min(instrumented_rounds)
+    bare = min(bare_rounds)
+
+    return {
+        'timed_ns': round(per_call_ns(iterations, collecting=False), 1),
+        'timed_with_breakdown_ns': round(per_call_ns(iterations, collecting=True), 1),
+        'request_us_instrumented': round(instrumented * 1e6, 1),
+        'request_us_bare': round(bare * 1e6, 1),
+        'overhead_percent': round((instrumented - bare) / bare * 100, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200000, help='timed() calls per micro-benchmark')
+    parser.add_argument('--requests', type=int, default=1000, help='RAG requests per round')
+    parser.add_argument('--rounds', type=int, default=5, help='Rounds per configuration')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.requests, args.rounds)
+    print(json.dumps(results))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
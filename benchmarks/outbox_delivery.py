@@ -0,0 +1,247 @@
+"""
+Caller latency, delivery and durability of the backend outbox.
+
+A local stub stands in for the backend's ``/post_summary``,
+``/post_priority`` and ``/get_disease`` routes, with configurable latency
+and a share of requests answered 503. Three scenarios are run:
+
+* caller latency: a direct ``requests.post`` per message, as the chatbot
+  used to send it, against ``Outbox.enqueue``;
+* delivery: every message reaches the flaky backend despite the failures;
+* restart: messages enqueued while the backend is down and the outbox is
+  closed are delivered once a new outbox opens the same file.
+
+    python -m benchmarks.outbox_delivery [--messages 200] [--backend-latency 0.05] [--failure-rate 0.2] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+from src.outbox import Outbox
+
+
+class StubBackend:
+    """
+    Threaded HTTP server recording the messages it accepts.
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.received = Counter()
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _reply(self, status: int):
+                body = b'{}'
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _accept(self, key: str, success_status: int):
+                time.sleep(backend.latency)
+                with backend._lock:
+                    failed = backend._random.random() < backend.failure_rate
+                    if failed:
+                        backend.failures += 1
+                    else:
+                        backend.received[key] += 1
+                self._reply(503 if failed else success_status)
+
+            def do_POST(self):
+                data = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if self.path == '/post_summary':
+                    self._accept(f"summary:{data['patientID']}", 201)
+                elif self.path == '/post_priority':
+                    self._accept(f"priority:{data['patient']}", 201)
+                else:
+                    self._reply(404)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/get_disease':
+                    self._accept(f"disease:{parse_qs(url.query)['disease'][0]}", 200)
+                else:
+                    self._reply(404)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubBackend':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def messages(count: int, prefix: str):
+    kinds = ['summary', 'priority', 'disease']
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        key = f'{prefix}-{i}'
+        if kind == 'summary':
+            yield kind, {'patientID': key, 'summary': f'Summary for {key}'}, f'summary:{key}'
+        elif kind == 'priority':
+            yield kind, {'patient': key, 'priority': 'Moderate'}, f'priority:{key}'
+        else:
+            yield kind, {'disease': key}, f'disease:{key}'
+
+
+def new_outbox(path: str, url: str) -> Outbox:
+    return Outbox(path, url, initial_backoff=0.05, max_backoff=0.5, max_attempts=20, connect_timeout=0.5)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentiles_ms(latencies):
+    latencies_ms = np.array(latencies) * 1000
+    return round(float(np.percentile(latencies_ms, 50)), 3), round(float(np.percentile(latencies_ms, 99)), 3)
+
+
+def caller_latency(work_dir: str, count: int, latency: float):
+    backend = StubBackend(latency=latency).start()
+    try:
+        direct = []
+        for kind, payload, _ in messages(count, 'direct'):
+            start = time.perf_counter()
+            if kind == 'disease':
+                requests.get(f'{backend.url}/get_disease', params=payload)
+            else:
+                requests.post(f'{backend.url}/post_{kind}', json=payload)
+            direct.append(time.perf_counter() - start)
+
+        outbox = new_outbox(os.path.join(work_dir, 'latency.sqlite3'), backend.url)
+        queued = []
+        for kind, payload, _ in messages(count, 'queued'):
+            start = time.perf_counter()
+            outbox.enqueue(kind, payload)
+            queued.append(time.perf_counter() - start)
+        outbox.flush()
+        outbox.close()
+    finally:
+        backend.stop()
+
+    result = {'messages': count}
+    result['direct_p50_ms'], result['direct_p99_ms'] = percentiles_ms(direct)
+    result['enqueue_p50_ms'], result['enqueue_p99_ms'] = percentiles_ms(queued)
+    return result
+
+
+def delivery(work_dir: str, count: int, latency: float, failure_rate: float):
+    backend = StubBackend(latency=latency, failure_rate=failure_rate).start()
+    outbox = new_outbox(os.path.join(work_dir, 'delivery.sqlite3'), backend.url)
+    expected = set()
+    try:
+        start = time.perf_counter()
+        for kind, payload, key in messages(count, 'flaky'):
+            outbox.enqueue(kind, payload)
+            expected.add(key)
+        drained = outbox.flush(timeout=120)
+        elapsed = time.perf_counter() - start
+        stats = outbox.stats()
+        outbox.close()
+    finally:
+        backend.stop()
+
+    return {
+        'messages': count,
+        'drained': drained,
+        'seconds': round(elapsed, 3),
+        'messages_per_sec': round(count / elapsed, 2),
+        'backend_failures': backend.failures,
+        'retried_attempts': stats['failed_attempts'],
+        'dead': stats['dead'],
+        'lost': len(expected - set(backend.received)),
+    }
+
+
+def restart(work_dir: str, count: int):
+    path = os.path.join(work_dir, 'restart.sqlite3')
+    port = free_port()
+
+    # Backend down: nothing can be delivered before the process "exits"
+    outbox = new_outbox(path, f'http://127.0.0.1:{port}')
+    expected = set()
+    for kind, payload, key in messages(count, 'restart'):
+        outbox.enqueue(kind, payload)
+        expected.add(key)
+    time.sleep(0.2)
+    outbox.close()
+
+    backend = StubBackend(port=port).start()
+    try:
+        outbox = new_outbox(path, backend.url)
+        pending_after_restart = outbox.pending()
+        drained = outbox.flush(timeout=60)
+        outbox.close()
+    finally:
+        backend.stop()
+
+    return {
+        'messages': count,
+        'pending_after_restart': pending_after_restart,
+        'drained': drained,
+        'lost': len(expected - set(backend.received)),
+        'duplicates': sum(n - 1 for n in backend.received.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--backend-latency', type=float, default=0.05, help='Seconds per stub backend request')
+    parser.add_argument('--failure-rate', type=float, default=0.2, help='Share of requests answered 503')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='outbox_delivery_')
+    results = {
+        'caller_latency': caller_latency(work_dir, min(args.messages, 100), args.backend_latency),
+        'delivery': delivery(work_dir, args.messages, args.backend_latency / 10, args.failure_rate),
+        'restart': restart(work_dir, args.messages),
+    }
+    for name, result in results.items():
+        print(name, json.dumps(result))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if results['delivery']['lost'] or results['restart']['lost']:
+        raise SystemExit('Outbox lost messages')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Bulk patient report intake against the single-file ``ask_gemini`` path.
+
+Copies of the bundled ``medical_docs`` PDFs, plus a blank report that is
+not relevant, are run through:
+
+* the previous per-file path: the upload read into memory and copied into
+  a second buffer, pages concatenated with ``+=``, and the whole text
+  lower-cased once per keyword to screen it;
+* ``ReportIntake`` at several worker counts.
+
+Keyword screening and oversize rejection are also timed on their own.
+Screening is timed on extracted pages with the keywords removed, the
+worst case for both, and with a keyword on the first page. Oversize rejection uses a
+report over the page limit, rejected from its page count rather than
+extracted.
+
+    python -m benchmarks.report_intake [--copies 8] [--workers 1 2 4] [--json out.json]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import pypdf
+
+from src.config import Config
+from src.document_processor import DocumentProcessor
+from src.report_intake import RELEVANT_KEYWORDS, ReportIntake, is_relevant
+
+
+def legacy_read(path: str) -> bool:
+    with open(path, 'rb') as f:
+        file_content = f.read()
+    text = ''
+    with io.BytesIO(io.BytesIO(file_content).read()) as file:
+        reader = pypdf.PdfReader(file)
+        for page in reader.pages:
+            text += page.extract_text() or ''
+    for keyword in RELEVANT_KEYWORDS:
+        if keyword.lower() in text.lower():
+            return True
+    return False
+
+
+def legacy_screen(text: str) -> bool:
+    for keyword in RELEVANT_KEYWORDS:
+        if keyword.lower() in text.lower():
+            return True
+    return False
+
+
+def blank_pdf(path: str, pages: int) -> None:
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def uploads(paths):
+    return [(os.path.basename(path), open(path, 'rb')) for path in paths]
+
+
+def best_of(rounds: int, function):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', default=Config.MEDICAL_DOCS_FOLDER)
+    parser.add_argument('--copies', type=int, default=8, help='Copies of each bundled PDF uploaded at once')
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4])
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+    for name in ('pypdf', 'PyPDF2'):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    work_dir = tempfile.mkdtemp(prefix='report_intake_')
+    bundled = sorted(os.path.join(args.docs, name) for name in os.listdir(args.docs) if name.endswith('.pdf'))
+    irrelevant = os.path.join(work_dir, 'blank_report.pdf')
+    blank_pdf(irrelevant, 3)
+    paths = bundled * args.copies + [irrelevant]
+
+    results = {'reports': len(paths), 'megabytes': round(sum(os.path.getsize(p) for p in paths) / 2 ** 20, 2)}
+
+    start = time.perf_counter()
+    legacy_accepted = sum(legacy_read(path) for path in paths)
+    results['legacy_seconds'] = round(time.perf_counter() - start, 3)
+
+    for workers in args.workers:
+        intake = ReportIntake(workers, max_files=len(paths))
+        start = time.perf_counter()
+        records = intake.extract(uploads(paths))
+        seconds = time.perf_counter() - start
+        accepted = sum(record['status'] == 'accepted' for record in records)
+        assert accepted == legacy_accepted, (accepted, legacy_accepted)
+        results[f'bulk_seconds_workers_{workers}'] = round(seconds, 3)
+        results[f'speedup_workers_{workers}'] = round(results['legacy_seconds'] / seconds, 2)
+    results['accepted'] = legacy_accepted
+
+    # Screening alone, keywords absent or only at the very end
+    records = ReportIntake(1).extract(uploads(bundled))
+    accepted_path = next(path for path, record in zip(bundled, records) if record['status'] == 'accepted')
+    text = re.sub('|'.join(RELEVANT_KEYWORDS), '', DocumentProcessor.extract_text_from_pdf(accepted_path),
+                  flags=re.IGNORECASE)
+    pages = [page for page in text.split('\f') if page] * 10
+    joined = ''.join(pages)
+    legacy = best_of(5, lambda: legacy_screen(joined))
+    matcher = best_of(5, lambda: is_relevant(pages))
+    results['screen_pages'] = len(pages)
+    results['screen_legacy_ms'] = round(legacy * 1000, 3)
+    results['screen_matcher_ms'] = round(matcher * 1000, 3)
+    # A keyword on the first page ends the scan there
+    early = best_of(5, lambda: is_relevant(['Blood pressure targets'] + pages))
+    results['screen_matcher_early_ms'] = round(early * 1000, 3)
+
+    # Oversize rejection: page count checked before extraction
+    long_report = max(bundled, key=os.path.getsize)
+    with open(long_report, 'rb') as f:
+        pages = len(pypdf.PdfReader(f).pages)
+    strict = ReportIntake(1, max_pages=pages - 1)
+    start = time.perf_counter()
+    record = strict.extract(uploads([long_report]))[0]
+    results['reject_over_page_limit_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    results['reject_reason'] = record.get('reason')
+    start = time.perf_counter()
+    ReportIntake(1).extract(uploads([long_report]))
+    results['extract_same_report_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    strict = ReportIntake(1, max_bytes=2 ** 20)
+    record = strict.extract(uploads([long_report]))[0]
+    results['reject_over_byte_limit'] = record.get('reason')
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    print(json.dumps(results))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
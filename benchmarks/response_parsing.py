@@ -0,0 +1,229 @@
+"""
+Accuracy and speed of the consultation reply parser on a fuzzed corpus.
+
+Replies are generated from a seed with the formatting drift seen in model
+output: bracketed, ``Label:``, markdown heading and bold headers; colons
+and emphasis in different places; reordered sections; misspelled condition
+names; assorted percentage separators; CRLF line endings; and chatter
+before and after the sections. Each reply carries its ground truth, and a
+share are mid-consultation questions that must not parse as final. The
+sample in ``summary_log.txt`` is included as well.
+
+Reported per parser: field accuracy, and replies/sec and MB/s. The old
+``[SUMMARY](.*?)[PRIORITY]`` regex is measured for comparison. Feeding each
+reply in random chunk sizes must give exactly the one-shot result, and
+random text must never raise.
+
+    python -m benchmarks.response_parsing [--replies 5000] [--seed 7] [--dump corpus.json] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import string
+import time
+
+from src.response_parser import PRIORITY_BANDS, SectionParser, parse_sections
+
+SUMMARY_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'summary_log.txt')
+
+LEGACY_SUMMARY = re.compile(r'\[SUMMARY\](.*?)\[PRIORITY\]', re.DOTALL)
+
+SPELLINGS = {
+    'diabetes': ['diabetes', 'Diabetes', 'diabtes', 'Diabetes Mellitus', 'Type 2 diabetes', 'high blood sugar'],
+    'kidney': ['kidney', 'Kidney', 'kidney disease', 'Chronic Kidney Disease', 'renal impairment', 'CKD'],
+    'hypertension': ['Hypertension', 'hypertenstion', 'hypertension', 'high blood pressure', 'HTN'],
+}
+SUMMARY_LABELS = ['[SUMMARY]', '**[SUMMARY]**', '[SUMMARY]:', 'Summary:', '**Summary:**', '**Summary**:', '## Summary', '**Summary**']
+PRIORITY_LABELS = ['[PRIORITY]', '**[PRIORITY]**', '[PRIORITY]:', 'Priority:', '**Condition Rating:**', '**Severity:**', '### Priority']
+DISEASE_LABELS = ['[DISEASE]', '[DISEASE]:', '**[DISEASE]**:', 'Disease:', 'Diseases:', '**Suspected Conditions:**', '## Disease']
+QUESTIONS = [
+    'Thank you. How long have you had these symptoms?',
+    'Do you have a family history of kidney disease or diabetes?',
+    'What was your last blood pressure reading? Roughly 140/90 or higher?',
+    'Have you noticed swelling in your ankles or feet?',
+]
+FINDINGS = [
+    'reports frequent urination and thirst for three weeks',
+    'has a blood pressure of 150/95 measured at home',
+    'had an eGFR of 52 on the last report',
+    'takes metformin 500 mg twice daily',
+    'has a family history of hypertension',
+    'denies chest pain and shortness of breath',
+]
+
+
+def percent_entry(rng, spelling: str, percent: int) -> str:
+    form = rng.choice(['{n}: {p}%', '{n} - {p}%', '{n} ({p}%)', '- {n}: {p} %', '**{n}**: {p}%', '{n} = {p}%'])
+    return form.format(n=spelling, p=percent)
+
+
+def priority_text(rng, score: int):
+    """
+    Write a rating the way the model does; returns the text and the score it implies.
+    """
+    lower = 0
+    for upper, band in PRIORITY_BANDS:
+        if score <= upper:
+            break
+        lower = upper + 1
+    form = rng.randrange(4)
+    if form == 0:
+        return f'{lower}-{upper}: {band}', (lower + upper) // 2
+    if form == 1:
+        return f'{score}', score
+    if form == 2:
+        return f'{score}/100 ({band})', score
+    return f'**{lower}-{upper} ({band})**', (lower + upper) // 2
+
+
+def make_reply(rng):
+    """
+    Return one reply and its expected parse: ``(text, summary, priority, diseases)``.
+    """
+    if rng.random() < 0.25:
+        return rng.choice(QUESTIONS), None, None, {}
+
+    summary = f"The patient {rng.choice(FINDINGS)} and {rng.choice(FINDINGS)}."
+    score = rng.randrange(0, 101)
+    priority, expected_score = priority_text(rng, score)
+
+    conditions = rng.sample(list(SPELLINGS), rng.randint(1, 3))
+    weights = sorted((rng.randrange(5, 90) for _ in conditions), reverse=True)
+    diseases = {condition: weight / 100 for condition, weight in zip(conditions, weights)}
+    entries = [percent_entry(rng, rng.choice(SPELLINGS[condition]), weight)
+               for condition, weight in zip(conditions, weights)]
+    disease = (', ' if rng.random() < 0.2 else '\n').join(entries)
+
+    sections = [
+        (rng.choice(SUMMARY_LABELS), summary),
+        (rng.choice(PRIORITY_LABELS), priority),
+        (rng.choice(DISEASE_LABELS), disease),
+    ]
+    if rng.random() < 0.3:
+        sections[1:] = sections[:0:-1]
+    parts = []
+    if rng.random() < 0.5:
+        parts.append('Thank you for answering my questions. Here is my assessment.\n')
+    for label, body in sections:
+        inline = not label.startswith('#') and not label.endswith('**') and rng.random() < 0.4
+        parts.append(f'{label} {body}' if inline else f'{label}\n{body}')
+    text = ('\n\n' if rng.random() < 0.5 else '\n').join(parts)
+    if rng.random() < 0.2:
+        text = text.replace('\n', '\r\n')
+    return text, summary, expected_score, diseases
+
+
+def corpus(replies: int, seed: int):
+    rng = random.Random(seed)
+    samples = [make_reply(rng) for _ in range(replies)]
+    if os.path.exists(SUMMARY_LOG):
+        with open(SUMMARY_LOG) as f:
+            text = f.read()
+        samples.append((text, text.split('**Condition Rating:**')[0].replace('Summary:**', '').strip(), 10, {}))
+    return samples
+
+
+def legacy_parse(text: str):
+    match = LEGACY_SUMMARY.search(text)
+    return match.group(1).strip() if match else None
+
+
+def accuracy(samples):
+    correct = {'summary': 0, 'priority': 0, 'diseases': 0, 'final': 0}
+    legacy_summary = 0
+    failures = []
+    for text, summary, priority, diseases in samples:
+        parsed = parse_sections(text)
+        checks = {
+            'summary': parsed.summary == summary,
+            'priority': parsed.priority == priority,
+            'diseases': parsed.diseases == diseases,
+            'final': parsed.is_final == (summary is not None),
+        }
+        for field, ok in checks.items():
+            correct[field] += ok
+        if not all(checks.values()) and len(failures) < 3:
+            failures.append({'text': text, 'parsed': parsed._asdict()})
+        legacy_summary += legacy_parse(text) == summary
+    result = {field: round(count / len(samples), 4) for field, count in correct.items()}
+    result['legacy_summary'] = round(legacy_summary / len(samples), 4)
+    return result, failures
+
+
+def incremental_mismatches(samples, rng) -> int:
+    mismatches = 0
+    for text, *_ in samples:
+        parser = SectionParser()
+        position = 0
+        while position < len(text):
+            step = rng.randint(1, 40)
+            parser.feed(text[position:position + step])
+            position += step
+        mismatches += parser.close() != parse_sections(text)
+    return mismatches
+
+
+def garbage_errors(count: int, rng) -> int:
+    alphabet = string.printable + '[]*#:%-'
+    fragments = ['[SUMMARY]', '[PRIORITY]', '[DISEASE]', 'Summary:', '**', '\n', '%', '100', '-']
+    errors = 0
+    for _ in range(count):
+        text = ''.join(rng.choice(fragments) if rng.random() < 0.2 else rng.choice(alphabet)
+                       for _ in range(rng.randint(0, 400)))
+        try:
+            parse_sections(text)
+        except Exception:
+            errors += 1
+    return errors
+
+
+def throughput(parse, texts, rounds: int = 3):
+    megabytes = sum(len(text) for text in texts) / 2 ** 20
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in texts:
+            parse(text)
+        best = min(best, time.perf_counter() - start)
+    return {'replies_per_sec': round(len(texts) / best, 1), 'mb_per_sec': round(megabytes / best, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--replies', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--garbage', type=int, default=2000, help='Random texts that must parse without error')
+    parser.add_argument('--dump', help='Write the generated corpus to this JSON file')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    samples = corpus(args.replies, args.seed)
+    if args.dump:
+        with open(args.dump, 'w') as f:
+            json.dump([{'text': text, 'summary': summary, 'priority': priority, 'diseases': diseases}
+                       for text, summary, priority, diseases in samples], f, indent=2)
+
+    rng = random.Random(args.seed)
+    texts = [text for text, *_ in samples]
+    scores, failures = accuracy(samples)
+    results = {
+        'replies': len(samples),
+        'accuracy': scores,
+        'incremental_mismatches': incremental_mismatches(samples, rng),
+        'garbage_errors': garbage_errors(args.garbage, rng),
+        'parser': throughput(parse_sections, texts),
+        'legacy_summary_regex': throughput(legacy_parse, texts),
+    }
+    print(json.dumps(results))
+    for failure in failures:
+        print('MISPARSED', json.dumps(failure))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Memory per worker process with the index copied into each worker or memory-mapped.
+
+For each corpus size a flat index of random vectors is published with
+``IndexManager``. Pre-fork workers are then forked from this process, as
+a pre-forking WSGI server would, and each one opens the index, runs
+searches over it and reports, with all workers still alive:
+
+* ``rss``: resident memory, shared pages included;
+* ``pss``: proportional share, each shared page divided among its users;
+* ``private``: pages no other process uses.
+
+All three are measured from just before the index is opened, so they
+cover the index alone. In the mmap mode a new generation is
+then published while the workers keep searching, and the time each one
+takes to switch to it without a restart is reported.
+
+    python -m benchmarks.shared_index [--sizes 10000 50000] [--workers 4] [--json out.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from src.chunk_store import Chunk
+from src.index_factory import build_index
+from src.index_manager import IndexManager
+
+SEED = 1234
+
+
+def memory_mb():
+    """
+    Rss, Pss and private memory of this process, in MB.
+    """
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'private': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def publish(index_dir: str, count: int, dimension: int, generation_seed: int) -> None:
+    rng = np.random.default_rng(generation_seed)
+    vectors = rng.random((count, dimension), dtype='float32')
+    index = build_index('flat', vectors)
+    index.add_with_ids(vectors, np.arange(count, dtype='int64'))
+    chunks = (Chunk(i, f'Synthetic chunk {i}', 'synthetic', 0, 0, None) for i in range(count))
+    IndexManager(index_dir).publish(index, {'documents': {}, 'next_id': count, 'disease_mapping': {}}, chunks)
+
+
+def worker(index_dir, mmap, dimension, queries, check_interval, barrier, switched_barrier, results):
+    before = memory_mb()
+    start = time.perf_counter()
+    manager = IndexManager(index_dir, check_interval=check_interval, mmap=mmap)
+    rng = np.random.default_rng(os.getpid())
+    with manager.snapshot() as (index, _, chunks):
+        load_seconds = time.perf_counter() - start
+        for _ in range(queries):
+            _, ids = index.search(rng.random((1, dimension), dtype='float32'), 5)
+            chunks.get_many(i for i in ids[0] if i != -1)
+
+    barrier.wait()
+    after = memory_mb()
+    result = {key: after[key] - before[key] for key in after}
+    result['load_seconds'] = load_seconds
+    barrier.wait()
+
+    if switched_barrier is not None:
+        # Keep searching until the generation published by the parent is picked up
+        generation = manager.generation
+        switched_barrier.wait()
+        while manager.generation == generation:
+            with manager.snapshot() as (index, _, _):
+                index.search(rng.random((1, dimension), dtype='float32'), 5)
+        result['switched_at'] = time.time()
+        result['generation'] = manager.generation
+    results.put(result)
+
+
+def run(index_dir, mmap, workers, dimension, queries, check_interval, count):
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers)
+    switched_barrier = context.Barrier(workers + 1) if mmap else None
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(index_dir, mmap, dimension, queries, check_interval,
+                                             barrier, switched_barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    published_at = None
+    if switched_barrier is not None:
+        switched_barrier.wait()
+        publish(index_dir, count, dimension, SEED + 1)
+        published_at = time.time()
+
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {
+        f'{key}_mb_per_worker': round(statistics.mean(report[key] for report in reports), 2)
+        for key in ('rss', 'pss', 'private')
+    }
+    summary['pss_mb_total'] = round(sum(report['pss'] for report in reports), 2)
+    summary['load_seconds'] = round(statistics.median(report['load_seconds'] for report in reports), 4)
+    if published_at is not None:
+        summary['switch_seconds_max'] = round(max(report['switched_at'] for report in reports) - published_at, 3)
+        summary['switched_workers'] = sum(report['generation'] is not None for report in reports)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 50000], help='Vectors per index')
+    parser.add_argument('--dimension', type=int, default=768)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--queries', type=int, default=20, help='Searches per worker before measuring')
+    parser.add_argument('--check-interval', type=float, default=0.1,
+                        help='Seconds between worker checks for a new generation')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    results = []
+    for count in args.sizes:
+        index_dir = tempfile.mkdtemp(prefix='shared_index_')
+        try:
+            publish(index_dir, count, args.dimension, SEED)
+            index_mb = os.path.getsize(os.path.join(
+                index_dir, IndexManager.GENERATIONS_DIRNAME, f'{1:08d}', IndexManager.INDEX_FILENAME)) / 2 ** 20
+            result = {'vectors': count, 'workers': args.workers, 'index_mb': round(index_mb, 2)}
+            for mode, mmap in (('copy', False), ('mmap', True)):
+                for key, value in run(index_dir, mmap, args.workers, args.dimension, args.queries,
+                                      args.check_interval, count).items():
+                    result[f'{mode}_{key}'] = value
+            results.append(result)
+            print(json.dumps(result))
+        finally:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold-start cost of the Flask app: import time, first request and time to ready.
+
+Each measurement runs in a fresh interpreter, repeated ``--runs`` times,
+and the median is reported:
+
+* ``import app`` with prewarming disabled, which is all a worker pays
+  before it can accept connections;
+* the first request after that import, answered by ``/ready``;
+* with prewarming on, the time from interpreter start until ``/ready``
+  returns 200;
+* building each registered component on its own, on first use.
+
+The modules ``app.py`` used to import eagerly are also timed one by one,
+where they are installed, as the cost a worker no longer pays up front.
+
+    python -m benchmarks.startup [--runs 5] [--budget 0.5] [--json out.json]
+
+With ``--budget`` the command exits with status 1 when the median import
+time, in seconds, exceeds it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported at module level by app.py before components were loaded lazily
+EAGER_IMPORTS = ('google.generativeai', 'ultralytics', 'pymongo', 'bson', 'PIL', 'flask_cors', 'chatbot_service')
+
+IMPORT_PROBE = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+start = time.perf_counter()
+response = app.app.test_client().get('/ready')
+print(json.dumps({'import': imported, 'first_request': time.perf_counter() - start,
+                  'status': response.status_code}))
+'''
+
+READY_PROBE = '''
+import json, time
+start = time.perf_counter()
+import app
+client = app.app.test_client()
+while client.get('/ready').status_code != 200:
+    if time.perf_counter() - start > %(timeout)s:
+        raise SystemExit(json.dumps({'ready': None, 'status': app.components.status()}))
+    time.sleep(0.005)
+print(json.dumps({'ready': time.perf_counter() - start}))
+'''
+
+COMPONENT_PROBE = '''
+import json, time
+import app
+start = time.perf_counter()
+app.components.get(%(name)r)
+print(json.dumps({'seconds': time.perf_counter() - start}))
+'''
+
+MODULE_PROBE = '''
+import json, time
+start = time.perf_counter()
+import %(name)s
+print(json.dumps({'seconds': time.perf_counter() - start}))
+'''
+
+
+def probe(code: str, prewarm: str = ''):
+    env = dict(os.environ, PREWARM_COMPONENTS=prewarm, PYTHONWARNINGS='ignore')
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def median_of(runs: int, code: str, key: str, prewarm: str = ''):
+    values = [result[key] for result in (probe(code, prewarm) for _ in range(runs)) if result is not None]
+    return round(statistics.median(values), 4) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--ready-timeout', type=float, default=120.0)
+    parser.add_argument('--budget', type=float, help='Most seconds the median app import may take')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    args = parser.parse_args()
+
+    from src.config import Config
+    prewarm = ','.join(Config.PREWARM_COMPONENTS)
+
+    results = {
+        'import_app_seconds': median_of(args.runs, IMPORT_PROBE, 'import'),
+        'first_request_seconds': median_of(args.runs, IMPORT_PROBE, 'first_request'),
+        'time_to_ready_seconds': median_of(args.runs, READY_PROBE % {'timeout': args.ready_timeout}, 'ready', prewarm),
+        'components_seconds': {},
+        'eager_imports_seconds': {},
+    }
+    for name in ('document_processor', 'embedding_store', 'rag_model', 'chatbot_service'):
+        results['components_seconds'][name] = median_of(args.runs, COMPONENT_PROBE % {'name': name}, 'seconds')
+    for name in EAGER_IMPORTS:
+        # None when the module is not installed here
+        results['eager_imports_seconds'][name] = median_of(args.runs, MODULE_PROBE % {'name': name}, 'seconds')
+
+    print(json.dumps(results))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget is not None:
+        if results['import_app_seconds'] is None:
+            print('REGRESSION: app failed to import')
+            sys.exit(1)
+        if results['import_app_seconds'] > args.budget:
+            print(f"REGRESSION: app import took {results['import_app_seconds']}s, budget {args.budget}s")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
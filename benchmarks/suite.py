@@ -0,0 +1,313 @@
+"""
+Reproducible offline benchmark suite for ingestion and retrieval.
+
+Runs the bundled ``medical_docs`` PDFs and synthetically scaled corpora
+through ``DocumentProcessor``, ``EmbeddingStore`` and ``RAGModel``. The
+stub embedder and fake generator stand in for Gemini, so the results
+depend only on this code and the machine. Each corpus runs in a fresh
+interpreter so that its peak RSS is its own.
+
+Scaled corpora replicate the bundled PDFs for extraction, up to
+``--extraction-copies`` copies. For ingestion and search they use seeded
+reshuffles of the bundled sentences, so every document is distinct.
+
+    python -m benchmarks.suite [--scales 100 1000 10000] [--repeat 3] [--json out.json] [--baseline benchmarks/baseline.json]
+
+Sub-millisecond latencies vary by a third between identical runs on a
+busy machine, and their p99 by up to 0.4 ms; the noise only ever adds
+time, so each corpus runs ``--repeat`` times and every metric reports
+its best run. Corpora that regress against ``--baseline`` are run
+``--repeat`` more times before the regression is reported.
+
+With ``--baseline`` every metric is compared against a stored run. The
+command exits with status 1 when a metric regresses by more than
+``--tolerance`` (``--tail-tolerance`` for p99 latencies, the second
+slowest of 200 queries) and by more than its unit's ``NOISE_FLOOR``.
+Rates are floored by the time they imply for the corpus's workload: six
+bundled chunks embedded in 2 ms or 3 ms are 3000 or 2000 chunks/s.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.chunking import QUERIES
+from src.chunker import SENTENCE_END
+from src.config import Config
+from src.document_processor import DocumentProcessor
+from src.embedding_engine import StubEmbeddingBackend
+from src.embedding_store import EmbeddingStore
+from src.generation import FakeGenerationBackend
+from src.rag_model import RAGModel
+
+SEED = 1234
+SENTENCES_PER_PAGE = 40
+
+# Metric name suffixes whose larger values are better; all other metrics are costs
+HIGHER_IS_BETTER = ('_per_sec',)
+# Counts describe the workload rather than performance and are not compared
+NOT_COMPARED = ('corpus', 'scale', 'documents', 'pages', 'chunks', 'queries')
+# Smallest change per unit suffix that counts as a regression; below it, timer and
+# allocator noise would flag metrics with tiny baselines, such as the bundled corpus
+NOISE_FLOOR = {'_seconds': 0.01, '_ms': 0.5, '_mb': 2.0}
+
+
+def bundled_texts(docs_folder: str, workers: int):
+    return [(name, text) for name, text in DocumentProcessor(workers).iter_documents(docs_folder) if text.strip('\f')]
+
+
+def synthetic_corpus(texts, scale: int):
+    """
+    Reshuffle the bundled sentences into ``scale`` times as many documents.
+    """
+    rng = np.random.default_rng(SEED)
+    sentences = [
+        sentence
+        for _, text in texts
+        for line in text.replace('\f', '\n').split('\n')
+        for sentence in SENTENCE_END.split(' '.join(line.split()))
+        if sentence
+    ]
+    lengths = [len(SENTENCE_END.split(' '.join(text.split()))) for _, text in texts]
+
+    for copy in range(scale):
+        for (name, _), length in zip(texts, lengths):
+            picks = rng.integers(0, len(sentences), length)
+            pages = [
+                ' '.join(sentences[i] for i in picks[start:start + SENTENCES_PER_PAGE])
+                for start in range(0, length, SENTENCES_PER_PAGE)
+            ]
+            yield f'{name}_{copy}', '\f'.join(pages) + '\f'
+
+
+def percentiles_ms(latencies):
+    latencies_ms = np.array(latencies) * 1000
+    return round(float(np.percentile(latencies_ms, 50)), 3), round(float(np.percentile(latencies_ms, 99)), 3)
+
+
+def rss_peak_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10, 2)
+
+
+def run_scenario(docs_folder: str, scale: int, queries: int, workers: int, index_kind: str, extraction_copies: int):
+    """
+    Benchmark one corpus; ``scale`` 0 is the bundled PDFs as they are.
+    """
+    result = {'corpus': 'bundled' if scale == 0 else f'scaled-x{scale}', 'scale': scale}
+    imported_rss_mb = rss_peak_mb()
+    work_dir = tempfile.mkdtemp(prefix='bench_suite_')
+    try:
+        # Extraction: the bundled PDFs, replicated for scaled corpora
+        pdf_dir = os.path.join(work_dir, 'pdfs')
+        os.makedirs(pdf_dir)
+        pdfs = sorted(name for name in os.listdir(docs_folder) if name.endswith('.pdf'))
+        for copy in range(min(max(scale, 1), extraction_copies)):
+            for name in pdfs:
+                shutil.copy(os.path.join(docs_folder, name), os.path.join(pdf_dir, f'{copy}_{name}'))
+
+        report = []
+        start = time.perf_counter()
+        for _ in DocumentProcessor(workers).iter_pages(pdf_dir, report):
+            pass
+        extraction_seconds = time.perf_counter() - start
+        pages = sum(record['pages'] for record in report)
+        result.update({
+            'pages': pages,
+            'extraction_seconds': round(extraction_seconds, 3),
+            'extraction_pages_per_sec': round(pages / extraction_seconds, 2),
+        })
+
+        # Ingestion: chunk, embed and index
+        texts = bundled_texts(docs_folder, workers)
+        documents = texts if scale == 0 else list(synthetic_corpus(texts, scale))
+
+        config = Config()
+        config.EMBEDDING_CACHE_PATH = ''
+        config.FAISS_INDEX_PATH = os.path.join(work_dir, 'index')
+        config.INDEX_KIND = index_kind
+        config.QUERY_BATCHING_ENABLED = False
+        config.SEMANTIC_CACHE_ENABLED = False
+
+        store = EmbeddingStore(config, StubEmbeddingBackend())
+        start = time.perf_counter()
+        stats = store.create_embeddings(documents)
+        ingest_seconds = time.perf_counter() - start
+        result.update({
+            'documents': len(documents),
+            'chunks': stats['chunks'],
+            'ingest_seconds': round(ingest_seconds, 3),
+            'embed_chunks_per_sec': stats['chunks_per_sec'],
+            'index_build_seconds': stats['index_seconds'],
+        })
+
+        # Retrieval alone, then the whole RAG path with an instant generator
+        questions = [f'{QUERIES[i % len(QUERIES)][0]} (case {i})' for i in range(queries)]
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            store.search_chunks(question)
+            latencies.append(time.perf_counter() - start)
+        result['search_p50_ms'], result['search_p99_ms'] = percentiles_ms(latencies)
+
+        rag_model = RAGModel(config, store, FakeGenerationBackend(answer_words=50))
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            rag_model.generate_response(f'Please answer: {question}')
+            latencies.append(time.perf_counter() - start)
+        result['rag_p50_ms'], result['rag_p99_ms'] = percentiles_ms(latencies)
+        result['queries'] = queries
+
+        # Peak resident memory of this process, and its growth over the imports alone
+        result['rss_peak_mb'] = rss_peak_mb()
+        result['rss_growth_mb'] = round(result['rss_peak_mb'] - imported_rss_mb, 2)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def best_result(runs):
+    """
+    Combine repeated runs of one corpus, each metric taking its best value.
+    """
+    result = dict(runs[0])
+    for metric, value in result.items():
+        if metric not in NOT_COMPARED and isinstance(value, (int, float)):
+            best = max if metric.endswith(HIGHER_IS_BETTER) else min
+            result[metric] = best(run[metric] for run in runs)
+    return result
+
+
+def noticeable(metric: str, value: float, old: float, result) -> bool:
+    """
+    Whether a change exceeds the metric's noise floor.
+
+    A rate such as ``embed_chunks_per_sec`` is converted to the seconds
+    its workload, here ``result['chunks']``, took at either rate.
+    """
+    if metric.endswith(HIGHER_IS_BETTER):
+        work = result.get(metric[:-len('_per_sec')].rsplit('_', 1)[-1])
+        if not work or not value:
+            return True
+        return abs(work / value - work / old) > NOISE_FLOOR['_seconds']
+    floor = next((floor for suffix, floor in NOISE_FLOOR.items() if metric.endswith(suffix)), 0)
+    return abs(value - old) > floor
+
+
+def compare(results, baseline, tolerance: float, tail_tolerance: float):
+    """
+    Print each metric next to its baseline value and return the regressions.
+    """
+    previous = {result['corpus']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result['corpus'])
+        if old is None:
+            print(f"{result['corpus']}: not in baseline")
+            continue
+        for metric, value in result.items():
+            if metric in NOT_COMPARED or not isinstance(value, (int, float)) or not old.get(metric):
+                continue
+            change = (value - old[metric]) / old[metric]
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            allowed = tail_tolerance if '_p99_' in metric else tolerance
+            flag = 'REGRESSION' if worse > allowed and noticeable(metric, value, old[metric], result) else ''
+            print(f"{result['corpus']:>14} {metric:<26} {old[metric]:>12} -> {value:>12} ({change:+.1%}) {flag}")
+            if flag:
+                regressions.append((result['corpus'], metric, old[metric], value))
+    return regressions
+
+
+def run_corpus(args, scale: int):
+    """
+    Run one corpus ``--repeat`` times, each in a fresh interpreter.
+    """
+    runs = []
+    for _ in range(max(args.repeat, 1)):
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.suite', '--scenario', str(scale), '--docs', args.docs,
+             '--queries', str(args.queries), '--extraction-workers', str(args.extraction_workers),
+             '--index-kind', args.index_kind, '--extraction-copies', str(args.extraction_copies)],
+            check=True, stdout=subprocess.PIPE, text=True
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', default=Config.MEDICAL_DOCS_FOLDER)
+    parser.add_argument('--scales', type=int, nargs='*', default=[100, 1000, 10000],
+                        help='Synthetic corpus sizes as multiples of the bundled corpus')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--extraction-workers', type=int, default=2)
+    parser.add_argument('--extraction-copies', type=int, default=5, help='Most PDF copies extracted per corpus')
+    parser.add_argument('--index-kind', default='flat')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per corpus; each metric reports the best')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results stored by an earlier --json run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression per metric')
+    parser.add_argument('--tail-tolerance', type=float, default=0.5, help='Allowed relative regression of p99 latencies')
+    parser.add_argument('--scenario', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario is not None:
+        # Child process: run one corpus and report it on stdout
+        result = run_scenario(args.docs, args.scenario, args.queries, args.extraction_workers,
+                              args.index_kind, args.extraction_copies)
+        print(json.dumps(result))
+        return
+
+    runs = {}
+    for scale in [0] + args.scales:
+        runs[scale] = run_corpus(args, scale)
+        print(json.dumps(best_result(runs[scale])))
+    results = [best_result(corpus_runs) for corpus_runs in runs.values()]
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'faiss': faiss.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'queries': args.queries,
+            'extraction_workers': args.extraction_workers,
+            'extraction_copies': args.extraction_copies,
+            'index_kind': args.index_kind,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.tail_tolerance)
+        if regressions:
+            # Noise only adds time, so a real regression survives another round of runs
+            flagged = {corpus for corpus, *_ in regressions}
+            print(f"Re-running {', '.join(sorted(flagged))} to confirm")
+            for scale, corpus_runs in runs.items():
+                if corpus_runs[0]['corpus'] in flagged:
+                    corpus_runs.extend(run_corpus(args, scale))
+            results = [best_result(corpus_runs) for corpus_runs in runs.values()]
+            regressions = compare(results, baseline, args.tolerance, args.tail_tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond tolerance")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,6 @@
 from flask import Flask, request, jsonify, session
 from dotenv import load_dotenv, find_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain_community.chat_message_histories import FileChatMessageHistory
-from langchain.chains import LLMChain
 from langchain.schema.messages import HumanMessage, AIMessage
 from langchain.prompts import (
     ChatPromptTemplate,
@@ -15,27 +12,36 @@ import base64
 from io import BytesIO
 import os
 import pypdf
-import re
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+from src.config import Config
+from src.consultation_engine import ConsultationEngine
+from src.conversation_store import AI, HUMAN, ConversationStore
+from src.metrics import timed
+from src.outbox import Outbox
+from src.report_intake import RELEVANT_CONTENT, RELEVANT_KEYWORDS, KeywordMatcher, ReportIntake, is_relevant
+from src.response_parser import parse_sections
+
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
-server = "http://10.135.9.132:8082"
-
 # Load environment variables
 load_dotenv(find_dotenv(), override=True)
 
 # Initialize the LLM
 llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash")
-history = FileChatMessageHistory('chat_history.json')
 
-memory = ConversationBufferMemory(
-    memory_key='chat_history',
-    chat_memory=history,
-    return_messages=True
+config = Config()
+
+server = config.BACKEND_SERVER
+
+# Per-patient consultation history, trimmed to a token budget on every turn
+conversations = ConversationStore(
+    config.CONVERSATION_DB_PATH,
+    token_budget=config.CONVERSATION_TOKEN_BUDGET,
+    max_sessions=config.CONVERSATION_MAX_SESSIONS
 )
 
 prompt_template = ChatPromptTemplate(
@@ -76,11 +82,23 @@ prompt_template = ChatPromptTemplate(
     ]
 )
 
-chain = LLMChain(
-    llm=llm,
-    prompt=prompt_template,
-    memory=memory,
-    verbose=True
+def to_chat_history(history):
+    return [HumanMessage(content=content) if role == HUMAN else AIMessage(content=content) for role, content in history]
+
+def consultation_reply(history, user_message):
+    messages = prompt_template.format_messages(chat_history=to_chat_history(history), input=user_message)
+    with timed('consultation_generation'):
+        return llm.invoke(messages).content
+
+def has_summary(response_text):
+    return parse_sections(response_text).is_final
+
+# Patients consult in parallel; each patient's turns run one at a time against their own history
+consultations = ConsultationEngine(
+    conversations,
+    consultation_reply,
+    max_workers=config.CONSULTATION_WORKERS,
+    is_final=has_summary
 )
 
 def process_image(image_file, question):
@@ -99,183 +117,128 @@ def process_image(image_file, question):
     return message_content
 
 def process_pdf(pdf_file):
-    text = ""
-    with BytesIO(pdf_file.read()) as file:
-        reader = pypdf.PdfReader(file)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+    # Parsed straight from the stream; page texts are joined once
+    reader = pypdf.PdfReader(pdf_file)
+    if len(reader.pages) > config.REPORT_MAX_PAGES:
+        raise ValueError(f"PDF has more than {config.REPORT_MAX_PAGES} pages.")
+    return "".join(page.extract_text() or "" for page in reader.pages)
 
-def is_relevant_content(content, keywords):
-    for keyword in keywords:
-        if keyword.lower() in content.lower():
-            return True
-    return False
+def is_relevant_content(content, keywords=RELEVANT_KEYWORDS):
+    matcher = RELEVANT_CONTENT if keywords is RELEVANT_KEYWORDS else KeywordMatcher(keywords)
+    return is_relevant([content], matcher)
 
-def ask_gemini(file_content):
-    relevant_keywords = ["diabetes", "kidney", "heart",'blood pressure', "sugar"]
+def read_report(pdf_text):
+    message = HumanMessage(content=[{'type': 'text', 'text': pdf_text}])
+    return llm.invoke([message]).content
 
+def ask_gemini(file_content, patient_id=None):
     file_ext = request.files.get('file').filename.lower().split('.')[-1]
 
     if file_ext in ['jpeg', 'jpg', 'png']:
         raise ValueError("Image content is not supported for now . Upload pdf")
     elif file_ext == 'pdf':
+        if len(file_content) > config.REPORT_MAX_BYTES:
+            raise ValueError(f"PDF is larger than {config.REPORT_MAX_BYTES} bytes.")
         pdf_text = process_pdf(BytesIO(file_content))
-        if not is_relevant_content(pdf_text, relevant_keywords):
+        if not is_relevant_content(pdf_text):
             raise ValueError("PDF content is not related to Bot expertise.")
-        message_content = [{'type': 'text', 'text': pdf_text}]
     else:
         raise ValueError("Unsupported file format. Only JPEG, JPG, PNG, and PDF are supported.")
     
-    message = HumanMessage(content=message_content)
-    memory.chat_memory.add_user_message(message)
-    response = llm.invoke([message])
-    memory.chat_memory.add_ai_message(AIMessage(content=response.content))
-    return response.content
-
-# Function to extract [SUMMARY] section
-import requests
+    reading = read_report(pdf_text)
+
+    # The report and its reading become part of the patient's consultation
+    if patient_id is not None:
+        consultations.record(patient_id, [(HUMAN, pdf_text), (AI, reading)])
+    return reading
+
+# Several reports are screened and extracted in parallel, then read by the model concurrently
+report_intake = ReportIntake(
+    config.REPORT_EXTRACTION_WORKERS,
+    max_bytes=config.REPORT_MAX_BYTES,
+    max_pages=config.REPORT_MAX_PAGES,
+    max_files=config.REPORT_MAX_FILES
+)
+report_readers = ThreadPoolExecutor(config.CONSULTATION_WORKERS, thread_name_prefix='report-reader')
+
+def read_reports(files, patient_id=None):
+    reports = report_intake.extract((file.filename, file.stream) for file in files)
+    accepted = [report for report in reports if report['status'] == 'accepted']
+    readings = list(report_readers.map(read_report, [report['text'] for report in accepted]))
+
+    # Recorded in upload order once all are read, so the history reads like the uploads
+    for report, reading in zip(accepted, readings):
+        if patient_id is not None:
+            consultations.record(patient_id, [(HUMAN, report['text']), (AI, reading)])
+        report['response'] = reading
+        del report['text']
+    return reports
+
+# Backend notifications are persisted and delivered in the background, so a
+# slow or unreachable backend never delays the reply and nothing is dropped
+outbox = Outbox(
+    config.OUTBOX_PATH,
+    server,
+    batch_size=config.OUTBOX_BATCH_SIZE,
+    connect_timeout=config.OUTBOX_CONNECT_TIMEOUT,
+    read_timeout=config.OUTBOX_READ_TIMEOUT,
+    max_attempts=config.OUTBOX_MAX_ATTEMPTS
+)
+outbox.start()
 
 # Function to post the summary to the Flask backend
 def post_summary_to_backend(patient_id, summary):
-    try:
-        # URL of your Flask backend route
-        print("Posting to backend:", patient_id, summary)
-        url = f"{server}/post_summary"
-        data = {
-            "patientID": patient_id,  # Ensure this matches the server-side key
-            "summary": summary,
-        }
-
-        # Send the POST request to the Flask backend
-        response = requests.post(url, json=data)
-
-        # Check if the request was successful
-        if response.status_code == 201:
-            print("Summary saved successfully.")
-        else:
-            # Attempt to parse JSON response
-            try:
-                print(f"Failed to save summary: {response.json()}")
-            except ValueError:
-                # In case the response is not JSON
-                print(f"Failed to save summary: {response.text}")
-
-    except Exception as e:
-        print(f"Error posting summary to backend: {e}")
+    print("Posting to backend:", patient_id, summary)
+    outbox.enqueue('summary', {
+        "patientID": patient_id,  # Ensure this matches the server-side key
+        "summary": summary,
+    })
 
 def post_priority_to_backend(patient_id, priority):
-    try:
-        # URL of your Flask backend route
-        print("Posting to backend:", patient_id, priority)
-        url = f"{server}/post_priority"
-        data = {
-            "patient": patient_id,  # Ensure this matches the server-side key
-            "priority":priority,
-        }
-
-        # Send the POST request to the Flask backend
-        response = requests.post(url, json=data)
-
-        # Check if the request was successful
-        if response.status_code == 201:
-            print("priority saved successfully.")
-        else:
-            # Attempt to parse JSON response
-            try:
-                print(f"Failed to save priority: {response.json()}")
-            except ValueError:
-                # In case the response is not JSON
-                print(f"Failed to save proority: {response.text}")
-
-    except Exception as e:
-        print(f"Error posting proority to backend: {e}")
+    print("Posting to backend:", patient_id, priority)
+    outbox.enqueue('priority', {
+        "patient": patient_id,  # Ensure this matches the server-side key
+        "priority": priority,
+    })
 
 def disease_to_ui(disease):
-    try:
-        # URL of your Flask backend route
-        print("Sending disease to backend:", disease)
-        url = f"{server}/get_disease"
+    print("Sending disease to backend:", disease)
+    # Sent as a query parameter
+    outbox.enqueue('disease', {"disease": disease})
         
-        # Send the disease as a query parameter
-        params = {"disease": disease}
-
-        response = requests.get(url, params=params)
-
-        if response.status_code == 200:
-            print("Disease sent successfully")
-            print(response.json())
-        else:
-            print(f"Failed to send disease: {response.status_code} - {response.text}")
-
-    except Exception as e:
-        print(f"Error posting disease to backend: {e}")
-        
-# Function to extract summary from chatbot's response
-def extract_summary(response_text):
-    summary_match = re.search(r'\[SUMMARY\](.*?)\[PRIORITY\]', response_text, re.DOTALL)
-    if summary_match:
-        return summary_match.group(1).strip()
-    return "No summary found"
-
 # Main function to handle chatbot response
 def get_chatbot_response(user_message, patient_id):
     try:
-        # Get the chatbot response
-        if not os.path.exists('chat_history.json'):
-            with open('chat_history.json', 'w') as f:
-                f.write('{}') 
-
+        # Get the chatbot response, given this patient's recent history only;
+        # a reply carrying the summary and rating also closes the patient's session
         print("get bot res",patient_id)
-        response = chain.invoke({'input': user_message})
-        response_text = response['text']
+        patient_id = str(patient_id)
+        response_text = consultations.submit(patient_id, user_message).result()
         
-        # Extract the summary from the response
-        summary = extract_summary(response_text)
+        # Extract the [SUMMARY], [PRIORITY] and [DISEASE] sections in one pass
+        parsed = parse_sections(response_text)
         
-        if summary != "No summary found":
+        if parsed.summary is not None:
             # Log the summary
-            print(f"[SUMMARY]:\n{summary}\n")
+            print(f"[SUMMARY]:\n{parsed.summary}\n")
 
             # Automatically post the summary to the Flask backend with patient ID
-            post_summary_to_backend(patient_id, summary)
-
-            if os.path.exists('chat_history.json'):
-                os.remove('chat_history.json')
-                print("chat_history.json file deleted.")
-        
-        # Extract and log priority (for logging purposes)
-        # priority = extract_priority(response_text)
-
+            post_summary_to_backend(patient_id, parsed.summary)
         
-        # if priority != "No priority found":
-        #     print(f"[PRIORITY]:\n{priority}\n")
-        #     post_priority_to_backend(patient_id, priority)
+        if parsed.priority is not None:
+            print(f"[PRIORITY]:\n{parsed.priority} ({parsed.priority_band})\n")
+            post_priority_to_backend(patient_id, parsed.priority)
 
-        # disease = extract_disease(response_text)
+        if parsed.diseases:
+            disease = ", ".join(f"{name}: {probability:.0%}" for name, probability in parsed.diseases.items())
+            print(f"[DISEASE]:\n{disease}\n")
+            disease_to_ui(disease)
 
-        # if disease:
-        #     print(f"[dises]:\n{priority}\n")
-        #     disease_to_ui(disease)
+        if parsed.is_final:
+            print("Consultation session closed.")
         
         return response_text
 
     except Exception as e:
         print(f"Error in chatbot response: {e}")
         return "Sorry, there was an error processing your request."
-
-
-
-# Function to extract [PRIORITY] section
-# def extract_priority(response_text):
-#     priority_match = re.search(r'\[PRIORITY\](.*)', response_text, re.DOTALL)
-#     if priority_match:
-#         return priority_match.group(1).strip()
-#     return "No priority found"
-
-# Function to extract [DISEASE] section
-# def extract_disease(response_text):
-#     disease_match = re.search(r'\[DISEASE\](.*?)\[SUMMARY\]', response_text, re.DOTALL)
-#     if disease_match:
-#         return disease_match.group(1).strip()
-#     return "No disease found"
@@ -0,0 +1,33 @@
+"""
+Pre-fork multi-worker serving of app.py:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master and forked into the workers, and
+each worker builds its components after the fork. With INDEX_MMAP the
+vector index is memory-mapped read-only, so every worker shares one copy
+of it in the page cache, and workers switch to a rebuilt index when its
+generation file changes, without a restart.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import Config
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', str(os.cpu_count() or 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = True
+
+# Prewarm in each worker, not the master: a prewarm thread does not survive
+# the fork, and a component lock it held would stay locked in every worker
+prewarm_components = Config.PREWARM_COMPONENTS
+Config.PREWARM_COMPONENTS = []
+
+
+def post_fork(server, worker):
+    from app import components
+    components.prewarm(prewarm_components)
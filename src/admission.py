@@ -0,0 +1,74 @@
+import asyncio
+import contextlib
+from typing import AsyncIterator, Dict, Optional
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request cannot be admitted; served as 503.
+    """
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = 64, max_queue: int = 256, queue_timeout: Optional[float] = 10.0):
+        """
+        Bound the requests an asyncio server works on at once.
+
+        Up to ``max_concurrency`` requests run concurrently and up to
+        ``max_queue`` more wait for a slot. Beyond that, or after waiting
+        ``queue_timeout`` seconds, requests are turned away with
+        ``Overloaded`` so clients back off instead of piling up.
+
+        Args:
+            max_concurrency (int): Requests processed concurrently
+            max_queue (int): Requests allowed to wait for a slot
+            queue_timeout (float): Seconds a request may wait; None waits forever
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @contextlib.asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Hold a processing slot for the duration of the ``async with`` block.
+
+        Raises:
+            Overloaded: If the queue is full or the wait timed out
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"Request queue is full ({self.max_queue} waiting)")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"No processing slot within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'rejected': self.rejected
+        }
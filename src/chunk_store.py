@@ -0,0 +1,207 @@
+import io
+import os
+import mmap
+import struct
+from typing import BinaryIO, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+
+class Chunk(NamedTuple):
+    id: int
+    text: str
+    source: str
+    page_start: int
+    page_end: int
+    disease: Optional[str]
+
+
+class ChunkStore:
+    """
+    Read-only chunk texts and metadata backed by two memory-mapped files.
+
+    ``chunks.idx`` holds a small header followed by fixed-width records
+    sorted by chunk ID; each record points into ``chunks.bin``, a blob of
+    UTF-8 texts. Lookups binary-search the records in place and decode
+    only the requested texts, so opening the store costs the same for
+    ten chunks or ten million.
+    """
+    RECORDS_FILENAME = 'chunks.idx'
+    BLOB_FILENAME = 'chunks.bin'
+
+    MAGIC = b'CHNK'
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct('<4sIQ')
+    # chunk id, blob offset, text length, first page, last page, source no, disease no
+    RECORD = struct.Struct('<qQIIIHH')
+    NO_DISEASE = 0xFFFF
+
+    def __init__(self, records, blob, sources: List[str], diseases: List[str]):
+        """
+        Wrap record and text buffers.
+
+        Args:
+            records (Union[mmap.mmap, bytes]): Header plus fixed-width records
+            blob (Union[mmap.mmap, bytes]): Concatenated UTF-8 chunk texts
+            sources (List[str]): Source document names, by source number
+            diseases (List[str]): Disease tags, by disease number
+        """
+        magic, version, count = self.HEADER.unpack_from(records, 0)
+        if magic != self.MAGIC or version != self.FORMAT_VERSION:
+            raise ValueError("Unrecognised chunk store format")
+
+        self._records = records
+        self._blob = blob
+        self._count = count
+        self.sources = sources
+        self.diseases = diseases
+
+    @classmethod
+    def open(cls, index_dir: str, sources: List[str], diseases: List[str]) -> 'ChunkStore':
+        """
+        Memory-map the chunk store files in a directory.
+
+        Args:
+            index_dir (str): Directory holding the chunk store files
+            sources (List[str]): Source document names, by source number
+            diseases (List[str]): Disease tags, by disease number
+
+        Returns:
+            ChunkStore: Read-only chunk store
+        """
+        return cls(
+            _map_file(os.path.join(index_dir, cls.RECORDS_FILENAME)),
+            _map_file(os.path.join(index_dir, cls.BLOB_FILENAME)),
+            sources,
+            diseases
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Chunk]) -> 'ChunkStore':
+        """
+        Build an in-memory chunk store, e.g. when upgrading legacy metadata.
+        """
+        records, blob = io.BytesIO(), io.BytesIO()
+        sources, diseases = cls._encode(chunks, records, blob)
+        return cls(records.getvalue(), blob.getvalue(), sources, diseases)
+
+    @classmethod
+    def write(cls, index_dir: str, chunks: Iterable[Chunk], suffix: str = '') -> Tuple[List[str], List[str]]:
+        """
+        Write chunks, which must be sorted by ID, to the chunk store files.
+
+        Chunk texts may be given as ``bytes`` to copy them from another
+        store without decoding.
+
+        Args:
+            index_dir (str): Destination directory
+            chunks (Iterable[Chunk]): Chunks in ascending ID order
+            suffix (str): Suffix appended to the file names
+
+        Returns:
+            Tuple[List[str], List[str]]: Source and disease tables to pass to ``open``
+        """
+        records_path = os.path.join(index_dir, cls.RECORDS_FILENAME + suffix)
+        blob_path = os.path.join(index_dir, cls.BLOB_FILENAME + suffix)
+
+        with open(records_path, 'wb') as records, open(blob_path, 'wb') as blob:
+            return cls._encode(chunks, records, blob)
+
+    @classmethod
+    def _encode(cls, chunks: Iterable[Chunk], records: BinaryIO, blob: BinaryIO) -> Tuple[List[str], List[str]]:
+        source_numbers: Dict[str, int] = {}
+        disease_numbers: Dict[str, int] = {}
+        records.write(cls.HEADER.pack(cls.MAGIC, cls.FORMAT_VERSION, 0))
+
+        count = 0
+        offset = 0
+        last_id = None
+        for chunk in chunks:
+            if last_id is not None and chunk.id <= last_id:
+                raise ValueError("Chunks must be written in ascending ID order")
+            last_id = chunk.id
+
+            data = chunk.text if isinstance(chunk.text, bytes) else chunk.text.encode('utf-8')
+            source_no = source_numbers.setdefault(chunk.source, len(source_numbers))
+            disease_no = cls.NO_DISEASE if chunk.disease is None else \
+                disease_numbers.setdefault(chunk.disease, len(disease_numbers))
+
+            records.write(cls.RECORD.pack(
+                chunk.id, offset, len(data), chunk.page_start, chunk.page_end, source_no, disease_no
+            ))
+            blob.write(data)
+            offset += len(data)
+            count += 1
+
+        # Patch the final count into the header
+        records.seek(0)
+        records.write(cls.HEADER.pack(cls.MAGIC, cls.FORMAT_VERSION, count))
+
+        return list(source_numbers), list(disease_numbers)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record_id(self, position: int) -> int:
+        return struct.unpack_from('<q', self._records, self.HEADER.size + position * self.RECORD.size)[0]
+
+    def _find(self, chunk_id: int) -> Optional[int]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record_id(middle) < chunk_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._record_id(low) == chunk_id:
+            return low
+        return None
+
+    def _chunk_at(self, position: int, raw: bool = False) -> Chunk:
+        chunk_id, offset, length, page_start, page_end, source_no, disease_no = self.RECORD.unpack_from(
+            self._records, self.HEADER.size + position * self.RECORD.size
+        )
+        data = self._blob[offset:offset + length]
+        return Chunk(
+            id=chunk_id,
+            text=bytes(data) if raw else bytes(data).decode('utf-8'),
+            source=self.sources[source_no],
+            page_start=page_start,
+            page_end=page_end,
+            disease=None if disease_no == self.NO_DISEASE else self.diseases[disease_no]
+        )
+
+    def get(self, chunk_id: int) -> Optional[Chunk]:
+        """
+        Fetch a single chunk by ID.
+
+        Args:
+            chunk_id (int): Chunk ID
+
+        Returns:
+            Optional[Chunk]: The chunk, or None if it is not stored
+        """
+        position = self._find(chunk_id)
+        return None if position is None else self._chunk_at(position)
+
+    def get_many(self, chunk_ids: Iterable[int]) -> List[Chunk]:
+        """
+        Fetch chunks by ID, skipping IDs that are not stored.
+        """
+        chunks = (self.get(int(chunk_id)) for chunk_id in chunk_ids)
+        return [chunk for chunk in chunks if chunk is not None]
+
+    def iter_chunks(self, raw: bool = False) -> Iterable[Chunk]:
+        """
+        Iterate over all chunks in ID order.
+
+        Args:
+            raw (bool): Yield texts as undecoded ``bytes``
+        """
+        for position in range(self._count):
+            yield self._chunk_at(position, raw=raw)
+
+
+def _map_file(path: str) -> Union[mmap.mmap, bytes]:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,206 @@
+import re
+from typing import Iterator, List, NamedTuple, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+# A sentence ends at terminal punctuation followed by a capitalised start
+SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9•])')
+LINE_SENTENCE_END = re.compile(r'[.!?]["\')\]]*$')
+SMALL_WORDS = {'a', 'an', 'and', 'as', 'at', 'by', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate the model token count of a text.
+
+    Words and punctuation marks each count as one token, which tracks
+    subword tokenizers closely enough for budgeting.
+    """
+    return len(TOKEN_PATTERN.findall(text))
+
+
+class Unit(NamedTuple):
+    text: str
+    tokens: int
+    page_start: int
+    page_end: int
+    heading: bool
+
+
+class Chunker:
+    """
+    Splits document text into ``(chunk, first_page, last_page)`` pieces.
+
+    Page boundaries are form feeds, as produced by ``DocumentProcessor``.
+    """
+    signature = ''
+
+    def split(self, text: str) -> List[Tuple[str, int, int]]:
+        raise NotImplementedError
+
+
+class WordChunker(Chunker):
+    def __init__(self, chunk_size: int = 500):
+        """
+        Cut text every ``chunk_size`` whitespace-separated words.
+
+        Args:
+            chunk_size (int): Words per chunk
+        """
+        self.chunk_size = chunk_size
+        self.signature = f'words:{chunk_size}'
+
+    def split(self, text: str) -> List[Tuple[str, int, int]]:
+        words = []
+        pages = []
+        for page_no, page in enumerate(text.split('\f'), start=1):
+            page_words = page.split()
+            words.extend(page_words)
+            pages.extend([page_no] * len(page_words))
+
+        chunks = []
+        for i in range(0, len(words), self.chunk_size):
+            chunk = ' '.join(words[i:i + self.chunk_size])
+            chunks.append((chunk, pages[i], pages[min(i + self.chunk_size, len(words)) - 1]))
+
+        return chunks
+
+
+class SentenceChunker(Chunker):
+    def __init__(self, target_tokens: int = 256, overlap_tokens: int = 32, min_tokens: int = 64):
+        """
+        Pack whole sentences into chunks of about ``target_tokens`` tokens.
+
+        Chunks never cut a sentence unless the sentence alone exceeds the
+        target, start afresh at headings, and repeat up to
+        ``overlap_tokens`` of trailing sentences from the previous chunk.
+        The text is scanned once, line by line.
+
+        Args:
+            target_tokens (int): Maximum tokens per chunk
+            overlap_tokens (int): Tokens carried over between chunks
+            min_tokens (int): Smallest chunk a heading may close
+        """
+        if not 0 <= overlap_tokens < target_tokens:
+            raise ValueError("overlap_tokens must be smaller than target_tokens")
+
+        self.target_tokens = target_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = min_tokens
+        self.signature = f'sentence:{target_tokens}:{overlap_tokens}:{min_tokens}'
+
+    @staticmethod
+    def _is_heading(line: str) -> bool:
+        words = line.split()
+        if not 0 < len(words) <= 10 or line[-1] in '.,;:-' or not (line[0].isupper() or line[0].isdigit()):
+            return False
+        significant = [word for word in words if word.lower() not in SMALL_WORDS and word[0].isalpha()]
+        return bool(significant) and all(word[0].isupper() for word in significant)
+
+    def _units(self, text: str) -> Iterator[Unit]:
+        """
+        Yield sentences and headings with their token counts and pages.
+        """
+        buffer = []
+        buffer_page = 1
+        for page_no, page in enumerate(text.split('\f'), start=1):
+            for line in page.split('\n'):
+                line = ' '.join(line.split())
+                if not line:
+                    continue
+
+                if self._is_heading(line) and not buffer:
+                    yield Unit(line, count_tokens(line), page_no, page_no, True)
+                    continue
+
+                parts = SENTENCE_END.split(line)
+                for i, part in enumerate(parts):
+                    if not buffer:
+                        buffer_page = page_no
+                    buffer.append(part)
+                    if i < len(parts) - 1 or LINE_SENTENCE_END.search(part):
+                        sentence = ' '.join(buffer)
+                        buffer = []
+                        yield Unit(sentence, count_tokens(sentence), buffer_page, page_no, False)
+
+        if buffer:
+            sentence = ' '.join(buffer)
+            yield Unit(sentence, count_tokens(sentence), buffer_page, page_no, False)
+
+    def _fit(self, unit: Unit) -> Iterator[Unit]:
+        """
+        Break a unit longer than the target, e.g. a table, at word boundaries.
+        """
+        if unit.tokens <= self.target_tokens:
+            yield unit
+            return
+
+        words = []
+        tokens = 0
+        for word in unit.text.split():
+            word_tokens = count_tokens(word)
+            if words and tokens + word_tokens > self.target_tokens:
+                yield Unit(' '.join(words), tokens, unit.page_start, unit.page_end, False)
+                words, tokens = [], 0
+            words.append(word)
+            tokens += word_tokens
+        if words:
+            yield Unit(' '.join(words), tokens, unit.page_start, unit.page_end, False)
+
+    def split(self, text: str) -> List[Tuple[str, int, int]]:
+        chunks = []
+        current: List[Unit] = []
+        current_tokens = 0
+        fresh = 0
+
+        def emit():
+            chunks.append((' '.join(unit.text for unit in current), current[0].page_start, current[-1].page_end))
+
+        for whole in self._units(text):
+            # Headings open a new chunk, without overlap from the previous section
+            if whole.heading and fresh and current_tokens >= self.min_tokens:
+                emit()
+                current, current_tokens, fresh = [], 0, 0
+
+            for unit in self._fit(whole):
+                if fresh and current_tokens + unit.tokens > self.target_tokens:
+                    emit()
+
+                    # Carry trailing sentences into the next chunk as overlap
+                    carried = []
+                    carried_tokens = 0
+                    for previous in reversed(current):
+                        if carried_tokens + previous.tokens > self.overlap_tokens \
+                                or carried_tokens + previous.tokens + unit.tokens > self.target_tokens:
+                            break
+                        carried.append(previous)
+                        carried_tokens += previous.tokens
+                    current = carried[::-1]
+                    current_tokens = carried_tokens
+                    fresh = 0
+
+                current.append(unit)
+                current_tokens += unit.tokens
+                fresh += 1
+
+        if fresh:
+            emit()
+
+        return chunks
+
+
+def create_chunker(config) -> Chunker:
+    """
+    Build the chunker named by ``config.CHUNK_STRATEGY``.
+
+    Args:
+        config (Config): Configuration object
+
+    Returns:
+        Chunker: Chunker instance
+    """
+    if config.CHUNK_STRATEGY == 'sentence':
+        return SentenceChunker(config.CHUNK_TARGET_TOKENS, config.CHUNK_OVERLAP_TOKENS)
+    if config.CHUNK_STRATEGY == 'words':
+        return WordChunker(config.CHUNK_SIZE_WORDS)
+    raise ValueError(f"Unknown chunk strategy: {config.CHUNK_STRATEGY}")
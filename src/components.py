@@ -0,0 +1,108 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class Component:
+    __slots__ = ('name', 'factory', 'depends', 'state', 'value', 'error', 'seconds', 'lock')
+
+    def __init__(self, name: str, factory: Callable[..., Any], depends: Sequence[str]):
+        self.name = name
+        self.factory = factory
+        self.depends = tuple(depends)
+        self.state = PENDING
+        self.value = None
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ComponentRegistry:
+    """
+    Subsystems imported and constructed on first use rather than at startup.
+
+    Each component is registered with a factory that performs its own
+    imports and receives its dependencies, built first, as arguments.
+    ``get`` builds a component once, whichever thread asks first, and the
+    others wait for it. ``prewarm`` builds components on a background
+    thread so the process can serve, and report itself not ready, while
+    they load. A failed build is reported and retried on the next ``get``.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, Component] = {}
+
+    def register(self, name: str, factory: Callable[..., Any], depends: Sequence[str] = ()) -> None:
+        """
+        Args:
+            name (str): Component name
+            factory (Callable): Builds the component from its dependencies, in order
+            depends (Sequence[str]): Components passed to the factory
+        """
+        self._components[name] = Component(name, factory, depends)
+
+    def get(self, name: str) -> Any:
+        component = self._components[name]
+        if component.state == READY:
+            return component.value
+
+        dependencies = [self.get(dependency) for dependency in component.depends]
+        with component.lock:
+            if component.state != READY:
+                component.state = LOADING
+                start = time.perf_counter()
+                try:
+                    component.value = component.factory(*dependencies)
+                except Exception as e:
+                    component.state = FAILED
+                    component.error = f'{type(e).__name__}: {e}'
+                    raise
+                component.seconds = round(time.perf_counter() - start, 3)
+                component.error = None
+                component.state = READY
+                logger.info("Loaded component %s in %.3fs", name, component.seconds)
+        return component.value
+
+    def prewarm(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Build components ahead of their first use.
+
+        Args:
+            names (Iterable[str]): Components to build; all when omitted
+            background (bool): Build on a daemon thread and return it
+
+        Returns:
+            Optional[threading.Thread]: The prewarm thread, when in the background
+        """
+        names = list(self._components if names is None else names)
+
+        def warm():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    logger.exception("Prewarming component %s failed", name)
+
+        if not background:
+            warm()
+            return None
+        thread = threading.Thread(target=warm, name='prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self, names: Iterable[str]) -> bool:
+        return all(self._components[name].state == READY for name in names)
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            name: {'state': component.state, 'seconds': component.seconds, 'error': component.error}
+            for name, component in self._components.items()
+        }
@@ -10,9 +10,140 @@ class Config:
     
     # Document Processing Configuration
     MEDICAL_DOCS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'medical_docs')
+    EXTRACTION_MAX_WORKERS = int(os.getenv('EXTRACTION_MAX_WORKERS', '0')) or None  # None uses all CPUs
     
     # Embedding Store Configuration
     FAISS_INDEX_PATH = os.path.join(os.path.dirname(__file__), 'faiss_index')
     
+    # Startup: components built in the background at startup, and those /ready waits for
+    PREWARM_COMPONENTS = [name for name in os.getenv('PREWARM_COMPONENTS', 'rag_model,chatbot_service').split(',') if name]
+    READY_COMPONENTS = [name for name in os.getenv('READY_COMPONENTS', 'rag_model').split(',') if name]
+    
+    # Generation Configuration
+    GENERATION_BACKEND = os.getenv('GENERATION_BACKEND', 'gemini')  # 'gemini' or 'fake'
+    GENERATION_MODEL = os.getenv('GENERATION_MODEL', 'gemini-pro')
+    
+    # Embedding Configuration
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'gemini')  # 'gemini' or 'stub'
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'models/embedding-001')
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '100'))
+    EMBEDDING_MAX_WORKERS = int(os.getenv('EMBEDDING_MAX_WORKERS', '4'))
+    EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', '5'))
+    
+    # Persistent embedding cache; set EMBEDDING_CACHE_PATH to '' to disable
+    EMBEDDING_CACHE_PATH = os.getenv(
+        'EMBEDDING_CACHE_PATH',
+        os.path.join(os.path.dirname(__file__), 'embedding_cache', 'embeddings.sqlite3')
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '50000'))
+    
+    # Chunking Configuration
+    CHUNK_STRATEGY = os.getenv('CHUNK_STRATEGY', 'sentence')  # 'sentence' or 'words'
+    CHUNK_TARGET_TOKENS = int(os.getenv('CHUNK_TARGET_TOKENS', '256'))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', '32'))
+    CHUNK_SIZE_WORDS = int(os.getenv('CHUNK_SIZE_WORDS', '500'))
+    
+    # Vector index: 'flat', 'ivf', 'hnsw' or 'pq' (IVF with product quantization).
+    # IVF kinds fall back to flat until the corpus is large enough to train.
+    INDEX_KIND = os.getenv('INDEX_KIND', 'flat')
+    INDEX_NPROBE = int(os.getenv('INDEX_NPROBE', '8'))
+    INDEX_EF_SEARCH = int(os.getenv('INDEX_EF_SEARCH', '64'))
+    INDEX_HNSW_M = int(os.getenv('INDEX_HNSW_M', '32'))
+    INDEX_PQ_M = int(os.getenv('INDEX_PQ_M', '16'))
+    
+    # Seconds between checks for an index rebuilt by another process
+    INDEX_RELOAD_CHECK_INTERVAL = float(os.getenv('INDEX_RELOAD_CHECK_INTERVAL', '1.0'))
+    
+    # Memory-map the index read-only so worker processes share one copy of it
+    INDEX_MMAP = os.getenv('INDEX_MMAP', 'true').lower() == 'true'
+    # Index generations kept on disk for workers still switching to the newest
+    INDEX_KEEP_GENERATIONS = int(os.getenv('INDEX_KEEP_GENERATIONS', '2'))
+    
     # Supported Diseases
-    SUPPORTED_DISEASES = ['kidney', 'diabetes', 'heart']
\ No newline at end of file
+    SUPPORTED_DISEASES = ['kidney', 'diabetes', 'heart']
+    
+    # Retrieval: 'auto' searches only the disease partitions a query mentions, 'all' the
+    # whole index; BM25 scores are fused in with this weight. Fusion roughly triples search
+    # latency, so it is off (0) unless set here or per request with 'lexical_weight'; the
+    # BM25 index is then built by the first request asking for fusion, not at every ingest
+    SEARCH_PARTITIONS = os.getenv('SEARCH_PARTITIONS', 'auto')
+    HYBRID_LEXICAL_WEIGHT = float(os.getenv('HYBRID_LEXICAL_WEIGHT', '0'))
+    # Candidates taken from each ranking before fusion, as a multiple of top_k
+    HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', '4'))
+    
+    # Context assembly: chunks retrieved per query, from which the least redundant
+    # are picked by MMR until the token budget (0 for none) is full. Five retrieves as
+    # many as before assembly; each extra candidate costs a search and MMR step
+    CONTEXT_CANDIDATES = int(os.getenv('CONTEXT_CANDIDATES', '5'))
+    CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '1500'))
+    CONTEXT_DIVERSITY = float(os.getenv('CONTEXT_DIVERSITY', '0.3'))
+    CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv('CONTEXT_DUPLICATE_THRESHOLD', '0.9'))
+    
+    # Query-time caches
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '2048'))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+    QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', '3600'))
+    
+    # Semantic cache answering near-duplicate questions; can be switched per request
+    SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.95'))
+    SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '1000'))
+    
+    # Micro-batching of query embedding and search across concurrent requests; a lone
+    # query on an idle server is sent at once rather than waiting the full window
+    QUERY_BATCHING_ENABLED = os.getenv('QUERY_BATCHING_ENABLED', 'true').lower() == 'true'
+    QUERY_BATCH_MAX_SIZE = int(os.getenv('QUERY_BATCH_MAX_SIZE', '32'))
+    QUERY_BATCH_MAX_WAIT_MS = float(os.getenv('QUERY_BATCH_MAX_WAIT_MS', '3'))
+    
+    # Asyncio server (async_app.py): concurrent requests, waiting requests and
+    # seconds a request may wait before it is turned away with 503
+    ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', '64'))
+    ASYNC_MAX_QUEUE = int(os.getenv('ASYNC_MAX_QUEUE', '256'))
+    ASYNC_QUEUE_TIMEOUT = float(os.getenv('ASYNC_QUEUE_TIMEOUT', '10'))
+    
+    # Consultation chatbot history: append-only per-patient log, trimmed to a
+    # token budget per turn, with idle sessions dropped from memory
+    CONVERSATION_DB_PATH = os.getenv(
+        'CONVERSATION_DB_PATH',
+        os.path.join(os.path.dirname(__file__), 'conversations', 'conversations.sqlite3')
+    )
+    CONVERSATION_TOKEN_BUDGET = int(os.getenv('CONVERSATION_TOKEN_BUDGET', '3000'))
+    CONVERSATION_MAX_SESSIONS = int(os.getenv('CONVERSATION_MAX_SESSIONS', '256'))
+    # Consultation turns run concurrently across patients, one at a time per patient
+    CONSULTATION_WORKERS = int(os.getenv('CONSULTATION_WORKERS', '8'))
+    
+    # Backend that receives consultation summaries, priorities and diseases
+    BACKEND_SERVER = os.getenv('BACKEND_SERVER', 'http://10.135.9.132:8082')
+    
+    # Durable outbox for backend posts, delivered in the background with retries
+    OUTBOX_PATH = os.getenv('OUTBOX_PATH', os.path.join(os.path.dirname(__file__), 'outbox', 'outbox.sqlite3'))
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '20'))
+    OUTBOX_CONNECT_TIMEOUT = float(os.getenv('OUTBOX_CONNECT_TIMEOUT', '3'))
+    OUTBOX_READ_TIMEOUT = float(os.getenv('OUTBOX_READ_TIMEOUT', '10'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+    
+    # Patient report uploads: limits checked before a PDF is parsed, and extraction processes
+    REPORT_MAX_BYTES = int(os.getenv('REPORT_MAX_BYTES', str(10 * 2 ** 20)))
+    REPORT_MAX_PAGES = int(os.getenv('REPORT_MAX_PAGES', '100'))
+    REPORT_MAX_FILES = int(os.getenv('REPORT_MAX_FILES', '20'))
+    REPORT_EXTRACTION_WORKERS = int(os.getenv('REPORT_EXTRACTION_WORKERS', '4'))
+    # Larger request bodies are refused before they are read: a full batch of reports
+    # plus room for the multipart headers and form fields
+    REQUEST_MAX_BYTES = int(os.getenv('REQUEST_MAX_BYTES', str(REPORT_MAX_FILES * REPORT_MAX_BYTES + 2 ** 20)))
+    
+    # Image detection (POST /detect): a Darknet YOLO model run on the CPU over batches of images
+    DETECTION_MODEL_CONFIG = os.getenv('DETECTION_MODEL_CONFIG', 'yolov3.cfg')
+    DETECTION_MODEL_WEIGHTS = os.getenv('DETECTION_MODEL_WEIGHTS', 'yolov3.weights')
+    DETECTION_CLASS_NAMES = os.getenv('DETECTION_CLASS_NAMES', 'coco.names')
+    DETECTION_INPUT_SIZE = int(os.getenv('DETECTION_INPUT_SIZE', '416'))
+    DETECTION_CONFIDENCE_THRESHOLD = float(os.getenv('DETECTION_CONFIDENCE_THRESHOLD', '0.5'))
+    DETECTION_NMS_THRESHOLD = float(os.getenv('DETECTION_NMS_THRESHOLD', '0.4'))
+    DETECTION_MAX_BATCH_SIZE = int(os.getenv('DETECTION_MAX_BATCH_SIZE', '8'))
+    DETECTION_MAX_IMAGES = int(os.getenv('DETECTION_MAX_IMAGES', '32'))
+    
+    # Keywords used to tag documents and chunks with a supported disease
+    DISEASE_KEYWORDS = {
+        'kidney': ['kidney', 'renal', 'nephro'],
+        'diabetes': ['diabetes', 'diabetic', 'glycemic'],
+        'heart': ['heart', 'hypertension', 'cardiac', 'cardio']
+    }
@@ -0,0 +1,138 @@
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.conversation_store import AI, HUMAN, ConversationStore
+
+# (history, user message) -> model reply
+Responder = Callable[[List[Tuple[str, str]], str], str]
+
+
+class ConsultationEngine:
+    def __init__(self, conversations: ConversationStore, respond: Responder, max_workers: int = 8,
+                 is_final: Optional[Callable[[str], bool]] = None):
+        """
+        Run consultations for many patients concurrently.
+
+        Each turn reads the patient's history, asks the model and appends
+        the exchange while holding that patient's lock only, so turns of
+        one patient are serialized while different patients proceed in
+        parallel on a pool of ``max_workers`` threads. Turns submitted for
+        a patient whose previous turn is still running wait in that
+        patient's queue rather than occupying a worker.
+
+        Args:
+            conversations (ConversationStore): Per-patient history
+            respond (Responder): Model call given the history and the new message
+            max_workers (int): Turns processed concurrently by ``submit``
+            is_final (Callable[[str], bool]): Whether a reply ends the consultation
+        """
+        self.conversations = conversations
+        self.respond = respond
+        self.max_workers = max_workers
+        self.is_final = is_final
+
+        self.turns = 0
+        self.sessions_ended = 0
+
+        # A lock lives as long as a turn holds or waits for it
+        self._session_locks: 'weakref.WeakValueDictionary[str, threading.Lock]' = weakref.WeakValueDictionary()
+        # patient -> turns submitted and not finished, the running one first
+        self._queues: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='consultation')
+
+    def _session_lock(self, patient_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._session_locks.get(patient_id)
+            if lock is None:
+                lock = self._session_locks[patient_id] = threading.Lock()
+            return lock
+
+    def chat(self, patient_id: str, message: str) -> str:
+        """
+        Process one turn of a patient's consultation on the calling thread.
+
+        Args:
+            patient_id (str): Patient identifier
+            message (str): Patient message
+
+        Returns:
+            str: Model reply
+        """
+        patient_id = str(patient_id)
+        with self._session_lock(patient_id):
+            reply = self.respond(self.conversations.history(patient_id), message)
+            self.conversations.append(patient_id, [(HUMAN, message), (AI, reply)])
+            ended = self.is_final is not None and self.is_final(reply)
+            if ended:
+                # Closed before the lock is released so no turn lands in between
+                self.conversations.end_session(patient_id)
+
+        with self._lock:
+            self.turns += 1
+            self.sessions_ended += ended
+        return reply
+
+    def record(self, patient_id: str, messages: List[Tuple[str, str]]) -> None:
+        """
+        Add messages produced outside a turn, e.g. an uploaded report and its reading.
+
+        Args:
+            patient_id (str): Patient identifier
+            messages (List[Tuple[str, str]]): ``(role, content)`` pairs in order
+        """
+        patient_id = str(patient_id)
+        with self._session_lock(patient_id):
+            self.conversations.append(patient_id, messages)
+
+    def submit(self, patient_id: str, message: str) -> Future:
+        """
+        Queue a turn on the worker pool.
+
+        Returns:
+            Future: Resolves to the model reply
+        """
+        patient_id = str(patient_id)
+        future = Future()
+        with self._lock:
+            queue = self._queues.get(patient_id)
+            if queue is not None:
+                queue.append((message, future))
+                return future
+            self._queues[patient_id] = deque([(message, future)])
+        self._executor.submit(self._drain, patient_id)
+        return future
+
+    def _drain(self, patient_id: str) -> None:
+        with self._lock:
+            message, future = self._queues[patient_id][0]
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(self.chat(patient_id, message))
+            except Exception as e:
+                future.set_exception(e)
+
+        with self._lock:
+            queue = self._queues[patient_id]
+            queue.popleft()
+            if not queue:
+                del self._queues[patient_id]
+                return
+        # Resubmitted rather than looped so one busy patient cannot hold a worker
+        self._executor.submit(self._drain, patient_id)
+
+    def stats(self) -> Dict:
+        return {
+            'max_workers': self.max_workers,
+            'turns': self.turns,
+            'sessions_ended': self.sessions_ended,
+            'active_sessions': len(self._session_locks),
+            'queued_turns': sum(len(queue) for queue in self._queues.values()),
+            'conversations': self.conversations.stats()
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,183 @@
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from src.chunk_store import Chunk
+from src.chunker import TOKEN_PATTERN, count_tokens
+from src.lexical_index import STOPWORDS
+from src.metrics import CONTEXT_TOKENS, record_usage
+from src.query_cache import LRUTTLCache
+
+
+class AssembledContext(NamedTuple):
+    """
+    Chunks chosen for a prompt, in prompt order, and their token counts.
+
+    ``texts`` are the chunk texts as sent; the last one may have been cut
+    to fit the budget.
+    """
+    chunks: List[Chunk]
+    texts: List[str]
+    retrieved_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.retrieved_tokens - self.tokens
+
+    def usage(self) -> Dict[str, int]:
+        return {
+            'context_chunks': len(self.chunks),
+            'retrieved_tokens': self.retrieved_tokens,
+            'context_tokens': self.tokens,
+            'tokens_saved': self.tokens_saved,
+        }
+
+
+class ContextAssembler:
+    def __init__(self, token_budget: int = 1500, diversity: float = 0.3,
+                 duplicate_threshold: float = 0.9, min_tokens: int = 32, cache_size: int = 4096):
+        """
+        Select retrieved chunks for the prompt within a token budget.
+
+        Chunks are picked greedily by maximal marginal relevance: each pick
+        maximises ``(1 - diversity) * relevance - diversity * redundancy``.
+        Relevance falls linearly with retrieval rank, and redundancy is the
+        highest cosine similarity of a chunk's term counts to any chunk
+        already picked, so a neighbour repeating an earlier chunk's text
+        makes way for one adding something new. Chunks at least
+        ``duplicate_threshold`` similar to a pick are dropped outright.
+        Picking stops when the budget is full; the chunk that overflows it
+        is cut at a word boundary if at least ``min_tokens`` remain. The
+        picks are sent in retrieval order, most relevant first.
+
+        Token counts and term vectors are cached by chunk text, since the
+        same popular chunks are retrieved over and over.
+
+        Args:
+            token_budget (int): Context tokens per prompt; 0 for no limit
+            diversity (float): Weight of redundancy against relevance, between 0 and 1
+            duplicate_threshold (float): Similarity at which a chunk counts as a duplicate
+            min_tokens (int): Smallest piece a chunk is cut down to
+            cache_size (int): Chunk texts whose measurements are kept
+        """
+        self.token_budget = token_budget
+        self.diversity = diversity
+        self.duplicate_threshold = duplicate_threshold
+        self.min_tokens = min_tokens
+        self.measurements = LRUTTLCache(cache_size, ttl=None)
+
+        self.requests = 0
+        self.retrieved_tokens = 0
+        self.sent_tokens = 0
+        self._lock = threading.Lock()
+
+    def assemble(self, chunks: Sequence[Chunk]) -> AssembledContext:
+        """
+        Pick the chunks to send from retrieval results.
+
+        Args:
+            chunks (Sequence[Chunk]): Retrieved chunks, best first
+
+        Returns:
+            AssembledContext: Picked chunks in retrieval order
+        """
+        tokens, vectors = [], []
+        for chunk in chunks:
+            measured = self.measurements.get(chunk.text)
+            if measured is None:
+                measured = self._measure(chunk.text)
+                self.measurements.put(chunk.text, measured)
+            count, vector = measured
+            tokens.append(count)
+            vectors.append(vector)
+        relevance = [1 - position / len(chunks) for position in range(len(chunks))]
+        redundancy = [0.0] * len(chunks)
+
+        remaining = set(range(len(chunks)))
+        budget = self.token_budget or math.inf
+        picked: Dict[int, Tuple[str, int]] = {}
+        while remaining and budget > 0:
+            # Ties go to the better-ranked chunk
+            best = max(remaining, key=lambda position: (
+                (1 - self.diversity) * relevance[position] - self.diversity * redundancy[position], -position))
+            remaining.discard(best)
+            if redundancy[best] >= self.duplicate_threshold:
+                continue
+
+            text, used = chunks[best].text, tokens[best]
+            if used > budget:
+                # Too small a remainder is left for a later, shorter chunk
+                if picked and budget < self.min_tokens:
+                    continue
+                text, used = self._truncate(text, budget)
+            picked[best] = (text, used)
+            budget -= used
+
+            for position in remaining:
+                redundancy[position] = max(redundancy[position], self._cosine(vectors[position], vectors[best]))
+
+        order = sorted(picked)
+        return AssembledContext(
+            chunks=[chunks[position] for position in order],
+            texts=[picked[position][0] for position in order],
+            retrieved_tokens=sum(tokens),
+            tokens=sum(picked[position][1] for position in order)
+        )
+
+    def observe(self, context: AssembledContext) -> None:
+        """
+        Count a context that was sent to the model.
+        """
+        CONTEXT_TOKENS.observe(context.retrieved_tokens, 'retrieved')
+        CONTEXT_TOKENS.observe(context.tokens, 'sent')
+        CONTEXT_TOKENS.observe(context.tokens_saved, 'saved')
+        record_usage(**context.usage())
+        with self._lock:
+            self.requests += 1
+            self.retrieved_tokens += context.retrieved_tokens
+            self.sent_tokens += context.tokens
+
+    def stats(self) -> Dict:
+        return {
+            'token_budget': self.token_budget,
+            'requests': self.requests,
+            'retrieved_tokens': self.retrieved_tokens,
+            'sent_tokens': self.sent_tokens,
+            'saved_tokens': self.retrieved_tokens - self.sent_tokens,
+            'measurement_cache': self.measurements.stats(),
+        }
+
+    @staticmethod
+    def _measure(text: str) -> Tuple[int, Tuple[Counter, float]]:
+        """
+        Token count and term vector of a text, from a single tokenizer pass.
+        """
+        pieces = TOKEN_PATTERN.findall(text.lower())
+        counts = Counter(pieces)
+        # Punctuation and stopwords are dropped once per distinct piece, not per occurrence
+        for piece in [piece for piece in counts if not piece[0].isalnum() or piece in STOPWORDS]:
+            del counts[piece]
+        return len(pieces), (counts, math.sqrt(sum(count * count for count in counts.values())))
+
+    @staticmethod
+    def _cosine(a: Tuple[Counter, float], b: Tuple[Counter, float]) -> float:
+        (a_counts, a_norm), (b_counts, b_norm) = a, b
+        if not a_norm or not b_norm:
+            return 0.0
+        if len(a_counts) > len(b_counts):
+            a_counts, b_counts = b_counts, a_counts
+        return sum(count * b_counts[term] for term, count in a_counts.items() if term in b_counts) / (a_norm * b_norm)
+
+    @staticmethod
+    def _truncate(text: str, budget: int) -> Tuple[str, int]:
+        words = []
+        used = 0
+        for word in text.split():
+            word_tokens = count_tokens(word)
+            if used + word_tokens > budget:
+                break
+            words.append(word)
+            used += word_tokens
+        return ' '.join(words), used
@@ -0,0 +1,206 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, NamedTuple, Tuple
+
+from src.chunker import count_tokens
+
+HUMAN = 'human'
+AI = 'ai'
+
+
+class Message(NamedTuple):
+    role: str
+    content: str
+    tokens: int
+
+
+class Session:
+    """
+    In-memory tail of one patient's current consultation.
+
+    Only the most recent messages that fit the token budget are kept,
+    so prompt size stays constant however long the consultation runs.
+    """
+
+    def __init__(self, number: int, token_budget: int):
+        self.number = number
+        self.token_budget = token_budget
+        self.messages: Deque[Message] = deque()
+        self.tokens = 0
+        self.lock = threading.RLock()
+
+    def add(self, message: Message) -> None:
+        self.messages.append(message)
+        self.tokens += message.tokens
+        # The latest message is always kept, even when it alone exceeds the budget
+        trimmed = False
+        while self.tokens > self.token_budget and len(self.messages) > 1:
+            self.tokens -= self.messages.popleft().tokens
+            trimmed = True
+
+        # A trimmed window opens with a patient message, not a dangling answer
+        while trimmed and len(self.messages) > 1 and self.messages[0].role != HUMAN:
+            self.tokens -= self.messages.popleft().tokens
+
+
+class ConversationStore:
+    def __init__(self, path: str, token_budget: int = 3000, max_sessions: int = 256):
+        """
+        Per-patient consultation history on an append-only SQLite log.
+
+        Each turn appends its messages as new rows, so the I/O per turn
+        does not grow with the conversation. Recent sessions are kept in
+        memory, trimmed to ``token_budget`` tokens; the least recently used
+        session is dropped from memory once more than ``max_sessions`` are
+        held and is reloaded from the log on its next turn. Ending a
+        session starts a new one for the patient and keeps the old rows.
+
+        Args:
+            path (str): SQLite database file
+            token_budget (int): History tokens sent to the model per turn
+            max_sessions (int): Sessions kept in memory
+        """
+        self.path = path
+        self.token_budget = token_budget
+        self.max_sessions = max_sessions
+        self.loads = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._sessions: 'OrderedDict[str, Session]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id TEXT NOT NULL, session INTEGER NOT NULL, '
+            'role TEXT NOT NULL, content TEXT NOT NULL, tokens INTEGER NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_patient_session ON messages (patient_id, session, id)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions (patient_id TEXT PRIMARY KEY, session INTEGER NOT NULL)'
+        )
+        self._conn.commit()
+
+    def session(self, patient_id: str) -> Session:
+        """
+        Return the patient's current session, loading its tail if needed.
+        """
+        with self._lock:
+            session = self._sessions.get(patient_id)
+            if session is not None:
+                self._sessions.move_to_end(patient_id)
+                return session
+
+        session = self._load(patient_id)
+        with self._lock:
+            # Another thread may have loaded it meanwhile; keep the first copy
+            session = self._sessions.setdefault(patient_id, session)
+            self._sessions.move_to_end(patient_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+
+    def _load(self, patient_id: str) -> Session:
+        with self._db_lock:
+            row = self._conn.execute('SELECT session FROM sessions WHERE patient_id = ?', (patient_id,)).fetchone()
+            number = row[0] if row else 0
+
+            # Read newest first and stop once the budget is full
+            session = Session(number, self.token_budget)
+            tail = []
+            tokens = 0
+            cursor = self._conn.execute(
+                'SELECT role, content, tokens FROM messages WHERE patient_id = ? AND session = ? ORDER BY id DESC',
+                (patient_id, number)
+            )
+            for role, content, message_tokens in cursor:
+                if tail and tokens + message_tokens > self.token_budget:
+                    break
+                tail.append(Message(role, content, message_tokens))
+                tokens += message_tokens
+            cursor.close()
+
+        for message in reversed(tail):
+            session.add(message)
+        self.loads += 1
+        return session
+
+    def history(self, patient_id: str) -> List[Tuple[str, str]]:
+        """
+        Recent ``(role, content)`` pairs of the patient's consultation, oldest first.
+
+        Args:
+            patient_id (str): Patient identifier
+
+        Returns:
+            List[Tuple[str, str]]: Messages fitting the token budget
+        """
+        session = self.session(patient_id)
+        with session.lock:
+            return [(message.role, message.content) for message in session.messages]
+
+    def append(self, patient_id: str, messages: List[Tuple[str, str]]) -> None:
+        """
+        Append messages, e.g. one question and its answer, to the consultation.
+
+        Args:
+            patient_id (str): Patient identifier
+            messages (List[Tuple[str, str]]): ``(role, content)`` pairs in order
+        """
+        session = self.session(patient_id)
+        entries = [Message(role, content, count_tokens(content)) for role, content in messages]
+        now = time.time()
+        with session.lock:
+            with self._db_lock:
+                self._conn.executemany(
+                    'INSERT INTO messages (patient_id, session, role, content, tokens, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(patient_id, session.number, entry.role, entry.content, entry.tokens, now) for entry in entries]
+                )
+                self._conn.commit()
+            for entry in entries:
+                session.add(entry)
+
+    def end_session(self, patient_id: str) -> None:
+        """
+        Close the patient's consultation; the next turn starts afresh.
+
+        Earlier messages stay in the log.
+
+        Args:
+            patient_id (str): Patient identifier
+        """
+        session = self.session(patient_id)
+        with session.lock:
+            with self._db_lock:
+                self._conn.execute(
+                    'INSERT INTO sessions (patient_id, session) VALUES (?, ?) '
+                    'ON CONFLICT(patient_id) DO UPDATE SET session = excluded.session',
+                    (patient_id, session.number + 1)
+                )
+                self._conn.commit()
+            session.number += 1
+            session.messages.clear()
+            session.tokens = 0
+
+    def stats(self) -> Dict:
+        return {
+            'sessions_in_memory': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'token_budget': self.token_budget,
+            'loads': self.loads,
+            'evictions': self.evictions
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
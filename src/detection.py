@@ -0,0 +1,189 @@
+import threading
+from typing import List, NamedTuple, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.metrics import timed
+
+
+class Detection(NamedTuple):
+    """
+    One detected object; ``box`` is ``(x, y, width, height)`` in image pixels.
+    """
+    label: str
+    class_id: int
+    confidence: float
+    box: Tuple[int, int, int, int]
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    Each step keeps the best remaining box and drops, in one array
+    operation, every remaining box overlapping it by more than
+    ``iou_threshold``; the loop runs once per kept box, not per pair.
+
+    Args:
+        boxes (np.ndarray): ``(n, 4)`` corners ``x1, y1, x2, y2``
+        scores (np.ndarray): Score of each box
+        iou_threshold (float): Intersection over union above which a box is suppressed
+
+    Returns:
+        np.ndarray: Indices of the kept boxes, best first
+    """
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        width = np.minimum(boxes[best, 2], boxes[rest, 2]) - np.maximum(boxes[best, 0], boxes[rest, 0])
+        height = np.minimum(boxes[best, 3], boxes[rest, 3]) - np.maximum(boxes[best, 1], boxes[rest, 1])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        union = np.maximum(areas[best] + areas[rest] - intersection, 1e-9)
+        order = rest[intersection / union <= iou_threshold]
+    return np.array(keep, dtype='int64')
+
+
+def decode_detections(outputs: Sequence[np.ndarray], sizes: np.ndarray, confidence_threshold: float,
+                      nms_threshold: float) -> List[List[Tuple[int, float, Tuple[int, int, int, int]]]]:
+    """
+    Turn YOLO output rows for a batch of images into boxes in pixels.
+
+    Rows of every image and output layer are filtered and scaled
+    together; suppression then runs within each image and class, so its
+    cost does not grow with the batch.
+
+    Args:
+        outputs (Sequence[np.ndarray]): Output layers, ``(images, rows, 5 + classes)``
+            each, or ``(rows, 5 + classes)`` for a single image
+        sizes (np.ndarray): ``(images, 2)`` width and height of each original image
+        confidence_threshold (float): Lowest class score kept
+        nms_threshold (float): Overlap above which the weaker box is dropped
+
+    Returns:
+        List[List[Tuple[int, float, Tuple[int, int, int, int]]]]: Class ID,
+            confidence and ``(x, y, width, height)`` box per detection, per image, best first
+    """
+    rows = np.concatenate([output.reshape(len(sizes), -1, output.shape[-1]) for output in outputs], axis=1)
+    scores = rows[:, :, 5:]
+    class_ids = scores.argmax(axis=2)
+    confidences = np.take_along_axis(scores, class_ids[:, :, None], axis=2)[:, :, 0]
+
+    images, positions = np.nonzero(confidences > confidence_threshold)
+    results = [[] for _ in sizes]
+    if not len(images):
+        return results
+    class_ids = class_ids[images, positions]
+    confidences = confidences[images, positions]
+
+    # Centre and size are fractions of the input, which is the whole image resized
+    centre_x, centre_y, width, height = (rows[images, positions, :4] * np.tile(sizes[images], 2)).T
+    corners = np.stack([centre_x - width / 2, centre_y - height / 2, centre_x + width / 2, centre_y + height / 2], axis=1)
+    corners = np.clip(corners, 0, np.tile(sizes[images], 2))
+
+    # Sort into image and class groups, then suppress within each
+    groups = images * scores.shape[2] + class_ids
+    order = np.argsort(groups, kind='stable')
+    bounds = np.flatnonzero(np.diff(groups[order])) + 1
+    keep = np.concatenate([
+        members[non_max_suppression(corners[members], confidences[members], nms_threshold)]
+        for members in np.split(order, bounds)
+    ])
+    keep = keep[np.lexsort((-confidences[keep], images[keep]))]
+
+    boxes = np.round(corners[keep]).astype('int64')
+    boxes[:, 2:] -= boxes[:, :2]
+    for image, class_id, confidence, box in zip(images[keep].tolist(), class_ids[keep].tolist(),
+                                                 confidences[keep].tolist(), boxes.tolist()):
+        results[image].append((class_id, confidence, tuple(box)))
+    return results
+
+
+class YoloDetector:
+    def __init__(self, config_path: str, weights_path: str, class_names: Sequence[str], input_size: int = 416,
+                 confidence_threshold: float = 0.5, nms_threshold: float = 0.4, max_batch_size: int = 8):
+        """
+        Detect objects in images with a Darknet YOLO model on the CPU.
+
+        Images are resized into one blob per batch and sent through the
+        network in a single forward pass; decoding, filtering and
+        suppression then run over the whole batch's outputs at once.
+
+        Args:
+            config_path (str): Darknet ``.cfg`` file
+            weights_path (str): Darknet ``.weights`` file
+            class_names (Sequence[str]): Label of each class ID
+            input_size (int): Side of the square network input, a multiple of 32
+            confidence_threshold (float): Lowest class score reported
+            nms_threshold (float): Overlap above which the weaker of two same-class boxes is dropped
+            max_batch_size (int): Images per forward pass
+        """
+        self.class_names = list(class_names)
+        self.input_size = input_size
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+        self.max_batch_size = max_batch_size
+
+        self.net = cv2.dnn.readNetFromDarknet(config_path, weights_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.output_names = self.net.getUnconnectedOutLayersNames()
+
+        # A network holds its input and activations, so forward passes take turns
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'YoloDetector':
+        with open(config.DETECTION_CLASS_NAMES, 'r') as f:
+            class_names = f.read().strip().split('\n')
+        return cls(
+            config.DETECTION_MODEL_CONFIG,
+            config.DETECTION_MODEL_WEIGHTS,
+            class_names,
+            input_size=config.DETECTION_INPUT_SIZE,
+            confidence_threshold=config.DETECTION_CONFIDENCE_THRESHOLD,
+            nms_threshold=config.DETECTION_NMS_THRESHOLD,
+            max_batch_size=config.DETECTION_MAX_BATCH_SIZE
+        )
+
+    def detect(self, images: Sequence[np.ndarray]) -> List[List[Detection]]:
+        """
+        Detect objects in several images.
+
+        Args:
+            images (Sequence[np.ndarray]): BGR, BGRA or grayscale images of any size
+
+        Returns:
+            List[List[Detection]]: Detections per image, best first
+        """
+        images = [self._as_bgr(image) for image in images]
+        results = []
+        for start in range(0, len(images), self.max_batch_size):
+            batch = images[start:start + self.max_batch_size]
+            with timed('detection_preprocess'):
+                blob = cv2.dnn.blobFromImages(batch, 1 / 255.0, (self.input_size, self.input_size),
+                                              swapRB=True, crop=False)
+            with self._lock, timed('detection_inference'):
+                self.net.setInput(blob)
+                outputs = self.net.forward(self.output_names)
+            with timed('detection_postprocess'):
+                sizes = np.array([(image.shape[1], image.shape[0]) for image in batch], dtype='float64')
+                for found in decode_detections(outputs, sizes, self.confidence_threshold, self.nms_threshold):
+                    results.append([Detection(self._label(class_id), class_id, confidence, box)
+                                    for class_id, confidence, box in found])
+        return results
+
+    def _label(self, class_id: int) -> str:
+        return self.class_names[class_id] if class_id < len(self.class_names) else str(class_id)
+
+    @staticmethod
+    def _as_bgr(image: np.ndarray) -> np.ndarray:
+        # Scans are often grayscale or carry an alpha channel; the network takes three channels
+        if image.ndim == 2:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        return image
@@ -1,10 +1,247 @@
 import os
+import sys
+import time
+import pickle
+import logging
+import threading
+import subprocess
 import PyPDF2
-from typing import List, Dict
+import itertools
+from collections import deque
+from typing import List, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Extraction processes run this module as their __main__ (see src/pdf_worker.py)
+WORKER_MODULE = 'src.pdf_worker'
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _extract_pdf_pages(filepath: str, max_pages: Optional[int] = None) -> Tuple[List[str], float]:
+    """
+    Extract the text of every page of a PDF; runs in a worker process.
+    
+    Args:
+        filepath (str): Path to the PDF
+        max_pages (int): Reject longer PDFs, checked before any text is extracted
+    
+    Returns:
+        Tuple[List[str], float]: Page texts and extraction seconds
+    """
+    start = time.perf_counter()
+    with open(filepath, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        if max_pages is not None and len(reader.pages) > max_pages:
+            raise ValueError(f"PDF has {len(reader.pages)} pages, more than the limit of {max_pages}")
+        pages = [page.extract_text() or '' for page in reader.pages]
+    return pages, time.perf_counter() - start
+
+
+class _Worker:
+    """
+    One extraction process, extracting one file at a time.
+    """
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', WORKER_MODULE],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=PROJECT_ROOT
+        )
+    
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+    
+    def submit(self, filepath: str, max_pages: Optional[int]):
+        try:
+            # The worker runs from the project root, so paths must not be relative
+            pickle.dump((os.path.abspath(filepath), max_pages), self.process.stdin)
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            # Reported by result(), like a crash during extraction
+            pass
+    
+    def result(self) -> Tuple[List[str], float]:
+        try:
+            response = pickle.load(self.process.stdout)
+        except EOFError:
+            raise RuntimeError(f"Extraction process exited with code {self.process.wait()}") from None
+        if isinstance(response, Exception):
+            raise response
+        return response
+    
+    def close(self):
+        self._close_pipes()
+        self.process.wait()
+    
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self._close_pipes()
+    
+    def _close_pipes(self):
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except BrokenPipeError:
+                # A request was still buffered for a process that has exited
+                pass
+
 
 class DocumentProcessor:
+    def __init__(self, max_workers: Optional[int] = None, max_pages: Optional[int] = None):
+        """
+        Initialize the document processor.
+        
+        Args:
+            max_workers (int): Extraction processes; 1 extracts in-process.
+                Defaults to the CPU count.
+            max_pages (int): Fail PDFs with more pages instead of extracting them
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pages = max_pages
+        # Extraction processes outlive a call, so later calls skip their start-up
+        self._idle_workers: List[_Worker] = []
+        self._workers_lock = threading.Lock()
+    
+    def iter_pages(self, folder_path: str, report: Optional[List[Dict]] = None,
+                   failed: Optional[List[str]] = None) -> Iterator[Tuple[str, int, str]]:
+        """
+        Stream ``(document, page_no, text)`` records from the PDFs in a folder.
+        
+        Files are extracted in parallel by worker processes. At most
+        ``max_workers`` files are in flight at once, so memory is bounded
+        by the pool size rather than the corpus size. Pages of one
+        document are yielded contiguously and in order.
+        
+        Args:
+            folder_path (str): Path to the folder containing medical PDFs
+            report (List[Dict]): Optional list receiving per-file timing
+                and failure records
+            failed (List[str]): Optional list receiving the names of
+                documents whose extraction failed; they yield no pages
+        
+        Yields:
+            Tuple[str, int, str]: Document name, 1-based page number and page text
+        """
+        filenames = sorted(filename for filename in os.listdir(folder_path) if filename.endswith('.pdf'))
+        
+        for filename, pages, seconds, error in self._extract_files(folder_path, filenames):
+            # Use filename (without extension) as the document name
+            disease_name = os.path.splitext(filename)[0]
+            
+            if error is not None:
+                logger.warning("Error processing %s: %s", filename, error)
+                if failed is not None:
+                    failed.append(disease_name)
+            else:
+                logger.info("Extracted %d pages from %s in %.3fs", len(pages), filename, seconds)
+            if report is not None:
+                report.append({
+                    'file': filename,
+                    'pages': len(pages),
+                    'seconds': round(seconds, 3),
+                    'error': None if error is None else str(error)
+                })
+            
+            for page_no, text in enumerate(pages, start=1):
+                yield disease_name, page_no, text
+    
+    def _extract_files(self, folder_path: str, filenames: List[str]):
+        if self.max_workers <= 1:
+            for filename in filenames:
+                yield (filename, *self._extract_safely(os.path.join(folder_path, filename), self.max_pages))
+            return
+        
+        # Each worker holds one file, so a pool's worth is in flight; results are yielded in order
+        pending = deque()
+        finished = []
+        remaining = iter(filenames)
+        try:
+            for worker, filename in zip(self._acquire_workers(min(self.max_workers, len(filenames))), remaining):
+                worker.submit(os.path.join(folder_path, filename), self.max_pages)
+                pending.append((filename, worker))
+            
+            while pending:
+                filename, worker = pending.popleft()
+                try:
+                    pages, seconds = worker.result()
+                    result = (filename, pages, seconds, None)
+                except Exception as e:
+                    result = (filename, [], 0.0, e)
+                if not worker.alive:
+                    # Crashed on this file; the rest go to a fresh process
+                    worker.kill()
+                    worker = _Worker()
+                
+                next_filename = next(remaining, None)
+                if next_filename is None:
+                    finished.append(worker)
+                else:
+                    worker.submit(os.path.join(folder_path, next_filename), self.max_pages)
+                    pending.append((next_filename, worker))
+                
+                yield result
+        finally:
+            # Workers still extracting for an abandoned call are not reusable
+            for _, worker in pending:
+                worker.kill()
+            self._release_workers(finished)
+    
+    def _acquire_workers(self, count: int) -> List[_Worker]:
+        with self._workers_lock:
+            workers = [self._idle_workers.pop() for _ in range(min(count, len(self._idle_workers)))]
+        # Idle workers may have been killed since their last call
+        for worker in workers:
+            if not worker.alive:
+                worker.kill()
+        workers = [worker for worker in workers if worker.alive]
+        return workers + [_Worker() for _ in range(count - len(workers))]
+    
+    def _release_workers(self, workers: List[_Worker]):
+        workers = [worker for worker in workers if worker.alive]
+        with self._workers_lock:
+            kept = max(0, min(len(workers), self.max_workers - len(self._idle_workers)))
+            self._idle_workers.extend(workers[:kept])
+        for worker in workers[kept:]:
+            worker.close()
+    
+    def close(self):
+        """
+        Stop the idle extraction processes; later calls start new ones.
+        """
+        with self._workers_lock:
+            workers, self._idle_workers = self._idle_workers, []
+        for worker in workers:
+            worker.close()
+    
     @staticmethod
-    def extract_text_from_pdfs(folder_path: str) -> Dict[str, str]:
+    def _extract_safely(filepath: str, max_pages: Optional[int] = None) -> Tuple[List[str], float, Optional[Exception]]:
+        try:
+            return (*_extract_pdf_pages(filepath, max_pages), None)
+        except Exception as e:
+            return [], 0.0, e
+    
+    def iter_documents(self, folder_path: str, report: Optional[List[Dict]] = None,
+                       failed: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+        """
+        Stream ``(document, text)`` pairs as each PDF finishes extracting.
+        
+        Pages are joined with form feeds so chunkers can track page ranges.
+        
+        Args:
+            folder_path (str): Path to the folder containing medical PDFs
+            report (List[Dict]): Optional list receiving per-file records
+            failed (List[str]): Optional list receiving the names of
+                documents whose extraction failed
+        
+        Yields:
+            Tuple[str, str]: Document name and extracted text
+        """
+        records = self.iter_pages(folder_path, report, failed)
+        for name, pages in itertools.groupby(records, key=lambda record: record[0]):
+            yield name, ''.join(text + '\f' for _, _, text in pages)
+    
+    def extract_text_from_pdfs(self, folder_path: str) -> Dict[str, str]:
         """
         Extract text from PDF files in the specified folder.
         
@@ -14,27 +251,21 @@ class DocumentProcessor:
         Returns:
             Dict[str, str]: Dictionary of filename to extracted text
         """
-        extracted_texts = {}
+        return dict(self.iter_documents(folder_path))
+    
+    @staticmethod
+    def extract_text_from_pdf(filepath: str) -> str:
+        """
+        Extract text from a single PDF file.
         
-        for filename in os.listdir(folder_path):
-            if filename.endswith('.pdf'):
-                filepath = os.path.join(folder_path, filename)
-                
-                try:
-                    with open(filepath, 'rb') as file:
-                        reader = PyPDF2.PdfReader(file)
-                        text = ''
-                        for page in reader.pages:
-                            text += page.extract_text() + '\n'
-                        
-                        # Use filename (without extension) as the key
-                        disease_name = os.path.splitext(filename)[0]
-                        extracted_texts[disease_name] = text
-                
-                except Exception as e:
-                    print(f"Error processing {filename}: {e}")
+        Args:
+            filepath (str): Path to the PDF
         
-        return extracted_texts
+        Returns:
+            str: Extracted text, with form feeds marking page boundaries
+        """
+        pages, _ = _extract_pdf_pages(filepath)
+        return ''.join(page + '\f' for page in pages)
     
     @staticmethod
     def preprocess_text(text: str) -> str:
@@ -53,4 +284,4 @@ class DocumentProcessor:
         # Convert to lowercase
         text = text.lower()
         
-        return text
\ No newline at end of file
+        return text
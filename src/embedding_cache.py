@@ -0,0 +1,135 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int = 50000):
+        """
+        Persistent, content-addressed cache of embedding vectors.
+
+        Entries are keyed by a SHA-256 of the embedding model name and the
+        chunk text, so unchanged chunks are never re-embedded and a model
+        change never serves stale vectors. The least recently used entries
+        are evicted once the cache holds more than ``max_entries``.
+
+        Args:
+            path (str): SQLite database file
+            max_entries (int): Maximum number of cached vectors
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            'key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)')
+        self._conn.commit()
+
+    @staticmethod
+    def _key(model_name: str, text: str) -> bytes:
+        return hashlib.sha256(f'{model_name}\0{text}'.encode('utf-8')).digest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached vectors.
+
+        Args:
+            model_name (str): Embedding model name
+            texts (List[str]): Chunk texts
+
+        Returns:
+            List[Optional[np.ndarray]]: Vector per text, or None on a miss
+        """
+        keys = [self._key(model_name, text) for text in texts]
+        found = {}
+
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})', batch
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE embeddings SET last_access = ? WHERE key = ?',
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return [
+            np.frombuffer(found[key], dtype='float32') if key in found else None
+            for key in keys
+        ]
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Store vectors and evict the least recently used entries over capacity.
+
+        Args:
+            model_name (str): Embedding model name
+            texts (List[str]): Chunk texts
+            vectors (np.ndarray): One embedding row per text
+        """
+        now = time.time()
+        rows = [
+            (self._key(model_name, text), np.asarray(vector, dtype='float32').tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)', rows
+            )
+
+            count = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM embeddings WHERE key IN '
+                    '(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)', (overflow,)
+                )
+                self.evictions += overflow
+
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
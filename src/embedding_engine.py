@@ -0,0 +1,262 @@
+import re
+import time
+import asyncio
+import zlib
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class EmbeddingBackend:
+    """
+    Turns a batch of texts into embedding vectors.
+
+    Subclasses implement ``embed_batch``; the engine takes care of
+    batching, concurrency and retries. ``embed_batch_async`` serves the
+    asyncio path and falls back to running ``embed_batch`` on a thread.
+    """
+    model_name = ''
+
+    def embed_batch(self, texts: List[str], task_type: str = 'retrieval_document') -> List[List[float]]:
+        raise NotImplementedError
+
+    async def embed_batch_async(self, texts: List[str], task_type: str = 'retrieval_document') -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_batch, texts, task_type)
+
+
+class GeminiEmbeddingBackend(EmbeddingBackend):
+    def __init__(self, model_name: str = 'models/embedding-001', api_key: str = ''):
+        """
+        Embed texts with the Gemini embedding API.
+
+        The Gemini SDK is imported here rather than with the module; it
+        takes over a second to import and stub backends never need it.
+
+        Args:
+            model_name (str): Gemini embedding model
+            api_key (str): API key; the SDK's own environment lookup applies when empty
+        """
+        import google.generativeai as genai
+
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.genai = genai
+        self.model_name = model_name
+
+    def embed_batch(self, texts: List[str], task_type: str = 'retrieval_document') -> List[List[float]]:
+        # A list of contents is sent as a single batchEmbedContents request
+        result = self.genai.embed_content(
+            model=self.model_name,
+            content=texts,
+            task_type=task_type
+        )
+        return result['embedding']
+
+    async def embed_batch_async(self, texts: List[str], task_type: str = 'retrieval_document') -> List[List[float]]:
+        result = await self.genai.embed_content_async(
+            model=self.model_name,
+            content=texts,
+            task_type=task_type
+        )
+        return result['embedding']
+
+
+class StubEmbeddingBackend(EmbeddingBackend):
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, dimension: int = 768, latency: float = 0.0):
+        """
+        Deterministic local embedder used in place of Gemini in tests.
+
+        Texts are embedded as hashed, L2-normalised bags of words, so
+        lexically similar texts land close together without any network
+        round trip.
+
+        Args:
+            dimension (int): Embedding dimension
+            latency (float): Simulated seconds per request
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.model_name = f'stub-{dimension}'
+        self.requests = 0
+
+    def embed_batch(self, texts: List[str], task_type: str = 'retrieval_document') -> List[List[float]]:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(texts)
+
+    async def embed_batch_async(self, texts: List[str], task_type: str = 'retrieval_document') -> List[List[float]]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._embed(texts)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        embeddings = np.zeros((len(texts), self.dimension), dtype='float32')
+        for row, text in enumerate(texts):
+            for token in self.TOKEN_PATTERN.findall(text.lower()):
+                embeddings[row, zlib.crc32(token.encode()) % self.dimension] += 1.0
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (embeddings / norms).tolist()
+
+
+def create_embedding_backend(config) -> EmbeddingBackend:
+    """
+    Build the embedding backend named by ``config.EMBEDDING_BACKEND``.
+
+    Args:
+        config (Config): Configuration object
+
+    Returns:
+        EmbeddingBackend: Backend instance
+    """
+    if config.EMBEDDING_BACKEND == 'stub':
+        return StubEmbeddingBackend()
+    if config.EMBEDDING_BACKEND == 'gemini':
+        return GeminiEmbeddingBackend(config.EMBEDDING_MODEL, config.GEMINI_API_KEY)
+    raise ValueError(f"Unknown embedding backend: {config.EMBEDDING_BACKEND}")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an API error means we are being throttled.
+    """
+    if getattr(error, 'code', None) == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    message = str(error).lower()
+    return '429' in message or 'quota' in message or 'rate limit' in message
+
+
+class EmbeddingEngine:
+    def __init__(self, backend: EmbeddingBackend, batch_size: int = 100, max_workers: int = 4,
+                 max_retries: int = 5, initial_backoff: float = 1.0, max_backoff: float = 60.0,
+                 cache=None):
+        """
+        Embed many texts through batched requests on a bounded worker pool.
+
+        Args:
+            backend (EmbeddingBackend): Backend that embeds one batch
+            batch_size (int): Maximum texts per request
+            max_workers (int): Maximum requests in flight
+            max_retries (int): Retries per batch before giving up
+            initial_backoff (float): First retry delay in seconds
+            max_backoff (float): Upper bound on a retry delay in seconds
+            cache (EmbeddingCache): Optional persistent cache consulted
+                before calling the backend
+        """
+        self.backend = backend
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        # Once one worker is throttled, every worker holds off until then
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
+        self._retries = 0
+        self._cache_hits = 0
+
+    def embed(self, texts: List[str], task_type: str = 'retrieval_document') -> np.ndarray:
+        """
+        Embed texts, preserving their order.
+
+        Args:
+            texts (List[str]): Texts to embed
+            task_type (str): Gemini task type
+
+        Returns:
+            np.ndarray: float32 matrix with one row per text
+        """
+        if self.cache is None:
+            return self._embed_uncached(texts, task_type)
+
+        # Only texts missing from the cache reach the backend
+        cache_model = f'{self.backend.model_name}:{task_type}'
+        vectors = self.cache.get_many(cache_model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self._cache_hits += len(texts) - len(missing)
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            embedded = self._embed_uncached(missing_texts, task_type)
+            self.cache.put_many(cache_model, missing_texts, embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+
+        if not vectors:
+            return np.zeros((0, 0), dtype='float32')
+        return np.vstack(vectors).astype('float32')
+
+    def _embed_uncached(self, texts: List[str], task_type: str) -> np.ndarray:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if not batches:
+            return np.zeros((0, 0), dtype='float32')
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+            results = list(pool.map(lambda batch: self._embed_with_retry(batch, task_type), batches))
+
+        return np.array([vector for batch in results for vector in batch], dtype='float32')
+
+    def embed_with_stats(self, texts: List[str], task_type: str = 'retrieval_document') -> Tuple[np.ndarray, Dict]:
+        """
+        Embed texts and report throughput.
+
+        Returns:
+            Tuple[np.ndarray, Dict]: Embeddings and ingest statistics
+        """
+        self._retries = 0
+        self._cache_hits = 0
+        start = time.perf_counter()
+        embeddings = self.embed(texts, task_type)
+        elapsed = time.perf_counter() - start
+
+        embedded = len(texts) - self._cache_hits
+        stats = {
+            'chunks': len(texts),
+            'cache_hits': self._cache_hits,
+            'cache_misses': embedded,
+            'batches': -(-embedded // self.batch_size),
+            'retries': self._retries,
+            'embedding_seconds': round(elapsed, 3),
+            'chunks_per_sec': round(len(texts) / elapsed, 2) if elapsed > 0 else None
+        }
+        return embeddings, stats
+
+    def _wait_for_rate_limit(self) -> None:
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _embed_with_retry(self, batch: List[str], task_type: str) -> List[List[float]]:
+        attempt = 0
+        while True:
+            self._wait_for_rate_limit()
+            try:
+                embeddings = self.backend.embed_batch(batch, task_type)
+                if len(embeddings) != len(batch):
+                    raise ValueError(f"Expected {len(batch)} embeddings, got {len(embeddings)}")
+                return embeddings
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+
+                delay = min(self.max_backoff, self.initial_backoff * (2 ** attempt))
+                delay += random.uniform(0, delay / 4)
+                if is_rate_limit_error(e):
+                    with self._pause_lock:
+                        self._pause_until = max(self._pause_until, time.monotonic() + delay)
+
+                attempt += 1
+                with self._pause_lock:
+                    self._retries += 1
+                time.sleep(delay)
+
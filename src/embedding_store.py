@@ -1,91 +1,386 @@
 import os
+import time
 import faiss
+import hashlib
+import itertools
+import threading
 import numpy as np
-from typing import List, Dict
-import json
-import google.generativeai as genai
+from typing import Collection, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.chunk_store import Chunk, ChunkStore
+from src.chunker import create_chunker
+from src.embedding_cache import EmbeddingCache
+from src.embedding_engine import EmbeddingEngine, create_embedding_backend
+from src.index_factory import (
+    build_index, contains_ids, index_kind, index_nlist, needs_retraining, reconstruct_vectors,
+    resolve_kind, search_parameters, supports_remove
+)
+from src.index_manager import IndexManager
+from src.metrics import timed
+from src.partitions import (
+    ROUTE_ALL, ROUTE_AUTO, DiseaseRouter, SearchOptions, combined_ranges, partition_selector,
+    relative_score_fusion
+)
+from src.query_cache import LRUTTLCache, normalize_query
+from src.query_coalescer import QueryCoalescer
 
 class EmbeddingStore:
-    def __init__(self, config):
+    def __init__(self, config, embedding_backend=None, chunker=None):
         """
         Initialize the embedding store.
         
         Args:
             config (Config): Configuration object
+            embedding_backend (EmbeddingBackend): Optional backend overriding
+                the one named in the configuration
+            chunker (Chunker): Optional chunker overriding the configured strategy
         """
         self.config = config
+        self.chunker = chunker or create_chunker(self.config)
+        
+        self.embedding_backend = embedding_backend or create_embedding_backend(self.config)
         
-        # Configure Gemini API
-        genai.configure(api_key=self.config.GEMINI_API_KEY)
-        self.embedding_model = genai.embed_content
+        # Chunks already embedded by this model are served from the cache
+        self.embedding_cache = None
+        if self.config.EMBEDDING_CACHE_PATH:
+            self.embedding_cache = EmbeddingCache(
+                self.config.EMBEDDING_CACHE_PATH,
+                max_entries=self.config.EMBEDDING_CACHE_MAX_ENTRIES
+            )
+        
+        self.embedding_engine = EmbeddingEngine(
+            self.embedding_backend,
+            batch_size=self.config.EMBEDDING_BATCH_SIZE,
+            max_workers=self.config.EMBEDDING_MAX_WORKERS,
+            max_retries=self.config.EMBEDDING_MAX_RETRIES,
+            cache=self.embedding_cache
+        )
         
         # Create index directory if not exists
         os.makedirs(self.config.FAISS_INDEX_PATH, exist_ok=True)
+        
+        # Index and metadata stay resident; reloaded only when they change
+        self.index_manager = IndexManager(
+            self.config.FAISS_INDEX_PATH,
+            check_interval=self.config.INDEX_RELOAD_CHECK_INTERVAL,
+            upgrade=upgrade_legacy_index,
+            mmap=self.config.INDEX_MMAP,
+            keep_generations=self.config.INDEX_KEEP_GENERATIONS,
+            build_lexical=self.config.HYBRID_LEXICAL_WEIGHT > 0
+        )
+        
+        # Normalised query -> embedding, saving a round trip for repeated questions
+        self.query_embedding_cache = LRUTTLCache(
+            self.config.QUERY_EMBEDDING_CACHE_SIZE,
+            ttl=self.config.QUERY_CACHE_TTL
+        )
+        
+        # Concurrent queries are embedded and searched together
+        self.query_coalescer = None
+        if self.config.QUERY_BATCHING_ENABLED:
+            self.query_coalescer = QueryCoalescer(
+                self,
+                max_batch_size=self.config.QUERY_BATCH_MAX_SIZE,
+                max_wait=self.config.QUERY_BATCH_MAX_WAIT_MS / 1000
+            )
+        
+        # Sends queries to the disease partitions they mention
+        self.router = DiseaseRouter(self.config.DISEASE_KEYWORDS)
+        
+        # Serialises index writers; searches are never blocked by it
+        self._update_lock = threading.Lock()
+    
+    def create_embeddings(self, texts: Union[Dict[str, str], Iterable[Tuple[str, str]]],
+                          keep: Optional[Collection[str]] = None) -> Dict:
+        """
+        Synchronise the FAISS index with the given texts.
+        
+        Documents whose text is unchanged keep their vectors; changed or
+        new documents are re-embedded and documents no longer present
+        are removed. Texts may be streamed as ``(name, text)`` pairs, e.g.
+        from ``DocumentProcessor.iter_documents``, and are chunked and
+        embedded as they arrive.
+        
+        Args:
+            texts (Union[Dict[str, str], Iterable[Tuple[str, str]]]): Disease texts
+            keep (Collection[str]): Documents absent from ``texts`` that stay
+                indexed as they are, such as PDFs whose extraction failed.
+                It is read once ``texts`` is exhausted, so it may be filled
+                while they stream.
+        
+        Returns:
+            Dict: Embedding throughput and update statistics
+        """
+        documents = texts.items() if isinstance(texts, dict) else texts
+        with self._update_lock:
+            return self._apply_changes(documents, removed=None, keep=keep)
+    
+    def upsert_document(self, name: str, text: str) -> Dict:
+        """
+        Add a document to the index, or replace it if its text changed.
+        
+        Args:
+            name (str): Document name
+            text (str): Extracted document text
+        
+        Returns:
+            Dict: Embedding throughput and update statistics
+        """
+        with self._update_lock:
+            return self._apply_changes([(name, text)], removed=[])
+    
+    def delete_document(self, name: str) -> bool:
+        """
+        Remove a document's vectors and chunks from the index.
+        
+        Args:
+            name (str): Document name
+        
+        Returns:
+            bool: Whether the document was indexed
+        """
+        with self._update_lock:
+            if name not in self._current_metadata()['documents']:
+                return False
+            self._apply_changes([], removed=[name])
+            return True
+    
+    def list_documents(self) -> Dict[str, Dict]:
+        """
+        Describe the indexed documents and their chunk ID ranges.
+        
+        Returns:
+            Dict[str, Dict]: Document name to chunk ID range and hash
+        """
+        return self._current_metadata()['documents']
     
-    def create_embeddings(self, texts: Dict[str, str]) -> None:
+    def _current_metadata(self) -> Dict:
+        return self._current()[0]
+    
+    def _current(self) -> Tuple[Dict, ChunkStore]:
+        try:
+            with self.index_manager.snapshot() as (_, metadata, chunks):
+                return metadata, chunks
+        except FileNotFoundError:
+            return {'documents': {}, 'next_id': 0, 'disease_mapping': {}}, ChunkStore.from_chunks([])
+    
+    def _apply_changes(self, upserts: Iterable[Tuple[str, str]], removed: Optional[List[str]],
+                       keep: Optional[Collection[str]] = None) -> Dict:
         """
-        Create and save FAISS index for the given texts.
+        Re-embed changed documents and publish a new index generation.
+        
+        The resident index is cloned and edited off to the side, so
+        concurrent searches keep using the old generation until the
+        new one is swapped in. Flat and IVF copies take each embedded
+        batch as it arrives; HNSW indexes, which cannot remove in place,
+        and PQ ones, which store vectors lossily, get them once the
+        stream ends. Callers must hold ``_update_lock``.
         
         Args:
-            texts (Dict[str, str]): Dictionary of disease texts
+            upserts (Iterable[Tuple[str, str]]): Documents to add or replace
+            removed (Optional[List[str]]): Documents to remove; None removes
+                every indexed document not among ``upserts`` or ``keep``
+            keep (Collection[str]): Documents never removed when ``removed`` is None
         """
-        all_embeddings = []
-        all_texts = []
-        disease_mapping = {}
+        metadata, old_chunks = self._current()
+        next_id = metadata['next_id']
         
-        for disease, text in texts.items():
-            # Split text into chunks
-            chunks = self._split_text(text)
+        seen = {}
+        changed = {}
+        new_chunks = []
+        embedded = 0
+        # Writable index taking batches as they are embedded, else batches kept aside
+        staging = None
+        embeddings = []
+        # Every reported key starts at zero, so a sync with nothing to embed reports them too
+        stats = {'chunks': 0, 'cache_hits': 0, 'cache_misses': 0, 'batches': 0, 'retries': 0,
+                 'embedding_seconds': 0.0, 'index_seconds': 0.0}
+        flush_size = self.config.EMBEDDING_BATCH_SIZE * self.config.EMBEDDING_MAX_WORKERS
+        
+        for name, text in upserts:
+            seen[name] = True
+            
+            # Skip documents whose text has not changed since they were indexed
+            # The chunker signature is hashed too, so changing chunking re-indexes
+            digest = hashlib.sha256(f'{self.chunker.signature}\0{text}'.encode('utf-8')).hexdigest()
+            document = metadata['documents'].get(name)
+            if document is not None and document.get('sha256') == digest:
+                continue
             
-            # Generate embeddings for chunks
-            disease_embeddings = []
-            for chunk in chunks:
-                embedding = self._get_embedding(chunk)
-                disease_embeddings.append(embedding)
-                all_embeddings.append(embedding)
-                all_texts.append(chunk)
+            # Each document gets a fresh, contiguous range of chunk IDs
+            disease = self._tag_disease(name, text)
+            pieces = self.chunker.split(text)
+            for chunk, page_start, page_end in pieces:
+                new_chunks.append(Chunk(next_id, chunk, name, page_start, page_end, disease))
+                next_id += 1
+            changed[name] = {'ids': [next_id - len(pieces), next_id], 'sha256': digest, 'disease': disease}
             
-            # Track mapping of disease to text chunks
-            disease_mapping[disease] = len(disease_embeddings)
+            # Embed in full batches while later documents are still being extracted
+            if len(new_chunks) - embedded >= flush_size:
+                staging = self._embed_pending(new_chunks[embedded:], staging, embeddings, stats)
+                embedded = len(new_chunks)
         
-        # Convert to numpy array
-        embeddings_array = np.array(all_embeddings).astype('float32')
+        if len(new_chunks) > embedded:
+            staging = self._embed_pending(new_chunks[embedded:], staging, embeddings, stats)
         
-        # Create FAISS index
-        dimension = embeddings_array.shape[1]
-        index = faiss.IndexFlatL2(dimension)
-        index.add(embeddings_array)
+        if removed is None:
+            kept = set(keep or ())
+            removed = [name for name in metadata['documents'] if name not in seen and name not in kept]
+        stats.update({
+            'chunks_per_sec': round(stats['chunks'] / stats['embedding_seconds'], 2) if stats['embedding_seconds'] else None,
+            'updated_documents': list(changed),
+            'unchanged_documents': [name for name in seen if name not in changed],
+            'removed_documents': list(removed)
+        })
+        if not changed and not removed and not self._index_outdated():
+            return stats
+        
+        new_ids = np.array([chunk.id for chunk in new_chunks], dtype='int64')
+        index = staging if staging is not None else self._writable_index()
+        
+        documents = dict(metadata['documents'])
+        disease_mapping = dict(metadata['disease_mapping'])
+        
+        dropped = set(changed) | set(removed)
+        dropped_ranges = []
+        for name in dropped:
+            document = documents.pop(name, None)
+            disease_mapping.pop(name, None)
+            if document is not None:
+                dropped_ranges.append(document['ids'])
+        
+        kept_ids = np.array(
+            [chunk_id for document in documents.values() for chunk_id in range(*document['ids'])], dtype='int64'
+        )
+        total = len(kept_ids) + len(new_ids)
         
-        # Save index and metadata
-        faiss.write_index(index, os.path.join(self.config.FAISS_INDEX_PATH, 'medical_index.faiss'))
+        index_start = time.perf_counter()
+        if index is None or needs_retraining(index, self.config.INDEX_KIND, total) \
+                or (dropped_ranges and not supports_remove(index)):
+            # Build (and train) a fresh index of the configured kind from all vectors
+            if staging is not None:
+                vectors = reconstruct_vectors(staging, np.concatenate([kept_ids, new_ids]))
+            else:
+                kept_vectors = reconstruct_vectors(index, kept_ids) if index is not None else None
+                vectors = np.vstack([array for array in (kept_vectors, *embeddings) if array is not None and len(array)])
+            index = build_index(
+                resolve_kind(self.config.INDEX_KIND, total),
+                vectors,
+                hnsw_m=self.config.INDEX_HNSW_M,
+                pq_m=self.config.INDEX_PQ_M
+            )
+            index.add_with_ids(vectors, np.concatenate([kept_ids, new_ids]))
+            stats['index_rebuilt'] = True
+        else:
+            # Drop the old vectors of replaced and removed documents
+            for start, end in dropped_ranges:
+                index.remove_ids(np.arange(start, end, dtype='int64'))
+            if embeddings:
+                index.add_with_ids(np.vstack(embeddings), new_ids)
+            stats['index_rebuilt'] = False
+        stats['index_kind'] = index_kind(index)
+        stats['index_seconds'] = round(stats['index_seconds'] + time.perf_counter() - index_start, 3)
         
-        # Optional: Save additional metadata
-        import json
-        with open(os.path.join(self.config.FAISS_INDEX_PATH, 'metadata.json'), 'w') as f:
-            json.dump({
-                'texts': all_texts,
-                'disease_mapping': disease_mapping
-            }, f)
+        for name, document in changed.items():
+            documents[name] = document
+            disease_mapping[name] = document['ids'][1] - document['ids'][0]
+        
+        # Kept chunks are copied over as raw bytes; new IDs sort after them
+        kept_chunks = (chunk for chunk in old_chunks.iter_chunks(raw=True) if chunk.source not in dropped)
+        
+        # Save index, metadata and chunks, then swap them in for running searches
+        self.index_manager.publish(index, {
+            'documents': documents,
+            'next_id': next_id,
+            'disease_mapping': disease_mapping
+        }, itertools.chain(kept_chunks, new_chunks))
+        
+        return stats
     
-    def _split_text(self, text: str, chunk_size: int = 500) -> List[str]:
+    def _index_outdated(self) -> bool:
         """
-        Split text into chunks.
+        Whether the resident index no longer matches the configured kind.
+        """
+        try:
+            with self.index_manager.snapshot() as (index, _, _):
+                return needs_retraining(index, self.config.INDEX_KIND, index.ntotal)
+        except FileNotFoundError:
+            return False
+    
+    def _embed_pending(self, chunks: List[Chunk], staging, embeddings: List[np.ndarray], stats: Dict):
+        """
+        Embed a slice of pending chunks and fold its statistics into ``stats``.
         
-        Args:
-            text (str): Input text
-            chunk_size (int): Size of each text chunk
+        The vectors go straight into ``staging`` when there is one; the
+        first batch decides whether a staging index can be used at all,
+        otherwise batches are kept in ``embeddings``.
+        
+        Returns:
+            faiss.Index: The staging index, or None while batches are kept aside
+        """
+        array, batch_stats = self.embedding_engine.embed_with_stats([chunk.text for chunk in chunks])
+        for key in ('chunks', 'cache_hits', 'cache_misses', 'batches', 'retries', 'embedding_seconds'):
+            stats[key] = round(stats[key] + batch_stats[key], 3)
+        
+        if staging is None and not embeddings:
+            staging = self._staging_index(array)
+        if staging is None:
+            embeddings.append(array)
+            return None
+        index_start = time.perf_counter()
+        staging.add_with_ids(array, np.array([chunk.id for chunk in chunks], dtype='int64'))
+        stats['index_seconds'] += time.perf_counter() - index_start
+        return staging
+    
+    def _writable_index(self):
+        """
+        Copy of the resident index to edit, or None before the first ingest.
+        """
+        try:
+            with self.index_manager.snapshot() as (index, _, _):
+                return self.index_manager.writable_copy(index)
+        except FileNotFoundError:
+            return None
+    
+    def _staging_index(self, vectors: np.ndarray):
+        """
+        Writable index that embedded batches can be added to as they arrive.
+        
+        Flat and IVF indexes store vectors exactly and remove them in
+        place, so a copy of the resident one can take new vectors before
+        the final index kind is known and still be rebuilt from. Before
+        the first ingest a flat index is started from ``vectors``' width.
         
         Returns:
-            List[str]: List of text chunks
+            faiss.Index: The staging index, or None when the resident index is HNSW or PQ
+        """
+        try:
+            with self.index_manager.snapshot() as (index, _, _):
+                if index_kind(index) not in ('flat', 'ivf'):
+                    return None
+                return self.index_manager.writable_copy(index)
+        except FileNotFoundError:
+            return build_index('flat', vectors)
+    
+    def _tag_disease(self, name: str, text: str) -> Optional[str]:
         """
-        words = text.split()
-        chunks = []
+        Tag a document with the supported disease it covers.
         
-        for i in range(0, len(words), chunk_size):
-            chunk = ' '.join(words[i:i+chunk_size])
-            chunks.append(chunk)
+        The document name is checked first; otherwise the disease whose
+        keywords occur most often in the text wins.
+        """
+        lowered_name = name.lower()
+        for disease, keywords in self.config.DISEASE_KEYWORDS.items():
+            if any(keyword in lowered_name for keyword in keywords):
+                return disease
         
-        return chunks
+        lowered_text = text.lower()
+        counts = {
+            disease: sum(lowered_text.count(keyword) for keyword in keywords)
+            for disease, keywords in self.config.DISEASE_KEYWORDS.items()
+        }
+        best = max(counts, key=counts.get, default=None)
+        return best if best is not None and counts[best] else None
     
     def _get_embedding(self, text: str) -> np.ndarray:
         """
@@ -97,38 +392,304 @@ class EmbeddingStore:
         Returns:
             np.ndarray: Embedding vector
         """
-        result = self.embedding_model(
-            model="models/embedding-001",
-            content=text,
-            task_type="retrieval_document"
-        )
-        return np.array(result['embedding'])
+        return np.array(self.embedding_backend.embed_batch([text], task_type="retrieval_document")[0])
     
-    def search_embeddings(self, query: str, top_k: int = 5) -> List[str]:
+    def embed_query(self, query: str) -> np.ndarray:
         """
-        Search embeddings for the most relevant text chunks.
+        Embed a search query, reusing embeddings of recently seen queries.
+        
+        Args:
+            query (str): Search query
+        
+        Returns:
+            np.ndarray: float32 embedding vector
+        """
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several search queries with at most one backend request.
+        
+        Queries found in the query embedding cache are not sent again, and
+        queries that normalise alike are embedded once.
+        
+        Args:
+            queries (List[str]): Search queries
+        
+        Returns:
+            np.ndarray: float32 matrix with one row per query
+        """
+        keys = [normalize_query(query) for query in queries]
+        embeddings = [self.query_embedding_cache.get(key) for key in keys]
+        
+        missing = {}
+        for key, query, embedding in zip(keys, queries, embeddings):
+            if embedding is None:
+                missing.setdefault(key, query)
+        
+        if missing:
+            with timed('query_embedding'):
+                vectors = self.embedding_backend.embed_batch(list(missing.values()), task_type="retrieval_document")
+            fresh = {key: np.array(vector, dtype='float32') for key, vector in zip(missing, vectors)}
+            for key, embedding in fresh.items():
+                self.query_embedding_cache.put(key, embedding)
+            embeddings = [fresh[key] if embedding is None else embedding for key, embedding in zip(keys, embeddings)]
+        
+        return np.vstack(embeddings)
+    
+    async def embed_query_async(self, query: str) -> np.ndarray:
+        """
+        Embed a search query without blocking the event loop.
+        
+        Shares the query embedding cache with ``embed_query``.
+        
+        Args:
+            query (str): Search query
+        
+        Returns:
+            np.ndarray: float32 embedding vector
+        """
+        key = normalize_query(query)
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            with timed('query_embedding'):
+                vectors = await self.embedding_backend.embed_batch_async([query], task_type="retrieval_document")
+            embedding = np.array(vectors[0], dtype='float32')
+            self.query_embedding_cache.put(key, embedding)
+        return embedding
+    
+    def search_chunks(self, query: str, top_k: int = 5, nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None, options: Optional[SearchOptions] = None) -> List[Chunk]:
+        """
+        Search embeddings for the most relevant chunks and their metadata.
         
         Args:
             query (str): Search query
             top_k (int): Number of top results to return
+            nprobe (int): IVF lists to visit, overriding ``Config.INDEX_NPROBE``
+            ef_search (int): HNSW search depth, overriding ``Config.INDEX_EF_SEARCH``
+            options (SearchOptions): Partition routing and lexical weight for this search
         
         Returns:
-            List[str]: Most relevant text chunks
+            List[Chunk]: Most relevant chunks, best first
         """
-        # Load index and metadata
-        index = faiss.read_index(os.path.join(self.config.FAISS_INDEX_PATH, 'medical_index.faiss'))
+        return self.search_by_embedding(self.embed_query(query), top_k, nprobe, ef_search, query, options)
+    
+    def search_by_embedding(self, query_embedding: np.ndarray, top_k: int = 5, nprobe: Optional[int] = None,
+                            ef_search: Optional[int] = None, query: Optional[str] = None,
+                            options: Optional[SearchOptions] = None) -> List[Chunk]:
+        """
+        Search the index with an already computed query embedding.
         
-        with open(os.path.join(self.config.FAISS_INDEX_PATH, 'metadata.json'), 'r') as f:
-            metadata = json.load(f)
+        Args:
+            query_embedding (np.ndarray): Query embedding
+            top_k (int): Number of top results to return
+            nprobe (int): IVF lists to visit, overriding ``Config.INDEX_NPROBE``
+            ef_search (int): HNSW search depth, overriding ``Config.INDEX_EF_SEARCH``
+            query (str): Query text, needed for partition routing and lexical search
+            options (SearchOptions): Partition routing and lexical weight for this search
         
-        # Get query embedding
-        query_embedding = self._get_embedding(query).astype('float32')
-        query_embedding = query_embedding.reshape(1, -1)
+        Returns:
+            List[Chunk]: Most relevant chunks, best first
+        """
+        queries = None if query is None else [query]
+        return self.search_batch(np.asarray(query_embedding).reshape(1, -1), top_k, nprobe, ef_search,
+                                 queries, options)[0]
+    
+    def search_batch(self, query_embeddings: np.ndarray, top_k: int = 5, nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None, queries: Optional[List[str]] = None,
+                     options: Optional[SearchOptions] = None) -> List[List[Chunk]]:
+        """
+        Search the index for several query embeddings in one call.
         
-        # Search index
-        distances, indices = index.search(query_embedding, top_k)
+        Given the query texts, each query is routed to the disease
+        partitions it mentions, the index being searched through an ID
+        selector admitting only their chunks, and BM25 results from the
+        lexical index are fused with the vector results.
+        Without them the whole index is searched by vector alone.
         
-        # Retrieve relevant texts
-        relevant_texts = [metadata['texts'][i] for i in indices[0]]
+        Args:
+            query_embeddings (np.ndarray): Matrix with one query embedding per row
+            top_k (int): Number of top results per query
+            nprobe (int): IVF lists to visit, overriding ``Config.INDEX_NPROBE``
+            ef_search (int): HNSW search depth, overriding ``Config.INDEX_EF_SEARCH``
+            queries (List[str]): Query texts, one per row
+            options (SearchOptions): Partition routing and lexical weight; unset
+                fields default to ``Config.SEARCH_PARTITIONS`` and ``Config.HYBRID_LEXICAL_WEIGHT``
         
-        return relevant_texts
\ No newline at end of file
+        Returns:
+            List[List[Chunk]]: Most relevant chunks per query, best first
+        """
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype='float32')
+        options = options or SearchOptions()
+        route = self.config.SEARCH_PARTITIONS if options.partitions is None else options.partitions
+        lexical_weight = self.config.HYBRID_LEXICAL_WEIGHT if options.lexical_weight is None else options.lexical_weight
+        
+        if queries is not None and lexical_weight > 0:
+            # Built by the first fused search unless every publish builds it
+            self.index_manager.ensure_lexical()
+        
+        # Search the resident index
+        with self.index_manager.retrieval_snapshot() as resident:
+            fused = queries is not None and lexical_weight > 0 and resident.lexical is not None
+            candidates = top_k * self.config.HYBRID_CANDIDATES if fused else top_k
+            
+            # Queries routed to the same partitions are searched together; None is the whole index
+            targets = [self._route(query, route, resident) for query in queries] \
+                if queries is not None else [None] * len(query_embeddings)
+            groups: Dict[Optional[Tuple[str, ...]], List[int]] = {}
+            for row, target in enumerate(targets):
+                groups.setdefault(target, []).append(row)
+            
+            hits: List[Tuple[np.ndarray, np.ndarray]] = [None] * len(targets)
+            with timed('faiss_search'):
+                for target, rows in groups.items():
+                    selector = None if target is None else \
+                        partition_selector([resident.partitions[disease] for disease in target])
+                    for row, found in zip(rows, self._search_index(resident.index, query_embeddings[rows], candidates,
+                                                                   nprobe, ef_search, selector)):
+                        hits[row] = found
+            
+            results = []
+            for row, (ids, _) in enumerate(hits):
+                ids = ids.tolist()
+                if fused:
+                    with timed('lexical_search'):
+                        target = targets[row]
+                        ranges = None if target is None else \
+                            combined_ranges([resident.partitions[disease] for disease in target])
+                        lexical_ids, _ = resident.lexical.search(queries[row], candidates, ranges)
+                        # Chunks missing from the vector index have no distance to fuse
+                        lexical_ids = lexical_ids[contains_ids(resident.ids, lexical_ids)]
+                        ids = self._fuse(resident, query_embeddings[row], queries[row], hits[row], lexical_ids,
+                                         lexical_weight)
+                # Only the hits are read from the chunk store
+                results.append(resident.chunks.get_many(ids[:top_k]))
+            return results
+    
+    def _route(self, query: str, route, resident) -> Optional[Tuple[str, ...]]:
+        """
+        Pick the partitions a query searches; None searches the whole index.
+        """
+        partitions = resident.partitions
+        if route == ROUTE_ALL or not partitions:
+            return None
+        if route == ROUTE_AUTO:
+            # Queries naming no partitioned disease fall back to the whole index
+            target = tuple(disease for disease in self.router.route(query) if disease in partitions)
+            if not target:
+                return None
+        else:
+            target = tuple(disease for disease in route if disease in partitions)
+        # Partitions holding every chunk select nothing out, and filtering only slows the search
+        if sum(partitions[disease].size for disease in target) >= resident.index.ntotal:
+            return None
+        return target
+    
+    def _search_index(self, index, query_embeddings: np.ndarray, top_k: int, nprobe: Optional[int],
+                      ef_search: Optional[int], selector=None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Search the index, optionally only among the chunk IDs ``selector`` admits.
+        
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray]]: Chunk IDs and distances per query, closest first
+        """
+        params = search_parameters(
+            index,
+            nprobe=nprobe or self.config.INDEX_NPROBE,
+            ef_search=ef_search or self.config.INDEX_EF_SEARCH,
+            selector=selector
+        )
+        distances, ids = index.search(query_embeddings, top_k, params=params)
+        
+        nlist = index_nlist(index)
+        short = np.flatnonzero(ids[:, -1] == -1) if selector is not None and nlist else []
+        if len(short):
+            # The visited IVF lists may hold too few of the selected chunks; visit every list instead
+            params = search_parameters(index, nprobe=nlist, selector=selector)
+            distances[short], ids[short] = index.search(query_embeddings[short], top_k, params=params)
+        # -1 marks an empty slot
+        return [(row[row != -1], row_distances[row != -1]) for row, row_distances in zip(ids, distances)]
+    
+    @staticmethod
+    def _fuse(resident, query_embedding: np.ndarray, query: str, vector_hits: Tuple[np.ndarray, np.ndarray],
+              lexical_ids: np.ndarray, lexical_weight: float) -> List[int]:
+        """
+        Rank the union of vector and BM25 candidates by their fused scores.
+        
+        Each candidate is scored by both: distances of BM25-only candidates
+        are computed from their stored vectors, and BM25 scores of
+        vector-only candidates are looked up, so neither list wins by default.
+        """
+        vector_ids, vector_distances = vector_hits
+        candidates = np.union1d(vector_ids, lexical_ids).astype('int64')
+        distances = np.empty(len(candidates), dtype='float32')
+        found = np.isin(candidates, vector_ids)
+        distances[found] = vector_distances[np.argsort(vector_ids)]
+        vectors = reconstruct_vectors(resident.index, candidates[~found])
+        distances[~found] = np.sum((vectors - query_embedding) ** 2, axis=1)
+        return relative_score_fusion(candidates, distances, resident.lexical.score(query, candidates), lexical_weight)
+    
+    def search_embeddings(self, query: str, top_k: int = 5) -> List[str]:
+        """
+        Search embeddings for the most relevant text chunks.
+        
+        Args:
+            query (str): Search query
+            top_k (int): Number of top results to return
+        
+        Returns:
+            List[str]: Most relevant text chunks
+        """
+        return [chunk.text for chunk in self.search_chunks(query, top_k)]
+
+
+def upgrade_legacy_index(index, metadata: Dict):
+    """
+    Convert an index written before the binary chunk store existed.
+    
+    The oldest indexes are a plain ``IndexFlatL2`` whose row numbers double
+    as chunk IDs, with ``texts`` stored as a list and ``disease_mapping``
+    holding chunk counts in insertion order. Later ones are ID-mapped but
+    still keep ``texts`` in the JSON metadata.
+    
+    Args:
+        index (faiss.Index): Index read from disk
+        metadata (Dict): Metadata read from disk
+    
+    Returns:
+        Tuple[faiss.Index, Dict, ChunkStore]: ID-mapped index, metadata and
+            an in-memory chunk store
+    """
+    texts = metadata['texts']
+    
+    if isinstance(texts, list):
+        id_index = faiss.IndexIDMap2(faiss.IndexFlatL2(index.d))
+        if index.ntotal:
+            id_index.add_with_ids(index.reconstruct_n(0, index.ntotal), np.arange(index.ntotal, dtype='int64'))
+        index = id_index
+        texts = {str(i): text for i, text in enumerate(texts)}
+        
+        documents = {}
+        start = 0
+        for name, count in metadata['disease_mapping'].items():
+            # No hash is known, so the next initialisation re-indexes the document
+            documents[name] = {'ids': [start, start + count], 'sha256': None}
+            start += count
+        metadata = {
+            'documents': documents,
+            'next_id': len(texts),
+            'disease_mapping': dict(metadata['disease_mapping'])
+        }
+    else:
+        metadata = {key: value for key, value in metadata.items() if key != 'texts'}
+    
+    # Page ranges were not recorded, so every chunk is reported as page 0
+    chunks = []
+    for name, document in metadata['documents'].items():
+        start, end = document['ids']
+        for chunk_id in range(start, end):
+            chunks.append(Chunk(chunk_id, texts[str(chunk_id)], name, 0, 0, document.get('disease')))
+    chunks.sort(key=lambda chunk: chunk.id)
+    
+    return index, metadata, ChunkStore.from_chunks(chunks)
@@ -0,0 +1,127 @@
+import time
+import asyncio
+from typing import AsyncIterator, Iterator
+
+
+class GenerationBackend:
+    """
+    Turns a prompt into an answer, either at once or as a stream of text pieces.
+
+    Subclasses implement ``stream``; ``generate`` joins the pieces unless a
+    backend has a cheaper non-streaming call. The ``*_async`` variants serve
+    the asyncio path and by default run the blocking calls on a thread.
+    """
+    model_name = ''
+
+    def generate(self, prompt: str) -> str:
+        return ''.join(self.stream(prompt))
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        raise NotImplementedError
+
+    async def generate_async(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        yield await self.generate_async(prompt)
+
+
+class GeminiGenerationBackend(GenerationBackend):
+    def __init__(self, model_name: str = 'gemini-pro', api_key: str = ''):
+        """
+        Generate answers with a Gemini model.
+
+        The Gemini SDK is imported on construction, not with the module.
+
+        Args:
+            model_name (str): Gemini generation model
+            api_key (str): API key; the SDK's own environment lookup applies when empty
+        """
+        import google.generativeai as genai
+
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        # Pieces arrive as the model produces them rather than after the full completion
+        for chunk in self.model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+    async def generate_async(self, prompt: str) -> str:
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        async for chunk in await self.model.generate_content_async(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeGenerationBackend(GenerationBackend):
+    def __init__(self, answer_words: int = 60, first_token_delay: float = 0.0, token_delay: float = 0.0):
+        """
+        Deterministic local generator used in place of Gemini in tests.
+
+        The answer echoes the first ``answer_words`` words of the prompt,
+        one word per piece, with optional delays to mimic model latency.
+
+        Args:
+            answer_words (int): Words per answer
+            first_token_delay (float): Simulated seconds before the first word
+            token_delay (float): Simulated seconds between words
+        """
+        self.answer_words = answer_words
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.model_name = 'fake'
+        self.requests = 0
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        self.requests += 1
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+
+        for i, piece in enumerate(self._pieces(prompt)):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield piece
+
+    async def generate_async(self, prompt: str) -> str:
+        return ''.join([piece async for piece in self.stream_async(prompt)])
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        self.requests += 1
+        if self.first_token_delay:
+            await asyncio.sleep(self.first_token_delay)
+
+        for i, piece in enumerate(self._pieces(prompt)):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield piece
+
+    def _pieces(self, prompt: str) -> Iterator[str]:
+        for i, word in enumerate(prompt.split()[:self.answer_words]):
+            yield word if i == 0 else ' ' + word
+
+
+def create_generation_backend(config) -> GenerationBackend:
+    """
+    Build the generation backend named by ``config.GENERATION_BACKEND``.
+
+    Args:
+        config (Config): Configuration object
+
+    Returns:
+        GenerationBackend: Backend instance
+    """
+    if config.GENERATION_BACKEND == 'fake':
+        return FakeGenerationBackend()
+    if config.GENERATION_BACKEND == 'gemini':
+        return GeminiGenerationBackend(config.GENERATION_MODEL, config.GEMINI_API_KEY)
+    raise ValueError(f"Unknown generation backend: {config.GENERATION_BACKEND}")
@@ -0,0 +1,207 @@
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_KINDS = ('flat', 'ivf', 'hnsw', 'pq')
+
+# faiss wants roughly this many training points per centroid
+TRAINING_POINTS_PER_CENTROID = 39
+PQ_CENTROIDS = 256
+
+
+def choose_nlist(count: int) -> int:
+    """
+    Pick the number of IVF lists for a corpus of ``count`` vectors.
+    """
+    return max(1, min(65536, int(math.sqrt(count))))
+
+
+def resolve_kind(kind: str, count: int, nlist: Optional[int] = None) -> str:
+    """
+    Downgrade to a flat index until the corpus is large enough to train.
+
+    Args:
+        kind (str): Requested index kind
+        count (int): Number of vectors to index
+        nlist (int): IVF lists, chosen from ``count`` when omitted
+
+    Returns:
+        str: Index kind to build
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind: {kind}. Expected one of {INDEX_KINDS}")
+    if kind in ('ivf', 'pq'):
+        centroids = nlist or choose_nlist(count)
+        if kind == 'pq':
+            centroids = max(centroids, PQ_CENTROIDS)
+        if count < centroids * TRAINING_POINTS_PER_CENTROID:
+            return 'flat'
+    return kind
+
+
+def build_index(kind: str, vectors: np.ndarray, nlist: Optional[int] = None,
+                hnsw_m: int = 32, ef_construction: int = 200, pq_m: int = 16) -> faiss.Index:
+    """
+    Build and, where needed, train an empty index addressed by chunk ID.
+
+    Flat and HNSW indexes are wrapped in ``IndexIDMap2``. IVF indexes store
+    chunk IDs natively and keep a hash-table direct map, which lets them
+    remove and reconstruct vectors by ID. The vectors are only used for
+    training; callers add them with their chunk IDs afterwards.
+
+    Args:
+        kind (str): One of ``INDEX_KINDS``, already resolved for the corpus size
+        vectors (np.ndarray): Training vectors
+        nlist (int): IVF lists, chosen from the corpus size when omitted
+        hnsw_m (int): HNSW graph degree
+        ef_construction (int): HNSW build-time search depth
+        pq_m (int): Product-quantizer sub-vectors; lowered to divide the dimension
+
+    Returns:
+        faiss.Index: Index accepting ``add_with_ids``
+    """
+    dimension = vectors.shape[1]
+
+    if kind == 'flat':
+        index = faiss.IndexFlatL2(dimension)
+    elif kind == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+    elif kind in ('ivf', 'pq'):
+        nlist = nlist or choose_nlist(len(vectors))
+        quantizer = faiss.IndexFlatL2(dimension)
+        if kind == 'ivf':
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        else:
+            while dimension % pq_m:
+                pq_m -= 1
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, 8)
+        index.train(np.ascontiguousarray(vectors, dtype='float32'))
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+    else:
+        raise ValueError(f"Unknown index kind: {kind}. Expected one of {INDEX_KINDS}")
+
+    return faiss.IndexIDMap2(index)
+
+
+def index_kind(index: faiss.Index) -> str:
+    """
+    Report which of ``INDEX_KINDS`` an (optionally ID-mapped) index is.
+    """
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return 'pq'
+    if isinstance(inner, faiss.IndexIVF):
+        return 'ivf'
+    return 'flat'
+
+
+def index_nlist(index: faiss.Index) -> Optional[int]:
+    """
+    Return the number of IVF lists, or None for non-IVF indexes.
+    """
+    if index_kind(index) in ('ivf', 'pq'):
+        return faiss.extract_index_ivf(index).nlist
+    return None
+
+
+def index_ids(index: faiss.Index) -> np.ndarray:
+    """
+    Sorted chunk IDs of the vectors stored in an index.
+
+    ID-mapped indexes keep them in ``id_map`` and IVF indexes in their
+    inverted lists; a plain index numbers its rows.
+    """
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        ids = faiss.vector_to_array(index.id_map)
+    elif index_kind(index) in ('ivf', 'pq'):
+        invlists = faiss.extract_index_ivf(index).invlists
+        lists = []
+        for number in range(invlists.nlist):
+            size = invlists.list_size(number)
+            if size:
+                pointer = invlists.get_ids(number)
+                lists.append(faiss.rev_swig_ptr(pointer, size).copy())
+                invlists.release_ids(number, pointer)
+        ids = np.concatenate(lists) if lists else np.zeros(0, dtype='int64')
+    else:
+        ids = np.arange(index.ntotal)
+    return np.sort(ids.astype('int64'))
+
+
+def contains_ids(ids: np.ndarray, chunk_ids: np.ndarray) -> np.ndarray:
+    """
+    Mask of the ``chunk_ids`` found in the sorted ``ids``.
+    """
+    chunk_ids = np.asarray(chunk_ids, dtype='int64')
+    if not len(ids):
+        return np.zeros(len(chunk_ids), dtype=bool)
+    positions = np.minimum(np.searchsorted(ids, chunk_ids), len(ids) - 1)
+    return ids[positions] == chunk_ids
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """
+    Whether vectors can be removed in place; HNSW graphs must be rebuilt.
+    """
+    return index_kind(index) != 'hnsw'
+
+
+def needs_retraining(index: faiss.Index, kind: str, count: int) -> bool:
+    """
+    Whether an index should be rebuilt for a corpus of ``count`` vectors.
+
+    This is the case when the requested kind (after size fallback) differs
+    from the current one, or when an IVF index has grown or shrunk so much
+    that its number of lists is off by more than a factor of two.
+    """
+    desired = resolve_kind(kind, count)
+    if desired != index_kind(index):
+        return True
+    nlist = index_nlist(index)
+    return nlist is not None and not 0.5 <= nlist / choose_nlist(count) <= 2
+
+
+def reconstruct_vectors(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """
+    Read stored vectors back by chunk ID.
+
+    Reconstruction is exact for flat and HNSW indexes and approximate for
+    product-quantized ones.
+    """
+    if not len(ids):
+        return np.zeros((0, index.d), dtype='float32')
+    return np.vstack([index.reconstruct(int(chunk_id)) for chunk_id in ids]).astype('float32')
+
+
+def search_parameters(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                      selector: Optional[faiss.IDSelector] = None) -> Optional[faiss.SearchParameters]:
+    """
+    Build per-query search parameters for the index kind.
+
+    Parameters are passed to each search call rather than set on the
+    shared index, so concurrent requests can tune them independently.
+
+    Args:
+        index (faiss.Index): Index to be searched
+        nprobe (int): IVF lists to visit
+        ef_search (int): HNSW search depth
+        selector (faiss.IDSelector): Restricts results to the chunk IDs it selects
+
+    Returns:
+        Optional[faiss.SearchParameters]: Parameters, or None for defaults
+    """
+    kind = index_kind(index)
+    if kind in ('ivf', 'pq') and (nprobe or selector is not None):
+        return faiss.SearchParametersIVF(nprobe=nprobe or faiss.extract_index_ivf(index).nprobe, sel=selector)
+    if kind == 'hnsw' and (ef_search or selector is not None):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or faiss.downcast_index(index.index).hnsw.efSearch,
+                                          sel=selector)
+    if selector is not None:
+        return faiss.SearchParameters(sel=selector)
+    return None
@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+
+from src.chunk_store import Chunk, ChunkStore
+from src.index_factory import index_ids
+from src.lexical_index import LexicalIndex
+from src.metrics import timed
+from src.partitions import Partition, read_partitions
+
+
+class ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or a single writer.
+
+    Writers are given priority so a steady stream of searches cannot
+    starve an index swap.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read_locked(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_locked(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class Resident(NamedTuple):
+    """
+    Everything loaded from one index generation.
+    """
+    index: faiss.Index
+    metadata: Dict
+    chunks: ChunkStore
+    partitions: Dict[str, Partition]
+    lexical: Optional[LexicalIndex]
+    # Sorted chunk IDs held by the vector index
+    ids: np.ndarray
+
+
+def indexed_chunks(chunks: Iterable[Chunk], ids: np.ndarray) -> Iterable[Chunk]:
+    """
+    Chunks, in ascending ID order, whose IDs are among the sorted ``ids``.
+    """
+    ids = ids.tolist()
+    position = 0
+    for chunk in chunks:
+        while position < len(ids) and ids[position] < chunk.id:
+            position += 1
+        if position < len(ids) and ids[position] == chunk.id:
+            yield chunk
+
+
+class IndexManager:
+    INDEX_FILENAME = 'medical_index.faiss'
+    METADATA_FILENAME = 'metadata.json'
+    GENERATION_FILENAME = 'GENERATION'
+    GENERATIONS_DIRNAME = 'generations'
+
+    def __init__(self, index_dir: str, check_interval: float = 1.0, upgrade=None, mmap: bool = False,
+                 keep_generations: int = 2, build_lexical: bool = False):
+        """
+        Keep the FAISS index, its metadata and chunk store resident in memory.
+
+        The index and the small metadata manifest are loaded once and
+        shared by every request thread; chunk texts stay memory-mapped.
+        Each generation can also carry a BM25 lexical index over the chunk
+        texts, built at publish with ``build_lexical`` and otherwise by
+        ``ensure_lexical`` on first use; the chunk IDs of each disease
+        partition are derived from its metadata when it is loaded.
+        Each publish writes a complete generation into its own directory
+        and then names it in the ``GENERATION`` file, which other
+        processes check at most once per ``check_interval`` seconds, so
+        they switch to a rebuilt index as a whole without restarting.
+
+        With ``mmap`` the index is memory-mapped read-only instead of
+        copied into the process, so every worker process serving the same
+        generation shares one copy of it in the page cache.
+
+        Args:
+            index_dir (str): Directory holding the index and metadata files
+            check_interval (float): Minimum seconds between disk checks
+            upgrade (Callable): Hook converting ``(index, metadata)`` in a
+                legacy format that still embeds chunk texts into
+                ``(index, metadata, chunks)``
+            mmap (bool): Memory-map the index rather than reading it into memory
+            keep_generations (int): Published generations kept on disk, the
+                current one included, for processes still switching over
+            build_lexical (bool): Build the BM25 index at every publish
+        """
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, self.INDEX_FILENAME)
+        self.metadata_path = os.path.join(index_dir, self.METADATA_FILENAME)
+        self.generation_path = os.path.join(index_dir, self.GENERATION_FILENAME)
+        self.generations_dir = os.path.join(index_dir, self.GENERATIONS_DIRNAME)
+        self.check_interval = check_interval
+        self.upgrade = upgrade
+        self.mmap = mmap
+        self.keep_generations = max(1, keep_generations)
+        self.build_lexical = build_lexical
+
+        self._lock = ReadWriteLock()
+        self._reload_lock = threading.Lock()
+        self._lexical_lock = threading.Lock()
+        self._resident: Optional[Resident] = None
+        self._stamp = None
+        self._last_check = 0.0
+        self._listeners = []
+        self.version = 0
+        self.generation = None
+
+    def _file_stamp(self) -> Optional[Union[int, Tuple]]:
+        """
+        Identify what is on disk: the published generation, or for an index
+        written before generations existed, its files' modification stamps.
+        """
+        try:
+            with open(self.generation_path, 'r') as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            pass
+        try:
+            index_stat = os.stat(self.index_path)
+            metadata_stat = os.stat(self.metadata_path)
+        except FileNotFoundError:
+            return None
+        return (
+            index_stat.st_mtime_ns, index_stat.st_size,
+            metadata_stat.st_mtime_ns, metadata_stat.st_size
+        )
+
+    def _generation_dir(self, generation: int) -> str:
+        return os.path.join(self.generations_dir, f'{generation:08d}')
+
+    def _generations(self) -> List[int]:
+        try:
+            names = os.listdir(self.generations_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def _read_index(self, path: str):
+        if self.mmap:
+            # Flat codes, inverted lists and graphs are mapped rather than copied
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        return faiss.read_index(path)
+
+    def writable_copy(self, index):
+        """
+        Copy the resident index so it can be edited off to the side.
+
+        A clone of a memory-mapped index still points at the read-only
+        mapping, so it is copied through a serialized buffer instead.
+        """
+        if self.mmap:
+            return faiss.deserialize_index(faiss.serialize_index(index))
+        return faiss.clone_index(index)
+
+    def _load(self):
+        """
+        Read index, metadata and chunk store from disk and swap them in.
+        """
+        with self._reload_lock:
+            while True:
+                stamp = self._file_stamp()
+                if stamp is None:
+                    raise FileNotFoundError(
+                        f"FAISS index not found in {self.index_dir}. Initialize the chatbot first."
+                    )
+                if stamp == self._stamp:
+                    return
+                try:
+                    resident = self._read(stamp)
+                except FileNotFoundError:
+                    # The generation was pruned after a newer one was published; load that one
+                    if self._file_stamp() == stamp:
+                        raise
+                    continue
+                break
+
+            self._swap(resident, stamp)
+
+    def _read(self, stamp: Union[int, Tuple]) -> Resident:
+        directory = self._generation_dir(stamp) if isinstance(stamp, int) else self.index_dir
+        with timed('index_load'):
+            index = self._read_index(os.path.join(directory, self.INDEX_FILENAME))
+            with open(os.path.join(directory, self.METADATA_FILENAME), 'r') as f:
+                metadata = json.load(f)
+            if 'texts' in metadata and self.upgrade is not None:
+                # Legacy indexes have neither partitions nor a lexical index until rebuilt
+                index, metadata, chunks = self.upgrade(index, metadata)
+                return Resident(index, metadata, chunks, {}, None, index_ids(index))
+            chunks = ChunkStore.open(directory, metadata['chunk_sources'], metadata['chunk_diseases'])
+            return Resident(index, metadata, chunks, read_partitions(metadata['documents']),
+                            LexicalIndex.open(directory), index_ids(index))
+
+    def _swap(self, resident: Resident, stamp: Optional[Union[int, Tuple]]) -> None:
+        with self._lock.write_locked():
+            self._resident = resident
+            self._stamp = stamp
+            self.generation = stamp if isinstance(stamp, int) else None
+            self.version += 1
+
+        for listener in self._listeners:
+            listener(self.version)
+
+    def add_listener(self, listener) -> None:
+        """
+        Register a callable invoked with the new version after every swap.
+
+        Caches keyed on index contents use this to invalidate themselves.
+        """
+        self._listeners.append(listener)
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if self._resident is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        if self._resident is None or self._file_stamp() != self._stamp:
+            self._load()
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Yield the resident ``(index, metadata, chunks)`` under a read lock.
+
+        They are guaranteed not to be swapped out while the caller holds
+        them, so searches never mix an old index with new chunk texts.
+        """
+        self._maybe_reload()
+        with self._lock.read_locked():
+            yield self._resident[:3]
+
+    @contextmanager
+    def retrieval_snapshot(self):
+        """
+        Yield the whole resident ``Resident`` generation under a read lock,
+        partitions and lexical index included.
+        """
+        self._maybe_reload()
+        with self._lock.read_locked():
+            yield self._resident
+
+    def publish(self, index, metadata: Dict, chunks: Iterable[Chunk]) -> None:
+        """
+        Persist a new index generation and hot-swap it in.
+
+        The index, metadata and chunk store are written to a fresh
+        generation directory, and only then is the ``GENERATION`` file
+        replaced to name it, so other processes never read a partially
+        written or mixed index. Files of a published generation are never
+        modified, only a skipped BM25 index added, which keeps
+        memory-mapped readers safe; generations
+        beyond ``keep_generations`` are deleted.
+
+        Args:
+            index (faiss.Index): Newly built index
+            metadata (Dict): Metadata manifest for the index
+            chunks (Iterable[Chunk]): Chunks in ascending ID order
+        """
+        os.makedirs(self.generations_dir, exist_ok=True)
+        with self._reload_lock:
+            generation = self._claim_generation()
+            directory = self._generation_dir(generation)
+
+            sources, diseases = ChunkStore.write(directory, chunks)
+            chunk_store = ChunkStore.open(directory, sources, diseases)
+            ids = index_ids(index)
+            if self.build_lexical:
+                # Only over the chunks the vector index holds, as in ensure_lexical
+                with timed('lexical_index_build'):
+                    LexicalIndex.write(directory, indexed_chunks(chunk_store.iter_chunks(), ids))
+            metadata = dict(metadata, chunk_sources=sources, chunk_diseases=diseases)
+            index_path = os.path.join(directory, self.INDEX_FILENAME)
+            faiss.write_index(index, index_path)
+            with open(os.path.join(directory, self.METADATA_FILENAME), 'w') as f:
+                json.dump(metadata, f)
+
+            tmp_generation_path = f'{self.generation_path}.{os.getpid()}.tmp'
+            with open(tmp_generation_path, 'w') as f:
+                f.write(str(generation))
+            os.replace(tmp_generation_path, self.generation_path)
+
+            if self.mmap:
+                # Serve the shared mapping rather than this process's private copy
+                index = self._read_index(index_path)
+            resident = Resident(index, metadata, chunk_store, read_partitions(metadata['documents']),
+                                LexicalIndex.open(directory), ids)
+            self._swap(resident, generation)
+            self._prune(generation)
+
+    def ensure_lexical(self) -> None:
+        """
+        Build the resident generation's BM25 index if publish skipped it.
+
+        Requests can opt into lexical fusion while it is off by default,
+        and the first of them pays for the build. The files are added to
+        the generation directory, where other processes and restarts find
+        them. Legacy indexes get none until they are rebuilt.
+        """
+        self._maybe_reload()
+        with self._lock.read_locked():
+            resident, generation = self._resident, self.generation
+        if resident.lexical is not None or generation is None:
+            return
+
+        with self._lexical_lock:
+            directory = self._generation_dir(generation)
+            lexical = LexicalIndex.open(directory)
+            if lexical is None:
+                try:
+                    # BM25 covers exactly the chunks the vector index holds, so
+                    # every lexical candidate can be scored by distance too
+                    with timed('lexical_index_build'):
+                        LexicalIndex.write(directory, indexed_chunks(resident.chunks.iter_chunks(), resident.ids))
+                except FileNotFoundError:
+                    # A newer generation was published and this one pruned
+                    return
+                lexical = LexicalIndex.open(directory)
+            with self._lock.write_locked():
+                if self._resident is resident:
+                    self._resident = resident._replace(lexical=lexical)
+
+    def _claim_generation(self) -> int:
+        """
+        Create the next generation's directory; creation fails if another
+        process claimed the same number first.
+        """
+        generation = max(self._generations(), default=0) + 1
+        while True:
+            try:
+                os.mkdir(self._generation_dir(generation))
+                return generation
+            except FileExistsError:
+                generation += 1
+
+    def _prune(self, current: int) -> None:
+        # Processes still mapping a deleted generation keep its pages until they switch
+        for generation in self._generations():
+            if generation <= current - self.keep_generations:
+                shutil.rmtree(self._generation_dir(generation), ignore_errors=True)
@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import threading
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.chunk_store import Chunk
+from src.partitions import within_ranges
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by can do does for from has have how i if in is it its my of on or should '
+    'that the their then there these this to was were what when which who why will with you your'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _write_replacing(path: str, write) -> None:
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over chunk texts, stored next to the vector index.
+
+    The postings of each term are one contiguous run in two arrays, chunk
+    IDs and the term's BM25 weight in that chunk, which are memory-mapped
+    like the vector index. Scoring a query sums the runs of its terms, so
+    its cost depends on how common the terms are, not on the corpus size.
+    Exact clinical terms such as drug names or ``eGFR``, which dense
+    embeddings blur, are matched as written.
+    """
+    TERMS_FILENAME = 'lexical_terms.json'
+    IDS_FILENAME = 'lexical_ids.npy'
+    WEIGHTS_FILENAME = 'lexical_weights.npy'
+
+    def __init__(self, terms: Dict[str, List[int]], ids: np.ndarray, weights: np.ndarray):
+        """
+        Args:
+            terms (Dict[str, List[int]]): Term to its ``[start, end)`` run in the arrays
+            ids (np.ndarray): Chunk IDs of all postings
+            weights (np.ndarray): BM25 weight of each posting
+        """
+        self.terms = terms
+        self.ids = ids
+        self.weights = weights
+
+    @classmethod
+    def write(cls, index_dir: str, chunks: Iterable[Chunk], k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        Build the index files for chunks in ascending ID order.
+
+        Args:
+            index_dir (str): Destination directory
+            chunks (Iterable[Chunk]): Chunks to index
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalisation
+        """
+        # A term seen for the first time is numbered by the vocabulary's size
+        vocabulary: Dict[str, int] = defaultdict()
+        vocabulary.default_factory = vocabulary.__len__
+        term_numbers, frequencies = array('i'), array('f')
+        # One entry per chunk; postings are expanded to them with numpy
+        chunk_ids, lengths, posting_counts = array('q'), array('f'), array('q')
+        for chunk in chunks:
+            counts = Counter(tokenize(chunk.text))
+            term_numbers.extend(map(vocabulary.__getitem__, counts))
+            frequencies.extend(counts.values())
+            chunk_ids.append(chunk.id)
+            lengths.append(sum(counts.values()))
+            posting_counts.append(len(counts))
+        chunk_count = len(chunk_ids)
+        total_length = float(np.sum(np.frombuffer(lengths, dtype='float32'), dtype='float64'))
+        posting_counts = np.frombuffer(posting_counts, dtype='int64')
+        chunk_ids = np.repeat(np.frombuffer(chunk_ids, dtype='int64'), posting_counts)
+        lengths = np.repeat(np.frombuffer(lengths, dtype='float32'), posting_counts)
+
+        term_numbers = np.frombuffer(term_numbers, dtype='int32')
+        # A stable sort keeps each term's postings in chunk ID order
+        order = np.argsort(term_numbers, kind='stable')
+        document_frequency = np.bincount(term_numbers, minlength=len(vocabulary))
+        idf = np.log1p((chunk_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        frequency = np.frombuffer(frequencies, dtype='float32')[order]
+        length = lengths[order]
+        average_length = total_length / chunk_count if chunk_count else 1.0
+        weights = idf[term_numbers[order]] * frequency * (k1 + 1) / (
+            frequency + k1 * (1 - b + b * length / max(average_length, 1.0)))
+
+        ends = np.cumsum(document_frequency)
+        terms = {term: [int(ends[number] - document_frequency[number]), int(ends[number])]
+                 for term, number in vocabulary.items()}
+
+        # Files are renamed into place, the manifest last: the index may be built
+        # after publish, while other processes look for it in the same directory
+        _write_replacing(os.path.join(index_dir, cls.IDS_FILENAME), lambda f: np.save(f, chunk_ids[order]))
+        _write_replacing(os.path.join(index_dir, cls.WEIGHTS_FILENAME),
+                         lambda f: np.save(f, weights.astype('float32')))
+        manifest = json.dumps({'terms': terms, 'chunks': chunk_count, 'k1': k1, 'b': b})
+        _write_replacing(os.path.join(index_dir, cls.TERMS_FILENAME), lambda f: f.write(manifest.encode('utf-8')))
+
+    @classmethod
+    def open(cls, index_dir: str) -> Optional['LexicalIndex']:
+        """
+        Memory-map the index files in a directory; None if it has none.
+        """
+        try:
+            with open(os.path.join(index_dir, cls.TERMS_FILENAME), 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(
+            manifest['terms'],
+            np.load(os.path.join(index_dir, cls.IDS_FILENAME), mmap_mode='r'),
+            np.load(os.path.join(index_dir, cls.WEIGHTS_FILENAME), mmap_mode='r')
+        )
+
+    def _postings(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        runs = [self.terms[term] for term in set(tokenize(query)) if term in self.terms]
+        if not runs:
+            return np.zeros(0, dtype='int64'), np.zeros(0, dtype='float32')
+        return (np.concatenate([self.ids[start:end] for start, end in runs]),
+                np.concatenate([self.weights[start:end] for start, end in runs]))
+
+    def search(self, query: str, top_k: int = 5, ranges: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank chunks by BM25 score for a query.
+
+        Args:
+            query (str): Search query
+            top_k (int): Number of top results to return
+            ranges (np.ndarray): Only score chunks in these ``[start, end)`` ID ranges
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Chunk IDs and their scores, best first
+        """
+        ids, weights = self._postings(query)
+        if ranges is not None:
+            mask = within_ranges(ids, ranges)
+            ids, weights = ids[mask], weights[mask]
+
+        unique, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        # Ties go to the lower chunk ID, so results are deterministic
+        best = best[np.lexsort((unique[best], -scores[best]))]
+        return unique[best], scores[best].astype('float32')
+
+    def score(self, query: str, chunk_ids: np.ndarray) -> np.ndarray:
+        """
+        BM25 scores of the given chunks for a query; 0 for chunks without its terms.
+        """
+        chunk_ids = np.asarray(chunk_ids, dtype='int64')
+        if not len(chunk_ids):
+            return np.zeros(0, dtype='float32')
+        ids, weights = self._postings(query)
+        order = np.argsort(chunk_ids)
+        matched = order[np.minimum(np.searchsorted(chunk_ids, ids, sorter=order), len(chunk_ids) - 1)]
+        hit = chunk_ids[matched] == ids
+        return np.bincount(matched[hit], weights=weights[hit], minlength=len(chunk_ids)).astype('float32')
@@ -0,0 +1,189 @@
+import bisect
+import time
+import threading
+import contextlib
+import contextvars
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; spans sub-millisecond FAISS searches up to slow generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Tokens; spans a trimmed chunk up to a full unbudgeted context
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Cumulative histogram in the Prometheus data model.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            label_names (Sequence[str]): Names of the labels observations carry
+            buckets (Sequence[float]): Upper bounds of the buckets, ascending
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+
+        for label_values, counts, total, count in sorted(series):
+            labels = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the process's histograms and renders them for ``/metrics``.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, label_names, buckets)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'rag_stage_seconds',
+    'Time spent in each stage of the RAG and consultation pipelines.',
+    ('stage',)
+)
+
+CONTEXT_TOKENS = REGISTRY.histogram(
+    'rag_context_tokens',
+    'Context tokens per generated answer: retrieved, sent to the model, and saved by context assembly.',
+    ('kind',),
+    buckets=TOKEN_BUCKETS
+)
+
+# Per-request stage totals, set while a request collects its timing breakdown
+_breakdown: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar('breakdown', default=None)
+# Per-request counts, set while a request collects its usage
+_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar('usage', default=None)
+
+
+class timed:
+    """
+    Time a pipeline stage into ``rag_stage_seconds``.
+
+    The duration is also added to the current request's breakdown when
+    one is being collected with ``collect_timings``. A plain class is
+    used rather than a generator-based context manager, which costs
+    several times more per use.
+    """
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> 'timed':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.stage)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown[self.stage] = breakdown.get(self.stage, 0.0) + elapsed
+        return False
+
+
+@contextlib.contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """
+    Collect the stage durations of the enclosed work into a dict.
+
+    Work handed to ``asyncio.to_thread`` is included; work done on other
+    threads, such as coalesced query batches, is only timed as a whole.
+
+    Yields:
+        Dict[str, float]: Stage name to seconds, filled in as stages finish
+    """
+    breakdown: Dict[str, float] = {}
+    token = _breakdown.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _breakdown.reset(token)
+
+
+@contextlib.contextmanager
+def collect_usage() -> Iterator[Dict[str, int]]:
+    """
+    Collect the counts recorded by the enclosed work, such as context
+    tokens, into a dict; the counterpart of ``collect_timings``.
+
+    Yields:
+        Dict[str, int]: Count name to total, filled in as they are recorded
+    """
+    usage: Dict[str, int] = {}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def record_usage(**counts: int) -> None:
+    """
+    Add counts to the current request's usage, if one is being collected.
+    """
+    usage = _usage.get()
+    if usage is not None:
+        for name, count in counts.items():
+            usage[name] = usage.get(name, 0) + count
+
+
+def timings_ms(breakdown: Dict[str, float]) -> Dict[str, float]:
+    """
+    Round a breakdown to milliseconds for JSON responses.
+    """
+    return {stage: round(seconds * 1000, 3) for stage, seconds in breakdown.items()}
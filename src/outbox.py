@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import random
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Message kind -> (HTTP method, backend path, status that means delivered)
+ROUTES = {
+    'summary': ('POST', '/post_summary', 201),
+    'priority': ('POST', '/post_priority', 201),
+    'disease': ('GET', '/get_disease', 200),
+}
+
+# Statuses worth retrying; any other failure is permanent
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class Outbox:
+    def __init__(self, path: str, server: str, batch_size: int = 20, connect_timeout: float = 3.0,
+                 read_timeout: float = 10.0, max_attempts: int = 8, initial_backoff: float = 0.5,
+                 max_backoff: float = 60.0, pool_size: int = 4):
+        """
+        Durable queue of backend notifications, delivered in the background.
+
+        ``enqueue`` only writes a row to a local SQLite file, so callers
+        never wait on the backend, and messages survive a restart. A
+        worker thread drains due messages in batches, sent concurrently
+        over one pooled keep-alive session with timeouts. Failed sends are retried with
+        exponential backoff, and messages that fail permanently or run
+        out of attempts are kept as ``dead`` for inspection.
+
+        Args:
+            path (str): SQLite database file
+            server (str): Backend base URL
+            batch_size (int): Most messages sent per drain pass
+            connect_timeout (float): Seconds to establish a connection
+            read_timeout (float): Seconds to wait for a response
+            max_attempts (int): Sends before a message is given up on
+            initial_backoff (float): First retry delay in seconds
+            max_backoff (float): Upper bound on a retry delay in seconds
+            pool_size (int): Kept-alive connections, and messages in flight, to the backend
+        """
+        self.path = path
+        self.server = server.rstrip('/')
+        self.batch_size = batch_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self.delivered = 0
+        self.failed_attempts = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, '
+            "status TEXT NOT NULL DEFAULT 'pending', last_error TEXT, created_at REAL NOT NULL)"
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)')
+        self._conn.commit()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._senders = ThreadPoolExecutor(pool_size, thread_name_prefix='outbox-send')
+
+        self._wakeup = threading.Event()
+        self._idle = threading.Condition()
+        self._stopping = False
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the delivery worker; messages left from a previous run are sent too.
+        """
+        with self._lock:
+            if self._worker is None:
+                self._stopping = False
+                self._worker = threading.Thread(target=self._run, name='outbox', daemon=True)
+                self._worker.start()
+
+    def enqueue(self, kind: str, payload: Dict) -> int:
+        """
+        Persist a message for delivery and return immediately.
+
+        Args:
+            kind (str): One of ``ROUTES``
+            payload (Dict): JSON body, or query parameters for GET routes
+
+        Returns:
+            int: Message id
+        """
+        if kind not in ROUTES:
+            raise ValueError(f"Unknown outbox message kind: {kind}")
+        now = time.time()
+        with self._db_lock:
+            cursor = self._conn.execute(
+                'INSERT INTO outbox (kind, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)',
+                (kind, json.dumps(payload), now, now)
+            )
+            self._conn.commit()
+        self.start()
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def _due(self) -> Tuple[List[Tuple[int, str, str, int]], Optional[float]]:
+        """
+        Return the next batch of due messages and when the next one after them falls due.
+        """
+        with self._db_lock:
+            batch = self._conn.execute(
+                "SELECT id, kind, payload, attempts FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                'ORDER BY id LIMIT ?',
+                (time.time(), self.batch_size)
+            ).fetchall()
+            next_due = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()[0]
+        return batch, next_due
+
+    def _send(self, kind: str, payload: Dict) -> Tuple[bool, bool, Optional[str]]:
+        """
+        Deliver one message; returns ``(delivered, retryable, error)``.
+        """
+        method, path, expected_status = ROUTES[kind]
+        url = self.server + path
+        try:
+            with timed('backend_post'):
+                if method == 'GET':
+                    response = self._session.get(url, params=payload, timeout=self.timeout)
+                else:
+                    response = self._session.post(url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            return False, True, f'{type(e).__name__}: {e}'
+
+        if response.status_code == expected_status:
+            return True, False, None
+        return False, response.status_code in RETRYABLE_STATUSES, f'HTTP {response.status_code}: {response.text[:200]}'
+
+    def drain_once(self) -> Optional[float]:
+        """
+        Send one batch of due messages.
+
+        Returns:
+            Optional[float]: When the next pending message falls due, if any
+        """
+        batch, next_due = self._due()
+        if not batch:
+            return next_due
+
+        # The first message probes the backend; the rest go out together if it answered
+        outcomes = [self._send(batch[0][1], json.loads(batch[0][2]))]
+        ok, retryable, error = outcomes[0]
+        reachable = ok or not retryable or error.startswith('HTTP')
+        if reachable:
+            outcomes += self._senders.map(lambda message: self._send(message[1], json.loads(message[2])), batch[1:])
+
+        delivered, retries, dead, deferred = [], [], [], []
+        for (message_id, _, _, attempts), (ok, retryable, error) in zip(batch, outcomes):
+            if ok:
+                delivered.append((message_id,))
+            elif retryable and attempts + 1 < self.max_attempts:
+                delay = min(self.max_backoff, self.initial_backoff * (2 ** attempts))
+                delay += random.uniform(0, delay / 4)
+                retries.append((time.time() + delay, error, message_id))
+            else:
+                dead.append((error, message_id))
+
+        if not reachable:
+            # The backend did not answer; the rest of the batch waits with the probe
+            deferred = [(retries[0][0], message_id) for message_id, _, _, _ in batch[1:]] if retries else []
+
+        # One transaction records the outcome of the whole batch
+        with self._db_lock:
+            self._conn.executemany('DELETE FROM outbox WHERE id = ?', delivered)
+            self._conn.executemany(
+                'UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?',
+                retries
+            )
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, status = 'dead', last_error = ? WHERE id = ?",
+                dead
+            )
+            self._conn.executemany('UPDATE outbox SET next_attempt_at = ? WHERE id = ?', deferred)
+            self._conn.commit()
+
+        with self._lock:
+            self.delivered += len(delivered)
+            self.failed_attempts += len(retries) + len(dead)
+        for error, message_id in dead:
+            logger.error("Outbox message %s given up: %s", message_id, error)
+        return time.time()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            # Cleared before draining so a message enqueued meanwhile is not missed
+            self._wakeup.clear()
+            next_due = self.drain_once()
+            if next_due is None:
+                with self._idle:
+                    self._idle.notify_all()
+                self._wakeup.wait()
+            elif next_due > time.time():
+                self._wakeup.wait(next_due - time.time())
+
+    def pending(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Wait until every pending message has been delivered or given up on.
+
+        Returns:
+            bool: Whether the outbox emptied within ``timeout`` seconds
+        """
+        deadline = time.monotonic() + timeout
+        self.start()
+        self._wakeup.set()
+        with self._idle:
+            while self.pending():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 0.1))
+        return True
+
+    def stats(self) -> Dict:
+        with self._db_lock:
+            counts = dict(self._conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall())
+        return {
+            'pending': counts.get('pending', 0),
+            'dead': counts.get('dead', 0),
+            'delivered': self.delivered,
+            'failed_attempts': self.failed_attempts,
+            'batch_size': self.batch_size
+        }
+
+    def close(self) -> None:
+        """
+        Stop the worker; undelivered messages stay on disk for the next start.
+        """
+        with self._lock:
+            worker, self._worker = self._worker, None
+            self._stopping = True
+        self._wakeup.set()
+        if worker is not None:
+            worker.join()
+        self._senders.shutdown()
+        self._session.close()
+        with self._db_lock:
+            self._conn.close()
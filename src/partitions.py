@@ -0,0 +1,190 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import faiss
+import numpy as np
+
+# Search the partitions of the diseases a query mentions, or every chunk
+ROUTE_AUTO = 'auto'
+ROUTE_ALL = 'all'
+
+class SearchOptions(NamedTuple):
+    """
+    Per-request retrieval settings; fields left as None use the configuration.
+
+    ``partitions`` is ``ROUTE_AUTO``, ``ROUTE_ALL`` or a tuple of disease
+    names, and ``lexical_weight`` the share of BM25 in the fused ranking.
+    """
+    partitions: Union[str, Tuple[str, ...], None] = None
+    lexical_weight: Optional[float] = None
+
+
+class Partition(NamedTuple):
+    """
+    Chunk ID ranges of one disease, the same IDs as a bitmap, and an ID selector over it.
+    """
+    ranges: np.ndarray
+    bitmap: np.ndarray
+    selector: faiss.IDSelector
+    size: int
+
+
+def search_options_from(data: Dict) -> Optional[SearchOptions]:
+    """
+    Read ``partitions`` and ``lexical_weight`` from a request body.
+
+    Returns:
+        Optional[SearchOptions]: None when the request sets neither
+
+    Raises:
+        ValueError: If either is malformed
+    """
+    partitions = data.get('partitions')
+    lexical_weight = data.get('lexical_weight')
+    if partitions is None and lexical_weight is None:
+        return None
+
+    if isinstance(partitions, list):
+        if not all(isinstance(name, str) for name in partitions):
+            raise ValueError("partitions must be 'auto', 'all' or a list of disease names")
+        partitions = tuple(partitions)
+    elif partitions is not None and partitions not in (ROUTE_AUTO, ROUTE_ALL):
+        raise ValueError("partitions must be 'auto', 'all' or a list of disease names")
+
+    if lexical_weight is not None:
+        if isinstance(lexical_weight, bool) or not isinstance(lexical_weight, (int, float)) \
+                or not 0 <= lexical_weight <= 1:
+            raise ValueError("lexical_weight must be a number between 0 and 1")
+        lexical_weight = float(lexical_weight)
+    return SearchOptions(partitions, lexical_weight)
+
+
+class DiseaseRouter:
+    """
+    Route a query to the diseases whose keywords it mentions.
+
+    The same keywords tag documents with their disease when they are
+    indexed, so a routed query searches the documents tagged alike.
+    """
+    __slots__ = ('keywords',)
+
+    def __init__(self, disease_keywords: Dict[str, Sequence[str]]):
+        self.keywords = {disease: tuple(keyword.lower() for keyword in keywords)
+                         for disease, keywords in disease_keywords.items()}
+
+    def route(self, query: str) -> Tuple[str, ...]:
+        lowered = query.lower()
+        return tuple(disease for disease, keywords in self.keywords.items()
+                     if any(keyword in lowered for keyword in keywords))
+
+
+def partition_documents(documents: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """
+    Group indexed document names by their disease tag; untagged ones belong to no partition.
+    """
+    partitions: Dict[str, List[str]] = {}
+    for name in sorted(documents):
+        disease = documents[name].get('disease')
+        if disease is not None:
+            partitions.setdefault(disease, []).append(name)
+    return partitions
+
+
+def partition_ranges(documents: Dict[str, Dict], names: Sequence[str]) -> np.ndarray:
+    """
+    Chunk ID ranges of the given documents as a sorted ``(n, 2)`` array of ``[start, end)``.
+    """
+    ranges = sorted(tuple(documents[name]['ids']) for name in names)
+    return np.array(ranges, dtype='int64').reshape(-1, 2)
+
+
+def combined_ranges(partitions: Sequence[Partition]) -> np.ndarray:
+    """
+    Chunk ID ranges of several partitions, sorted.
+    """
+    if not partitions:
+        return np.zeros((0, 2), dtype='int64')
+    ranges = np.concatenate([partition.ranges for partition in partitions])
+    return ranges[np.argsort(ranges[:, 0], kind='stable')]
+
+
+def within_ranges(ids: np.ndarray, ranges: np.ndarray) -> np.ndarray:
+    """
+    Mask of the IDs that fall in one of the sorted, disjoint ``[start, end)`` ranges.
+    """
+    if not len(ranges):
+        return np.zeros(len(ids), dtype=bool)
+    positions = np.searchsorted(ranges[:, 0], ids, side='right') - 1
+    return (positions >= 0) & (ids < ranges[np.maximum(positions, 0), 1])
+
+
+def read_partitions(documents: Dict[str, Dict]) -> Dict[str, Partition]:
+    """
+    Derive each disease partition of an index from its document manifest.
+
+    Partitions are not stored as indexes of their own: a routed search
+    filters the main index by the partition's chunk IDs, so it uses the
+    configured index kind and holds no second copy of the vectors.
+    """
+    partitions = {disease: partition_ranges(documents, names)
+                  for disease, names in partition_documents(documents).items()}
+    # One length for every bitmap, so those of several partitions can be combined
+    size = max((int(ranges[-1, 1]) for ranges in partitions.values() if len(ranges)), default=0)
+    return {disease: partition(ranges, range_bitmap(ranges, size)) for disease, ranges in partitions.items()}
+
+
+def partition(ranges: np.ndarray, bitmap: np.ndarray) -> Partition:
+    selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+    # The selector only points into the bitmap, which must outlive it
+    selector.referenced_objects = [bitmap]
+    return Partition(ranges, bitmap, selector, int(np.sum(ranges[:, 1] - ranges[:, 0])))
+
+
+def range_bitmap(ranges: np.ndarray, size: int) -> np.ndarray:
+    """
+    Bitmap of the chunk IDs in ``ranges``, bit ``i % 8`` of byte ``i // 8`` standing for ID ``i``.
+    """
+    selected = np.zeros(size, dtype=bool)
+    for start, end in ranges:
+        selected[start:end] = True
+    return np.packbits(selected, bitorder='little')
+
+
+def partition_selector(partitions: Sequence[Partition]) -> faiss.IDSelector:
+    """
+    ID selector admitting the chunks of any of the given partitions.
+    """
+    if len(partitions) == 1:
+        return partitions[0].selector
+    # No partitions select no chunks
+    bitmap = np.bitwise_or.reduce([member.bitmap for member in partitions]) if partitions else np.zeros(1, dtype='uint8')
+    return partition(combined_ranges(partitions), bitmap).selector
+
+
+def relative_score_fusion(ids: np.ndarray, vector_distances: np.ndarray, lexical_scores: np.ndarray,
+                          lexical_weight: float) -> List[int]:
+    """
+    Rank candidates by a weighted sum of their vector and BM25 scores,
+    each rescaled to ``[0, 1]`` over the candidates.
+
+    Scores keep their magnitude, unlike ranks, so the one chunk matching a
+    rare exact term can outrank chunks that sit fairly high in both lists.
+
+    Args:
+        ids (np.ndarray): Candidate chunk IDs
+        vector_distances (np.ndarray): Distance of each candidate to the query; lower is closer
+        lexical_scores (np.ndarray): BM25 score of each candidate
+        lexical_weight (float): Share of the BM25 score, between 0 and 1
+
+    Returns:
+        List[int]: IDs by fused score, best first
+    """
+    if not len(ids):
+        return []
+
+    def rescale(values: np.ndarray) -> np.ndarray:
+        spread = values.max() - values.min()
+        return (values - values.min()) / spread if spread > 0 else np.zeros_like(values)
+
+    fused = (1 - lexical_weight) * rescale(-vector_distances) + lexical_weight * rescale(lexical_scores)
+    # Ties go to the lower chunk ID, so results are deterministic
+    return ids[np.lexsort((ids, -fused))].tolist()
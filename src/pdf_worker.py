@@ -0,0 +1,45 @@
+"""
+Entry point of the PDF extraction processes.
+
+``DocumentProcessor`` starts these as ``python -m src.pdf_worker`` instead
+of using multiprocessing, whose workers re-import the parent's ``__main__``:
+started from a server script, that would repeat the script's start-up
+work (clients, background threads) in every worker. Here the worker is
+its own ``__main__`` and imports only the extractor.
+
+Requests are pickled ``(filepath, max_pages)`` tuples on stdin. Each is
+answered on stdout with ``(pages, seconds)``, or with the exception the
+extraction raised. The worker exits when stdin closes.
+"""
+import pickle
+import signal
+import sys
+
+from src.document_processor import _extract_pdf_pages
+
+
+def main():
+    requests, responses = sys.stdin.buffer, sys.stdout.buffer
+    # Output from PDF parsing must not corrupt the response stream
+    sys.stdout = sys.stderr
+    # Interrupts are the parent's to handle; it stops us by closing stdin
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        try:
+            filepath, max_pages = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            response = pickle.dumps(_extract_pdf_pages(filepath, max_pages))
+        except Exception as e:
+            try:
+                response = pickle.dumps(e)
+            except Exception:
+                response = pickle.dumps(RuntimeError(str(e)))
+        responses.write(response)
+        responses.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_EDGE_PUNCTUATION = re.compile(r'^[\W_]+|[\W_]+$')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalise a query for cache lookups.
+
+    Case, repeated whitespace and leading or trailing punctuation are
+    ignored, so "What is HbA1c?" and "what is hba1c" share an entry.
+    """
+    return _EDGE_PUNCTUATION.sub('', ' '.join(query.lower().split()))
+
+
+class LRUTTLCache:
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600.0):
+        """
+        Thread-safe in-memory cache with LRU eviction and expiry.
+
+        Args:
+            max_entries (int): Maximum number of entries kept
+            ttl (float): Seconds an entry stays valid; None never expires
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }
@@ -0,0 +1,152 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.chunk_store import Chunk
+from src.partitions import SearchOptions
+
+
+class QueryCoalescer:
+    def __init__(self, embedding_store, max_batch_size: int = 32, max_wait: float = 0.003,
+                 max_in_flight: int = 4):
+        """
+        Micro-batch retrieval for queries arriving from concurrent requests.
+
+        Queries submitted within ``max_wait`` seconds of the first one in a
+        batch are embedded with a single backend request and searched with
+        one multi-row FAISS call; each caller then gets its own row back.
+        A query arriving while nothing else is queued or being searched is
+        sent at once, so lone requests never pay ``max_wait``. While all
+        ``max_in_flight`` batches are busy, arriving queries keep
+        accumulating, so batches grow with load.
+
+        Args:
+            embedding_store (EmbeddingStore): Store used to embed and search
+            max_batch_size (int): Most queries per batch
+            max_wait (float): Seconds a batch waits for more queries
+            max_in_flight (int): Batches processed concurrently
+        """
+        self.embedding_store = embedding_store
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+
+        self.batches = 0
+        self.queries = 0
+        self.full_batches = 0
+
+        self._pending = queue.SimpleQueue()
+        self._in_flight = 0
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_in_flight, thread_name_prefix='query-batch')
+        self._collector = None
+        self._lock = threading.Lock()
+
+    def submit(self, query: str, top_k: int = 5, options: Optional[SearchOptions] = None) -> Future:
+        """
+        Queue a query for the next batch.
+
+        Args:
+            query (str): Search query
+            top_k (int): Number of top results to return
+            options (SearchOptions): Partition routing and lexical weight for this search
+
+        Returns:
+            Future: Resolves to ``(query embedding, chunks)``
+        """
+        with self._lock:
+            if self._collector is None:
+                # Started on first use so ingestion-only processes never spawn it
+                self._collector = threading.Thread(target=self._collect, name='query-coalescer', daemon=True)
+                self._collector.start()
+
+        future = Future()
+        self._pending.put((query, top_k, options, future))
+        return future
+
+    def search(self, query: str, top_k: int = 5,
+               options: Optional[SearchOptions] = None) -> Tuple[np.ndarray, List[Chunk]]:
+        """
+        Embed and search one query as part of a batch, blocking until done.
+
+        Returns:
+            Tuple[np.ndarray, List[Chunk]]: Query embedding and most relevant chunks
+        """
+        return self.submit(query, top_k, options).result()
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            # Waiting only pays off when other queries are arriving
+            idle = not self._in_flight and self._pending.empty()
+            deadline = time.monotonic() + self.max_wait
+            while not idle and len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Queries arriving while every batch slot is busy join this batch
+            self._slots.acquire()
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                self._in_flight += 1
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: List[Tuple[str, int, Optional[SearchOptions], Future]]) -> None:
+        try:
+            embeddings = self.embedding_store.embed_queries([query for query, _, _, _ in batch])
+            # Queries with the same retrieval options are searched together
+            groups: Dict[Optional[SearchOptions], List[int]] = {}
+            for row, (_, _, options, _) in enumerate(batch):
+                groups.setdefault(options, []).append(row)
+            results = [None] * len(batch)
+            for options, rows in groups.items():
+                found = self.embedding_store.search_batch(
+                    embeddings[rows],
+                    max(batch[row][1] for row in rows),
+                    queries=[batch[row][0] for row in rows],
+                    options=options
+                )
+                for row, chunks in zip(rows, found):
+                    results[row] = chunks
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+        with self._lock:
+            self.batches += 1
+            self.queries += len(batch)
+            self.full_batches += len(batch) == self.max_batch_size
+
+        for (_, top_k, _, future), embedding, chunks in zip(batch, embeddings, results):
+            future.set_result((embedding, chunks[:top_k]))
+
+    def stats(self) -> Dict:
+        mean_batch_size = self.queries / self.batches if self.batches else None
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batches,
+            'queries': self.queries,
+            'full_batches': self.full_batches,
+            'mean_batch_size': round(mean_batch_size, 2) if mean_batch_size else None,
+            'fill_ratio': round(mean_batch_size / self.max_batch_size, 4) if mean_batch_size else None
+        }
@@ -1,36 +1,278 @@
-import google.generativeai as genai
+import asyncio
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.chunk_store import Chunk
+from src.context_assembler import AssembledContext, ContextAssembler
+from src.generation import GenerationBackend, create_generation_backend
+from src.metrics import timed
+from src.partitions import SearchOptions
+from src.query_cache import LRUTTLCache, normalize_query
+from src.semantic_cache import SemanticCache
+
+
+class PreparedQuery(NamedTuple):
+    """
+    Retrieval result for one query, and the cached answer if there is one.
+    
+    ``chunks`` are those picked for the prompt; ``context`` is None when
+    the answer came from the semantic cache.
+    """
+    query: str
+    version: int
+    embedding: Optional[np.ndarray]
+    chunks: List[Chunk]
+    context: Optional[AssembledContext]
+    cache_key: Optional[Tuple]
+    cached: Optional[str]
+
 
 class RAGModel:
-    def __init__(self, config, embedding_store):
+    def __init__(self, config, embedding_store, generation_backend: Optional[GenerationBackend] = None):
         """
         Initialize the RAG model.
         
         Args:
             config (Config): Configuration object
             embedding_store (EmbeddingStore): Embedding store instance
+            generation_backend (GenerationBackend): Answer generator; built
+                from ``Config.GENERATION_BACKEND`` when omitted
         """
         self.config = config
         self.embedding_store = embedding_store
         
-        # Configure Gemini API
-        genai.configure(api_key=self.config.GEMINI_API_KEY)
-        self.generation_model = genai.GenerativeModel('gemini-pro')
+        self.generation_backend = generation_backend or create_generation_backend(self.config)
+        
+        # (query, retrieved chunk IDs, index version) -> response; dropped on every index swap
+        self.response_cache = LRUTTLCache(self.config.RESPONSE_CACHE_SIZE, ttl=self.config.QUERY_CACHE_TTL)
+        self.embedding_store.index_manager.add_listener(lambda version: self.response_cache.clear())
+        
+        # Answers to near-duplicate questions, matched by query embedding similarity
+        self.semantic_cache = SemanticCache(
+            threshold=self.config.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=self.config.SEMANTIC_CACHE_SIZE
+        )
+        self.embedding_store.index_manager.add_listener(lambda version: self.semantic_cache.invalidate())
+        
+        # Picks the retrieved chunks that go into the prompt
+        self.context_assembler = ContextAssembler(
+            token_budget=self.config.CONTEXT_TOKEN_BUDGET,
+            diversity=self.config.CONTEXT_DIVERSITY,
+            duplicate_threshold=self.config.CONTEXT_DUPLICATE_THRESHOLD
+        )
     
-    def generate_response(self, query: str) -> str:
+    def generate_response(self, query: str, use_semantic_cache: Optional[bool] = None,
+                          search_options: Optional[SearchOptions] = None) -> str:
         """
         Generate a response using RAG approach.
         
         Args:
             query (str): User's query
+            use_semantic_cache (bool): Answer near-duplicate questions from
+                the semantic cache; defaults to ``Config.SEMANTIC_CACHE_ENABLED``
+            search_options (SearchOptions): Partition routing and lexical weight
+                for this request's retrieval
         
         Returns:
             str: Generated response
         """
+        prepared = self._prepare(query, use_semantic_cache, search_options)
+        if prepared.cached is not None:
+            return prepared.cached
+        
+        # Generate response
+        prompt = self._prompt_for(prepared)
+        with timed('generation'):
+            response = self.generation_backend.generate(prompt)
+        
+        self._remember(prepared, response)
+        return response
+    
+    def stream_response(self, query: str, use_semantic_cache: Optional[bool] = None,
+                        search_options: Optional[SearchOptions] = None) -> Iterator[Dict]:
+        """
+        Generate a response using RAG approach, yielding it as it is produced.
+        
+        The first event lists the sources picked for the prompt and their
+        token counts, followed by one ``token`` event per generated text
+        piece and a final ``done`` event.
+        A cached answer arrives as a single ``token`` event.
+        
+        Args:
+            query (str): User's query
+            use_semantic_cache (bool): Answer near-duplicate questions from
+                the semantic cache; defaults to ``Config.SEMANTIC_CACHE_ENABLED``
+            search_options (SearchOptions): Partition routing and lexical weight
+                for this request's retrieval
+        
+        Yields:
+            Dict: Events with an ``event`` name and its payload
+        """
+        prepared = self._prepare(query, use_semantic_cache, search_options)
+        yield self._sources_event(prepared)
+        
+        if prepared.cached is not None:
+            yield {'event': 'token', 'text': prepared.cached}
+        else:
+            pieces = []
+            prompt = self._prompt_for(prepared)
+            with timed('generation'):
+                for piece in self.generation_backend.stream(prompt):
+                    pieces.append(piece)
+                    yield {'event': 'token', 'text': piece}
+            
+            # Only complete answers are cached; a dropped stream never gets here
+            self._remember(prepared, ''.join(pieces))
+        
+        yield {'event': 'done', 'cached': prepared.cached is not None}
+    
+    async def generate_response_async(self, query: str, use_semantic_cache: Optional[bool] = None,
+                                      search_options: Optional[SearchOptions] = None) -> str:
+        """
+        Generate a response without blocking the event loop.
+        
+        The embedding and generation round trips are awaited on the async
+        clients; only the FAISS search runs on a worker thread.
+        
+        Args:
+            query (str): User's query
+            use_semantic_cache (bool): Answer near-duplicate questions from
+                the semantic cache; defaults to ``Config.SEMANTIC_CACHE_ENABLED``
+            search_options (SearchOptions): Partition routing and lexical weight
+                for this request's retrieval
+        
+        Returns:
+            str: Generated response
+        """
+        prepared = await self._prepare_async(query, use_semantic_cache, search_options)
+        if prepared.cached is not None:
+            return prepared.cached
+        
+        prompt = self._prompt_for(prepared)
+        with timed('generation'):
+            response = await self.generation_backend.generate_async(prompt)
+        
+        self._remember(prepared, response)
+        return response
+    
+    async def stream_response_async(self, query: str, use_semantic_cache: Optional[bool] = None,
+                                    search_options: Optional[SearchOptions] = None) -> AsyncIterator[Dict]:
+        """
+        Async counterpart of ``stream_response``, yielding the same events.
+        """
+        prepared = await self._prepare_async(query, use_semantic_cache, search_options)
+        yield self._sources_event(prepared)
+        
+        if prepared.cached is not None:
+            yield {'event': 'token', 'text': prepared.cached}
+        else:
+            pieces = []
+            prompt = self._prompt_for(prepared)
+            with timed('generation'):
+                async for piece in self.generation_backend.stream_async(prompt):
+                    pieces.append(piece)
+                    yield {'event': 'token', 'text': piece}
+            
+            self._remember(prepared, ''.join(pieces))
+        
+        yield {'event': 'done', 'cached': prepared.cached is not None}
+    
+    def _prepare(self, query: str, use_semantic_cache: Optional[bool],
+                 search_options: Optional[SearchOptions] = None,
+                 query_embedding: Optional[np.ndarray] = None,
+                 chunks: Optional[List[Chunk]] = None) -> PreparedQuery:
+        """
+        Retrieve context for a query and look up a cached answer.
+        
+        Concurrent queries are embedded and searched in batches when the
+        store has a query coalescer; otherwise the search is skipped on a
+        semantic cache hit. A semantic cache hit would reuse context
+        retrieved with other settings, so requests tuning retrieval skip it.
+        """
+        if use_semantic_cache is None:
+            use_semantic_cache = self.config.SEMANTIC_CACHE_ENABLED
+        if search_options is not None:
+            use_semantic_cache = False
+        
+        version = self.embedding_store.index_manager.version
+        coalescer = self.embedding_store.query_coalescer
+        if query_embedding is None and coalescer is not None:
+            # Embedding and search happen on the batch thread; only the wait is timed here
+            with timed('retrieval'):
+                query_embedding, chunks = coalescer.search(query, self.config.CONTEXT_CANDIDATES, search_options)
+        elif query_embedding is None:
+            query_embedding = self.embedding_store.embed_query(query)
+        
+        if use_semantic_cache:
+            cached = self.semantic_cache.lookup(query_embedding, version)
+            if cached is not None:
+                response, chunks = cached
+                return PreparedQuery(query, version, None, chunks, None, None, response)
+        
         # Retrieve relevant context
-        context = self.embedding_store.search_embeddings(query)
+        if chunks is None:
+            chunks = self.embedding_store.search_by_embedding(query_embedding, self.config.CONTEXT_CANDIDATES,
+                                                              query=query, options=search_options)
+        with timed('context_assembly'):
+            context = self.context_assembler.assemble(chunks)
         
-        # Prepare prompt with context
-        prompt = f"""You are a medical chatbot specialized in kidney, diabetes, and heart diseases.
+        # Reuse the answer to the same question over the same retrieved chunks
+        cache_key = (normalize_query(query), tuple(chunk.id for chunk in chunks), version)
+        cached = self.response_cache.get(cache_key)
+        return PreparedQuery(query, version, query_embedding if use_semantic_cache else None, context.chunks,
+                             context, cache_key, cached)
+    
+    async def _prepare_async(self, query: str, use_semantic_cache: Optional[bool],
+                             search_options: Optional[SearchOptions] = None) -> PreparedQuery:
+        coalescer = self.embedding_store.query_coalescer
+        if coalescer is not None:
+            with timed('retrieval'):
+                query_embedding, chunks = await asyncio.wrap_future(
+                    coalescer.submit(query, self.config.CONTEXT_CANDIDATES, search_options))
+            return self._prepare(query, use_semantic_cache, search_options, query_embedding, chunks)
+        
+        query_embedding = await self.embedding_store.embed_query_async(query)
+        return await asyncio.to_thread(self._prepare, query, use_semantic_cache, search_options, query_embedding)
+    
+    def _prompt_for(self, prepared: PreparedQuery) -> str:
+        self.context_assembler.observe(prepared.context)
+        with timed('prompt_build'):
+            return self._build_prompt(prepared.query, prepared.context.texts)
+    
+    def _remember(self, prepared: PreparedQuery, response: str) -> None:
+        self.response_cache.put(prepared.cache_key, response)
+        if prepared.embedding is not None:
+            self.semantic_cache.store(prepared.embedding, prepared.query, (response, prepared.chunks), prepared.version)
+    
+    def _sources_event(self, prepared: PreparedQuery) -> Dict:
+        event = {'event': 'sources', 'sources': [self._source(chunk) for chunk in prepared.chunks]}
+        if prepared.context is not None:
+            event['context'] = prepared.context.usage()
+        return event
+    
+    @staticmethod
+    def _source(chunk: Chunk) -> Dict:
+        return {
+            'id': chunk.id,
+            'source': chunk.source,
+            'page_start': chunk.page_start,
+            'page_end': chunk.page_end,
+            'disease': chunk.disease
+        }
+    
+    def _build_prompt(self, query: str, context: List[str]) -> str:
+        """
+        Prepare prompt with context.
+        
+        Args:
+            query (str): User's query
+            context (List[str]): Chunk texts picked for the prompt
+        
+        Returns:
+            str: Prompt for the generation model
+        """
+        return f"""You are a medical chatbot specialized in kidney, diabetes, and heart diseases.
         
         Context: {' '.join(context)}
         
@@ -39,8 +281,25 @@ class RAGModel:
         Based on the context and your medical knowledge, provide a comprehensive and precise answer. 
         If the query is not related to kidney, diabetes, or heart diseases, politely inform the user.
         """
+    
+    def cache_stats(self) -> Dict:
+        """
+        Report hit ratios of the query embedding and response caches,
+        how full query batches are and the tokens context assembly saved.
         
-        # Generate response
-        response = self.generation_model.generate_content(prompt)
-        
-        return response.text
\ No newline at end of file
+        Returns:
+            Dict: Statistics per cache
+        """
+        stats = {
+            'query_embedding': self.embedding_store.query_embedding_cache.stats(),
+            'response': self.response_cache.stats(),
+            'semantic': self.semantic_cache.stats(),
+            'context': self.context_assembler.stats(),
+            'index_version': self.embedding_store.index_manager.version,
+            'index_generation': self.embedding_store.index_manager.generation
+        }
+        if self.embedding_store.embedding_cache is not None:
+            stats['chunk_embedding'] = self.embedding_store.embedding_cache.stats()
+        if self.embedding_store.query_coalescer is not None:
+            stats['query_batching'] = self.embedding_store.query_coalescer.stats()
+        return stats
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+import itertools
+import shutil
+import tempfile
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from src.document_processor import DocumentProcessor
+
+# Topics a report must mention for the consultation bot to read it
+RELEVANT_KEYWORDS = ('diabetes', 'kidney', 'heart', 'blood pressure', 'sugar')
+
+PDF_MAGIC = b'%PDF-'
+COPY_CHUNK_BYTES = 2 ** 20
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive test for any of several keywords.
+
+    A text is lower-cased once and then scanned with substring searches,
+    stopping at the first keyword found. In CPython this is several times
+    faster than one combined case-insensitive regex.
+    """
+    __slots__ = ('keywords',)
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(sorted({keyword.lower() for keyword in keywords}, key=len))
+
+    def search(self, text: str) -> bool:
+        lowered = text.lower()
+        return any(keyword in lowered for keyword in self.keywords)
+
+
+RELEVANT_CONTENT = KeywordMatcher(RELEVANT_KEYWORDS)
+
+
+def is_relevant(pages: Iterable[str], matcher: KeywordMatcher = RELEVANT_CONTENT) -> bool:
+    """
+    Whether any page mentions a keyword; stops at the first page that does.
+    """
+    return any(matcher.search(page) for page in pages)
+
+
+class ReportIntake:
+    def __init__(self, max_workers: Optional[int] = None, max_bytes: int = 10 * 2 ** 20, max_pages: int = 100,
+                 max_files: int = 20, matcher: KeywordMatcher = RELEVANT_CONTENT):
+        """
+        Screen and extract several uploaded patient reports at once.
+
+        Uploads are copied to a temporary folder in fixed-size chunks, and
+        copying stops as soon as a file exceeds ``max_bytes``. Files that
+        are not PDFs, or have more than ``max_pages`` pages, are rejected
+        before any text is extracted. The rest are extracted in parallel
+        by one ``DocumentProcessor`` shared by all requests, with at most
+        ``max_workers`` files in flight, and kept only if they mention a
+        relevant keyword.
+
+        Args:
+            max_workers (int): Extraction processes; defaults to the CPU count
+            max_bytes (int): Largest accepted file
+            max_pages (int): Most pages in an accepted file
+            max_files (int): Most files per upload
+            matcher (KeywordMatcher): Relevance test
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.max_files = max_files
+        self.matcher = matcher
+        self.processor = DocumentProcessor(self.max_workers, max_pages)
+
+    def _spool(self, stream: BinaryIO, path: str) -> Optional[str]:
+        """
+        Copy an upload to disk; returns why it was rejected, if it was.
+        """
+        with open(path, 'wb') as file:
+            head = stream.read(len(PDF_MAGIC))
+            if head != PDF_MAGIC:
+                return 'not a PDF file'
+            file.write(head)
+            size = len(head)
+            while True:
+                chunk = stream.read(COPY_CHUNK_BYTES)
+                if not chunk:
+                    return None
+                size += len(chunk)
+                if size > self.max_bytes:
+                    return f'larger than the limit of {self.max_bytes} bytes'
+                file.write(chunk)
+
+    def extract(self, uploads: Iterable[Tuple[str, BinaryIO]]) -> List[Dict]:
+        """
+        Screen and extract uploaded reports.
+
+        Args:
+            uploads (Iterable[Tuple[str, BinaryIO]]): File names and readable streams
+
+        Returns:
+            List[Dict]: One record per upload, in upload order, with ``status``
+                'accepted' (and its ``text``), 'irrelevant' or 'rejected' (and a ``reason``)
+        """
+        uploads = list(uploads)
+        if len(uploads) > self.max_files:
+            raise ValueError(f"At most {self.max_files} reports can be uploaded at once")
+
+        work_dir = tempfile.mkdtemp(prefix='reports_')
+        try:
+            records = []
+            spooled = {}
+            for i, (filename, stream) in enumerate(uploads):
+                record = {'file': filename, 'status': 'rejected', 'pages': 0}
+                records.append(record)
+                if os.path.splitext(filename.lower())[1] != '.pdf':
+                    record['reason'] = 'unsupported file format; upload PDF reports'
+                    continue
+                # Stored under its upload index, whatever its name; the name stays in the record
+                stored = os.path.join(work_dir, f'{i:04d}.pdf')
+                reason = self._spool(stream, stored)
+                if reason is not None:
+                    os.remove(stored)
+                    record['reason'] = reason
+                    continue
+                spooled[f'{i:04d}'] = record
+
+            report = []
+            # Pages of one report arrive together; irrelevant ones are dropped as they come
+            pages_by_report = self.processor.iter_pages(work_dir, report)
+            for document, pages in itertools.groupby(pages_by_report, key=lambda page: page[0]):
+                texts = [text for _, _, text in pages]
+                record = spooled[document]
+                if is_relevant(texts, self.matcher):
+                    record['status'] = 'accepted'
+                    record['text'] = ''.join(texts)
+                else:
+                    record['status'] = 'irrelevant'
+                    record['reason'] = 'content is not related to the bot expertise'
+
+            for entry in report:
+                record = spooled[os.path.splitext(entry['file'])[0]]
+                record['pages'] = entry['pages']
+                record['seconds'] = entry['seconds']
+                if entry['error'] is not None:
+                    record['reason'] = entry['error'] or 'could not be read as a PDF'
+                elif entry['pages'] == 0:
+                    record['status'] = 'irrelevant'
+                    record['reason'] = 'no pages'
+            return records
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
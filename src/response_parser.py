@@ -0,0 +1,221 @@
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+SUMMARY = 'summary'
+PRIORITY = 'priority'
+DISEASE = 'disease'
+
+# Severity scale the consultation prompt asks for: (upper bound, band)
+PRIORITY_BANDS = ((20, 'Low'), (40, 'Mild'), (60, 'Moderate'), (80, 'Severe'), (100, 'Very Severe'))
+
+# Canonical consultation conditions and the name fragments, typos included, that mean them
+DISEASE_ALIASES = {
+    'diabetes': ('diab', 'sugar', 'glyc'),
+    'kidney': ('kidney', 'renal', 'nephr', 'ckd'),
+    'hypertension': ('hypert', 'blood pressure', 'htn'),
+}
+
+# Header spellings seen in model output, mapped to their section
+_HEADER_NAMES = {
+    SUMMARY: r'summary',
+    PRIORITY: r'priority|severity(?:\s+rating)?|condition\s+(?:severity\s+)?rating',
+    DISEASE: r'diseases?|suspected\s+conditions?|conditions?',
+}
+# A bare ``NAME:`` line is a header only for the section names themselves; lines such
+# as "Condition: long-standing type 2 diabetes" are ordinary answer text
+_BARE_HEADER_NAMES = {SUMMARY: r'summary', PRIORITY: r'priority', DISEASE: r'diseases?'}
+# One pass finds every header: ``[NAME]`` anywhere, ``NAME:`` opening a line, a bold
+# or italic ``NAME:`` opening a line, or a markdown heading or bold line holding just
+# the name, with the emphasis around it
+_HEADER = re.compile(
+    r'(?:\[\s*(?:{b})\s*\]'
+    r'|^[ \t>*_-]*(?:{l})[ \t]*(?:\*\*|__)?[ \t]*:'
+    r'|^[ \t>-]*(?:\*\*|__|[*_](?![ \t]))[ \t]*(?:{e})[ \t]*(?:\*\*|__|[*_])?[ \t]*:'
+    r'|^[ \t]*(?:#+|\*\*|__)[ \t]*(?:\*\*|__)?(?:{h})(?:\*\*|__)?[ \t]*(?=\r?$))'
+    r'(?:[ \t]*(?:\*\*|__|:))*'.format(**{
+        form: '|'.join(f'(?P<{section}_{form}>{pattern})' for section, pattern in names.items())
+        for form, names in (('b', _HEADER_NAMES), ('l', _BARE_HEADER_NAMES), ('e', _HEADER_NAMES), ('h', _HEADER_NAMES))
+    }),
+    re.IGNORECASE | re.MULTILINE
+)
+
+_PRIORITY_RANGE = re.compile(r'(\d{1,3})\s*(?:-|–|to)\s*(\d{1,3})')
+_PRIORITY_NUMBER = re.compile(r'(\d{1,3})(?:\.\d+)?\s*(?:/\s*100|%)?')
+_PRIORITY_BAND = re.compile(r'very\s+severe|severe|moderate|mild|low', re.IGNORECASE)
+_DISEASE_ENTRY = re.compile(
+    r'(?P<name>[A-Za-z][A-Za-z /\'-]*?)[ \t*_]*(?:\(|:|-|–|=)?[ \t*_]*(?P<percent>\d{1,3}(?:\.\d+)?)[ \t]*%'
+)
+_EMPHASIS = re.compile(r'\*\*|__')
+
+
+class ParsedResponse(NamedTuple):
+    summary: Optional[str]
+    priority: Optional[int]
+    priority_band: Optional[str]
+    diseases: Dict[str, float]
+
+    @property
+    def is_final(self) -> bool:
+        """
+        Whether the reply closes the consultation with its summary and rating.
+        """
+        return self.summary is not None and self.priority is not None
+
+
+def priority_band(score: int) -> str:
+    for upper, band in PRIORITY_BANDS:
+        if score <= upper:
+            return band
+    return PRIORITY_BANDS[-1][1]
+
+
+def parse_priority(text: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Read a severity rating: a score, a scale range such as ``61-80``, or a band name.
+
+    Returns:
+        Tuple[Optional[int], Optional[str]]: Score from 0 to 100 and its band
+    """
+    match = _PRIORITY_RANGE.search(text)
+    if match:
+        low, high = sorted(min(int(value), 100) for value in match.groups())
+        score = (low + high) // 2
+        return score, priority_band(score)
+
+    match = _PRIORITY_NUMBER.search(text)
+    if match and int(match.group(1)) <= 100:
+        score = int(match.group(1))
+        return score, priority_band(score)
+
+    match = _PRIORITY_BAND.search(text)
+    if match:
+        band = ' '.join(match.group(0).split()).title()
+        lower = 0
+        for upper, name in PRIORITY_BANDS:
+            if name == band:
+                return (lower + upper) // 2, band
+            lower = upper + 1
+    return None, None
+
+
+def canonical_disease(name: str) -> str:
+    name = ' '.join(name.lower().split())
+    for disease, aliases in DISEASE_ALIASES.items():
+        if any(alias in name for alias in aliases):
+            return disease
+    return name
+
+
+def parse_diseases(text: str) -> Dict[str, float]:
+    """
+    Read ``condition: NN%`` entries, one per line or several per line.
+
+    Returns:
+        Dict[str, float]: Condition to probability between 0 and 1
+    """
+    diseases = {}
+    for match in _DISEASE_ENTRY.finditer(_EMPHASIS.sub('', text)):
+        name = canonical_disease(match.group('name').strip(" -'/"))
+        if name:
+            diseases[name] = min(float(match.group('percent')), 100.0) / 100
+    return diseases
+
+
+class SectionParser:
+    def __init__(self, on_section: Optional[Callable[[str, str], None]] = None):
+        """
+        Incremental parser for the ``[SUMMARY]``, ``[PRIORITY]`` and ``[DISEASE]`` sections.
+
+        Text is fed as it streams in and scanned once. A section is
+        complete when the next header arrives, or when the stream is
+        closed, and ``on_section(section, text)`` is called for it right
+        away, so its consumer need not wait for the rest of the reply.
+        Headers are recognized with or without brackets, colons or
+        markdown emphasis; synonyms such as ``Severity`` or ``Conditions``
+        count only when bracketed or emphasised, since a bare line starting
+        with them is usually part of the answer. Text before the first
+        header is ignored.
+
+        Args:
+            on_section (Callable[[str, str], None]): Called with each completed section
+        """
+        self.on_section = on_section
+        self.sections: Dict[str, str] = {}
+        self._buffer = ''
+        self._scanned = 0
+        self._current: Optional[str] = None
+        self._start = 0
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text.
+
+        Returns:
+            List[str]: Sections completed by this text
+        """
+        self._buffer += text
+        # A header may be cut off at the end of the text so far; only scan whole lines
+        end = self._buffer.rfind('\n') + 1
+        completed = self._scan(end)
+        self._compact()
+        return completed
+
+    def _scan(self, end: int) -> List[str]:
+        completed = []
+        for match in _HEADER.finditer(self._buffer, self._scanned, end):
+            if self._current is not None:
+                completed.append(self._finish(self._buffer[self._start:match.start()]))
+            self._current = match.lastgroup.rsplit('_', 1)[0]
+            self._start = match.end()
+        self._scanned = max(self._scanned, end)
+        return completed
+
+    def _compact(self) -> None:
+        # Text before the open section, or all scanned text outside any section, is no longer needed
+        drop = self._start if self._current is not None else self._scanned
+        if drop:
+            self._buffer = self._buffer[drop:]
+            self._scanned -= drop
+            self._start -= drop if self._current is not None else 0
+
+    def _finish(self, text: str) -> str:
+        section = self._current
+        text = _EMPHASIS.sub('', text).strip()
+        # A repeated header continues its section
+        self.sections[section] = f'{self.sections[section]}\n{text}' if section in self.sections else text
+        if self.on_section is not None:
+            self.on_section(section, self.sections[section])
+        return section
+
+    def close(self) -> ParsedResponse:
+        """
+        End the stream, completing the open section, and return the parsed record.
+        """
+        self._scan(len(self._buffer))
+        if self._current is not None:
+            self._finish(self._buffer[self._start:])
+            self._current = None
+        self._buffer = ''
+        self._scanned = self._start = 0
+        return self.result()
+
+    def result(self) -> ParsedResponse:
+        summary = self.sections.get(SUMMARY) or None
+        score, band = parse_priority(self.sections[PRIORITY]) if PRIORITY in self.sections else (None, None)
+        diseases = parse_diseases(self.sections[DISEASE]) if DISEASE in self.sections else {}
+        return ParsedResponse(summary, score, band, diseases)
+
+
+def parse_sections(text: str) -> ParsedResponse:
+    """
+    Parse a complete model reply.
+
+    Args:
+        text (str): Consultation reply
+
+    Returns:
+        ParsedResponse: Summary, priority score and band, and condition probabilities
+    """
+    parser = SectionParser()
+    parser.feed(text)
+    return parser.close()
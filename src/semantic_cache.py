@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+class SemanticCache:
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000):
+        """
+        Reuse answers for questions that mean the same thing.
+
+        Past query embeddings are kept in a small inner-product index over
+        unit vectors; a new query whose cosine similarity to a stored one
+        reaches ``threshold`` gets the stored answer. Entries are evicted
+        least recently used first, and everything is dropped when the
+        medical index version changes.
+
+        Args:
+            threshold (float): Minimum cosine similarity for a hit
+            max_entries (int): Maximum number of cached answers
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._index = None
+        self._entries: 'OrderedDict[int, Tuple[str, Any]]' = OrderedDict()
+        self._next_id = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype='float32').reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._index = None
+        self._entries.clear()
+
+    def lookup(self, embedding: np.ndarray, version: int) -> Optional[Any]:
+        """
+        Find the answer to a sufficiently similar past question.
+
+        Args:
+            embedding (np.ndarray): Query embedding
+            version (int): Current medical index version
+
+        Returns:
+            Optional[Any]: Cached answer, or None on a miss
+        """
+        with self._lock:
+            self._check_version(version)
+            if self._index is not None and self._index.ntotal:
+                similarities, ids = self._index.search(self._unit(embedding), 1)
+                entry_id = int(ids[0][0])
+                if entry_id != -1 and similarities[0][0] >= self.threshold:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id][1]
+            self.misses += 1
+            return None
+
+    def store(self, embedding: np.ndarray, query: str, response: Any, version: int) -> None:
+        """
+        Remember the answer to a question.
+
+        Args:
+            embedding (np.ndarray): Query embedding
+            query (str): Question as asked
+            response (Any): Generated answer, with whatever the caller needs to replay it
+            version (int): Medical index version the answer was based on
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            self._check_version(version)
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype='int64'))
+            self._entries[entry_id] = (query, response)
+
+            while len(self._entries) > self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.array([evicted_id], dtype='int64'))
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }